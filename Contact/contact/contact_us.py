@@ -1,14 +1,11 @@
 import json
-import boto3
-import logging
 from random import randint
+from contact import clients, encoder, logger, warmup
 from botocore.exceptions import ClientError
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-if logger.handlers:
-    handler = logger.handlers[0]
-    handler.setFormatter(logging.Formatter("[%(levelname)s]\t%(asctime)s.%(msecs)dZ\t%(aws_request_id)s\t%(module)s:%(funcName)s\t%(message)s\n", "%Y-%m-%dT%H:%M:%S"))
+log = logger.setup_logger()
+
+clients.warm_up('ses')
 
 # Email configuration
 CHARSET = "UTF-8"
@@ -17,6 +14,10 @@ SENDER = "Ewelists <contact@ewelists.com>"
 
 
 def handler(event, context):
+    if warmup.is_warm_up(event):
+        return warmup.response(clients.prime())
+
+    logger.sample_request()
     response = contact_main(event)
     return response
 
@@ -32,13 +33,13 @@ def contact_main(event):
         body = html_body(name, email, message)
         send(body, subject)
     except Exception as e:
-        logger.error("Exception: {}".format(e))
-        response = create_response(500, json.dumps({'error': str(e)}))
-        logger.info("Returning response: {}".format(response))
+        log.error("Exception: {}".format(e))
+        response = create_response(500, {'error': str(e)})
+        log.info("Returning response: {}".format(response))
         return response
 
     data = {'name': name, 'email': email, 'message': message, 'id': message_id}
-    response = create_response(200, json.dumps(data))
+    response = create_response(200, data)
     return response
 
 
@@ -47,7 +48,7 @@ def get_id():
 
 
 def send(body_html, subject):
-    ses = boto3.client('ses', region_name='eu-west-1')
+    ses = clients.get_client('ses')
 
     try:
         response = ses.send_email(
@@ -64,10 +65,10 @@ def send(body_html, subject):
             Source=SENDER
         )
     except ClientError as e:
-        logger.error("Error sending email: " + e.response['Error']['Message'])
+        log.error("Error sending email: " + e.response['Error']['Message'])
         raise Exception("Error sending email: " + e.response['Error']['Message'])
     else:
-        logger.info("Email sent! Message ID: " + response['MessageId'])
+        log.info("Email sent! Message ID: " + response['MessageId'])
 
     return True
 
@@ -91,7 +92,7 @@ def get_sender_details(event, attribute):
     try:
         body = json.loads(event['body'])
         value = body[attribute]
-        logger.info(attribute + ": " + str(value))
+        log.info(attribute + ": " + str(value))
     except Exception:
         raise Exception("API Event did not contain " + attribute + " in the body.")
 
@@ -99,7 +100,11 @@ def get_sender_details(event, attribute):
 
 
 def create_response(code, body):
-    logger.info("Creating response with status code ({}) and body ({})".format(code, body))
+    """Response for API Gateway. The body is encoded as JSON, unless it is a string that has already been serialized."""
+    if not isinstance(body, str):
+        body = encoder.dumps(body)
+
+    log.info("Creating response with status code ({}) and body length ({})".format(code, len(body)))
     response = {'statusCode': code,
                 'body': body,
                 'headers': {
@@ -0,0 +1,54 @@
+# JSON encoders for response bodies. orjson is used when it is installed, with the standard library as the fallback.
+import json
+import os
+from contact import logger
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+log = logger.setup_logger()
+
+
+def encode_json(obj):
+    return json.dumps(obj)
+
+
+def encode_orjson(obj):
+    try:
+        return orjson.dumps(obj).decode('utf-8')
+    except TypeError:
+        # e.g. dict keys that are not strings, which orjson does not encode by default.
+        return json.dumps(obj)
+
+
+ENCODERS = {'json': encode_json}
+if orjson is not None:
+    ENCODERS['orjson'] = encode_orjson
+
+
+def get_encoder(name=None):
+    """Encoder by name, defaulting to the JSON_ENCODER environment variable and then the fastest one installed."""
+    name = name or os.environ.get('JSON_ENCODER')
+    if name is None:
+        name = 'orjson' if 'orjson' in ENCODERS else 'json'
+
+    if name not in ENCODERS:
+        log.info("JSON encoder {} is not available, using json.".format(name))
+        name = 'json'
+
+    return ENCODERS[name]
+
+
+def set_encoder(name):
+    global encoder
+    encoder = get_encoder(name)
+    return encoder
+
+
+encoder = get_encoder()
+
+
+def dumps(obj):
+    return encoder(obj)
@@ -1,6 +1,14 @@
 import pytest
 import boto3
 from moto import mock_ses
+from contact import clients, logger
+
+
+@pytest.fixture(autouse=True)
+def reset_clients():
+    clients.reset()
+    yield
+    logger.sample_request(1)
 
 
 @pytest.fixture
@@ -84,3 +84,14 @@ def test_create_response():
                             'Access-Control-Allow-Origin': '*'
                          }}
     assert response == expected_response, "Create_response did not return the expected response value."
+
+
+def test_create_response_with_object():
+    response = contact_us.create_response(200, {'message': 'Success message'})
+    assert json.loads(response['body']) == {'message': 'Success message'}, "Response body was not as expected."
+
+
+def test_handler_warm_up(monkeypatch):
+    monkeypatch.setattr(contact_us.clients, 'prime', lambda: ['ses'])
+    response = contact_us.handler({'source': 'ewelists.warmup'}, None)
+    assert response == {'warmedUp': True, 'primed': ['ses']}, "Warm-up response was not as expected."
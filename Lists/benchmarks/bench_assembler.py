@@ -0,0 +1,121 @@
+"""Time and peak memory of assembling list objects from large list partitions.
+
+Compares common_assembler.assemble_list with the per-item startswith checks and per-item logging it replaced, for both
+the get_list and get_shared_list shapes. Log records are formatted and discarded, as they would be written to the
+function's log stream. Run from the Lists directory:
+
+    python benchmarks/bench_assembler.py [--sizes 1000 5000 10000 50000] [--repeat 3]
+"""
+import argparse
+import logging
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'eu-west-1')
+
+from lists import common_assembler  # noqa: E402
+from lists.common_entities import List, Product, Reservation  # noqa: E402
+from partitions import create_partition  # noqa: E402
+
+log = logging.getLogger()
+
+
+class DiscardingHandler(logging.Handler):
+    def emit(self, record):
+        self.format(record)
+
+
+def legacy_generate_list_object(response_items):
+    """get_list.generate_list_object before the shared assembler, kept here as the baseline."""
+    list = {"list": None, "products": {}, "reserved": []}
+
+    for item in response_items:
+        if item['SK']['S'].startswith("USER"):
+            log.info("List Owner Item: {}".format(item))
+            list['list'] = List.decode(item)
+        elif item['SK']['S'].startswith("PRODUCT"):
+            log.info("Product Item: {}".format(item))
+            product = Product.decode(item)
+            productId = product['productId']
+            list['products'][productId] = product
+        elif item['SK']['S'].startswith("RESERVATION") and item['state']['S'] != 'cancelled':
+            log.info("Reserved Item: {}".format(item))
+            reserved = Reservation.decode(item)
+            list['reserved'].append(reserved)
+
+    return list
+
+
+def legacy_generate_shared_list_object(response_items):
+    """get_shared_list.generate_list_object before the shared assembler, kept here as the baseline."""
+    list = {"list": None, "products": {}, "reserved": {}}
+
+    for item in response_items:
+        if item['SK']['S'].startswith("USER"):
+            log.info("List Owner Item: {}".format(item))
+            list['list'] = List.decode(item)
+        elif item['SK']['S'].startswith("PRODUCT"):
+            log.info("Product Item: {}".format(item))
+            product = Product.decode(item)
+            productId = product['productId']
+            list['products'][productId] = product
+        elif item['SK']['S'].startswith("RESERVATION") and item['state']['S'] != 'cancelled':
+            log.info("Reserved Item: {}".format(item))
+            reserved = Reservation.decode(item)
+            productId = reserved['productId']
+            userId = reserved['userId']
+
+            if productId not in list['reserved']:
+                list['reserved'][productId] = {}
+
+            if userId not in list['reserved'][productId]:
+                list['reserved'][productId][userId] = []
+
+            list['reserved'][productId][userId].append(reserved)
+
+    return list
+
+
+def peak_memory(case):
+    tracemalloc.start()
+    try:
+        case()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    handler = DiscardingHandler()
+    handler.setFormatter(logging.Formatter("[%(levelname)s]\t%(asctime)s\t%(module)s:%(funcName)s\t%(message)s\n"))
+    log.handlers = [handler]
+    log.setLevel(logging.INFO)
+
+    print("{:>8}  {:<28} {:>10} {:>14}".format('items', 'assembler', 'best ms', 'peak memory'))
+    for size in args.sizes:
+        items = create_partition(size)
+        assert legacy_generate_list_object(items) == common_assembler.assemble_list(items), "Assembled lists did not agree."
+        assert legacy_generate_shared_list_object(items) == common_assembler.assemble_list(items, group_reserved=True), "Assembled lists did not agree."
+
+        cases = [
+            ('legacy get_list', lambda: legacy_generate_list_object(items)),
+            ('assemble_list', lambda: common_assembler.assemble_list(items)),
+            ('legacy get_shared_list', lambda: legacy_generate_shared_list_object(items)),
+            ('assemble_list (grouped)', lambda: common_assembler.assemble_list(items, group_reserved=True)),
+        ]
+
+        for name, case in cases:
+            best = min(timeit.repeat(case, number=1, repeat=args.repeat))
+            print("{:>8}  {:<28} {:>10.2f} {:>11.1f} KiB".format(size, name, best * 1000, peak_memory(case) / 1024))
+
+
+if __name__ == '__main__':
+    main()
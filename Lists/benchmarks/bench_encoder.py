@@ -0,0 +1,45 @@
+"""Time to encode get_shared_list response bodies with each of the JSON encoders in common_encoder.
+
+The payloads are assembled from synthetic list partitions in the get_shared_list shape. Run from the Lists directory:
+
+    python benchmarks/bench_encoder.py [--sizes 1000 10000 50000] [--repeat 5]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'eu-west-1')
+
+from lists import common_assembler, common_encoder  # noqa: E402
+from partitions import create_partition  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    if common_encoder.orjson is None:
+        print("orjson is not installed, only the json encoder will be compared.")
+
+    print("{:>8}  {:<10} {:>10} {:>12}".format('items', 'encoder', 'best ms', 'body bytes'))
+    for size in args.sizes:
+        list_object = common_assembler.assemble_list(create_partition(size), group_reserved=True)
+
+        for name, encoder in sorted(common_encoder.ENCODERS.items()):
+            body = encoder(list_object)
+            assert json.loads(body) == list_object, "Encoded body did not decode to the list object."
+
+            best = min(timeit.repeat(lambda: encoder(list_object), number=1, repeat=args.repeat))
+            print("{:>8}  {:<10} {:>10.2f} {:>12,}".format(size, name, best * 1000, len(body.encode('utf-8'))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""Cold start import and init time of each handler module, measured in a fresh interpreter per run.
+
+Handler modules are read from the Handler entries of the service's template.yaml. Each run imports one handler module
+in a new python process, as a new lambda container would, so the time includes the module's init work (e.g. the
+clients it warms up). The heaviest third party packages the module imports are reported with the -X importtime
+cumulative time of each. Run from the Lists directory, giving the directory of another service to profile it:
+
+    python benchmarks/bench_imports.py [--service ../Products] [--repeat 5]
+
+Results can be appended to a history file, one JSON line per run, and checked against the last entry for the service,
+so that a change which slows down cold starts fails the check:
+
+    python benchmarks/bench_imports.py --record benchmarks/import_times.jsonl
+    python benchmarks/bench_imports.py --check benchmarks/import_times.jsonl [--tolerance 0.25]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages which are not part of the standard library, of which the import time is reported for each module.
+PACKAGES = ['boto3', 'requests', 'metadata_parser', 'bs4', 'orjson']
+
+IMPORT_SCRIPT = """
+import sys, time
+sys.path.insert(0, {path!r})
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+
+def get_handler_modules(service_dir):
+    """Modules of the Handler entries of the service template, e.g. lists/create.handler is lists.create."""
+    modules = []
+    with open(os.path.join(service_dir, 'template.yaml'), 'r') as f:
+        for line in f:
+            match = re.match(r'^\s+Handler: ([\w/]+)\.\w+\s*$', line)
+            if match:
+                module = match.group(1).replace('/', '.')
+                if module not in modules:
+                    modules.append(module)
+
+    return modules
+
+
+def parse_import_times(stderr):
+    """Cumulative microseconds of the import of each package in -X importtime output."""
+    times = {}
+    for line in stderr.splitlines():
+        match = re.match(r'^import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)$', line)
+        if match and match.group(2) in PACKAGES:
+            # Times are cumulative, so a package imported by another, e.g. botocore by boto3, is in both times.
+            times[match.group(2)] = int(match.group(1))
+
+    return times
+
+
+def measure(service_dir, module):
+    """Seconds to import the module in a fresh interpreter, and the import time of each heavy package it imported."""
+    env = dict(os.environ)
+    env.setdefault('AWS_DEFAULT_REGION', 'eu-west-1')
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', IMPORT_SCRIPT.format(path=service_dir, module=module)],
+        cwd=service_dir, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise Exception("Import of {} failed: {}".format(module, result.stderr.strip().splitlines()[-1]))
+
+    return float(result.stdout.strip().splitlines()[-1]), parse_import_times(result.stderr)
+
+
+def profile(service_dir, modules, repeat):
+    results = {}
+    for module in modules:
+        runs = [measure(service_dir, module) for _ in range(repeat)]
+        seconds = [run[0] for run in runs]
+        results[module] = {
+            'median_ms': round(statistics.median(seconds) * 1000, 1),
+            'best_ms': round(min(seconds) * 1000, 1),
+            'packages_ms': {name: round(us / 1000, 1) for name, us in sorted(runs[-1][1].items())}
+        }
+
+    return results
+
+
+def get_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def get_last_entry(history_file, service):
+    last = None
+    if os.path.exists(history_file):
+        with open(history_file, 'r') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    if entry['service'] == service:
+                        last = entry
+
+    return last
+
+
+def check(results, baseline, tolerance):
+    """Modules of which the median import time is slower than the baseline by more than the tolerance."""
+    regressions = []
+    for module, result in results.items():
+        if module in baseline['modules']:
+            limit = baseline['modules'][module]['median_ms'] * (1 + tolerance)
+            if result['median_ms'] > limit:
+                regressions.append((module, baseline['modules'][module]['median_ms'], result['median_ms']))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument('--service', default=SERVICE_DIR, help="Directory of the service, containing template.yaml.")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--record', help="History file to append the results to.")
+    parser.add_argument('--check', help="History file with the baseline to check the results against.")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slow down of the median, e.g. 0.25 is 25%%.")
+    args = parser.parse_args()
+
+    service_dir = os.path.abspath(args.service)
+    service = os.path.basename(service_dir)
+    modules = get_handler_modules(service_dir)
+    results = profile(service_dir, modules, args.repeat)
+
+    print("{:<32} {:>10} {:>10}  {}".format('module', 'median ms', 'best ms', 'heavy imports (ms)'))
+    for module, result in results.items():
+        packages = ", ".join("{} {}".format(name, ms) for name, ms in result['packages_ms'].items())
+        print("{:<32} {:>10.1f} {:>10.1f}  {}".format(module, result['median_ms'], result['best_ms'], packages))
+
+    if args.check:
+        baseline = get_last_entry(args.check, service)
+        if baseline is None:
+            print("No baseline for {} in {}.".format(service, args.check))
+        else:
+            regressions = check(results, baseline, args.tolerance)
+            for module, before, after in regressions:
+                print("REGRESSION {}: {:.1f} ms, baseline {:.1f} ms ({}).".format(module, after, before, baseline['commit']))
+            if regressions:
+                sys.exit(1)
+            print("No regressions against the baseline of {} ({}).".format(baseline['date'], baseline['commit']))
+
+    if args.record:
+        entry = {
+            'service': service,
+            'date': datetime.date.today().isoformat(),
+            'commit': get_commit(),
+            'python': platform.python_version(),
+            'modules': results
+        }
+        with open(args.record, 'a') as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+if __name__ == '__main__':
+    main()
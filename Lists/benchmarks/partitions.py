@@ -0,0 +1,31 @@
+"""Synthetic list partitions, in the shape of the items returned by a query of a list partition."""
+
+LIST_ID = '12345678-list-0001-1234-abcdefghijkl'
+OWNER_ID = '12345678-user-0001-1234-abcdefghijkl'
+
+
+def create_partition(size):
+    """A list owner item, followed by products and reservations in equal numbers. One in ten reservations is cancelled."""
+    items = [{
+        'PK': {'S': 'LIST#' + LIST_ID}, 'SK': {'S': 'USER#' + OWNER_ID}, 'listId': {'S': LIST_ID}, 'title': {'S': 'Birthday List'},
+        'description': {'S': 'A gift list.'}, 'occasion': {'S': 'Birthday'}, 'imageUrl': {'S': '/images/celebration-default.jpg'},
+        'state': {'S': 'open'}, 'eventDate': {'S': '31 October 2018'}
+    }]
+
+    for i in range(size - 1):
+        product_id = '12345678-prod-{:04d}-1234-abcdefghijkl'.format(i // 2)
+        if i % 2 == 0:
+            items.append({
+                'PK': {'S': 'LIST#' + LIST_ID}, 'SK': {'S': 'PRODUCT#' + product_id}, 'quantity': {'N': '3'},
+                'reserved': {'N': '1'}, 'purchased': {'N': '0'}, 'type': {'S': 'products'}, 'notes': {'S': 'Size small'}
+            })
+        else:
+            items.append({
+                'PK': {'S': 'LIST#' + LIST_ID}, 'SK': {'S': 'RESERVATION#{}#user-0002#resv-{}'.format(product_id, i)},
+                'reservationId': {'S': 'resv-{}'.format(i)}, 'productId': {'S': product_id}, 'userId': {'S': 'user-0002'},
+                'listId': {'S': LIST_ID}, 'listOwnerId': {'S': OWNER_ID}, 'name': {'S': 'Test User2'},
+                'email': {'S': 'test.user2@gmail.com'}, 'quantity': {'N': '1'}, 'state': {'S': 'cancelled' if i % 20 == 1 else 'reserved'},
+                'listTitle': {'S': 'Birthday List'}, 'productType': {'S': 'products'}
+            })
+
+    return items
@@ -1,12 +1,18 @@
-import json
 import os
-import boto3
-from lists import common, common_kpi, logger
+from lists import common, common_clients, common_invocation, common_table_ops, common_kpi, common_request, common_schema, logger
 from botocore.exceptions import ClientError
 
 log = logger.setup_logger()
+common_clients.warm_up('dynamodb')
 
+SCHEMA = common_schema.compile_schema([
+    ('quantity', common_schema.integer(minimum=1)),
+    ('productType', common_schema.one_of('products', 'notfound')),
+    ('notes', common_schema.nullable(common_schema.string(allow_empty=True)), False)
+])
 
+
+@common_invocation.invocation_handler
 def handler(event, context):
     response = add_product_main(event)
     return response
@@ -14,31 +20,37 @@ def handler(event, context):
 
 def add_product_main(event):
     try:
+        request = common_request.get_request(event)
         table_name = common.get_env_variable(os.environ, 'TABLE_NAME')
-        identity = common.get_identity(event, os.environ)
-        list_id = common.get_path_parameter(event, 'id')
-        product_id = common.get_path_parameter(event, 'productid')
-        quantity = common.get_body_attribute(event, 'quantity')
+        identity = request.identity(os.environ)
+        list_id = request.path_parameter('id')
+        product_id = request.path_parameter('productid')
+        common_schema.validate_body(request, SCHEMA)
+        quantity = request.body_attribute('quantity')
         type = common.get_product_type(event)
-        notes = common.get_body_attribute_if_exists(event, 'notes')
+        notes = request.optional_body_attribute('notes')
         common.confirm_owner(table_name, identity, list_id)
 
         message = create_product_item(table_name, list_id, product_id, type, quantity, notes)
+        common_table_ops.bump_list_version(table_name, list_id, identity)
+    except common_schema.ValidationError as e:
+        log.info("Request was not valid: {}".format(e))
+        return common.create_response(400, e.get_details())
     except Exception as e:
         log.error("Exception: {}".format(e))
-        response = common.create_response(500, json.dumps({'error': str(e)}))
+        response = common.create_response(500, {'error': str(e)})
         log.info("Returning response: {}".format(response))
         return response
 
     common_kpi.post(os.environ, event, 'Gifts Added')
 
     data = {'message': message}
-    response = common.create_response(200, json.dumps(data))
+    response = common.create_response(200, data)
     return response
 
 
 def create_product_item(table_name, list_id, product_id, type, quantity, notes):
-    dynamodb = boto3.client('dynamodb')
+    dynamodb = common_clients.get_client('dynamodb')
 
     item = {
         'PK': {'S': "LIST#{}".format(list_id)},
@@ -53,7 +65,7 @@ def create_product_item(table_name, list_id, product_id, type, quantity, notes):
         item['notes'] = {'S': notes}
 
     try:
-        log.info("Put product item: {}".format(item))
+        logger.log_payload(log, "Put product item: {}", item)
         response = dynamodb.put_item(
             TableName=table_name,
             Item=item,
@@ -67,6 +79,6 @@ def create_product_item(table_name, list_id, product_id, type, quantity, notes):
             log.error("Product could not be created: {}".format(e))
             raise Exception('Product could not be created.')
 
-    log.info("Add response: {}".format(response))
+    logger.log_payload(log, "Add response: {}", response)
 
     return True
@@ -1,38 +1,39 @@
-import json
 import os
-import boto3
-from lists import common, logger
+from lists import common, common_clients, common_invocation, common_request, logger
 
 log = logger.setup_logger()
+common_clients.warm_up('dynamodb')
 
 
+@common_invocation.invocation_handler
 def handler(event, context):
-    log.info("Path Parameters: {}".format(json.dumps(event['pathParameters'])))
+    logger.log_payload(log, "Path Parameters: {}", event['pathParameters'])
     response = close_main(event)
     return response
 
 
 def close_main(event):
     try:
+        request = common_request.get_request(event)
         table_name = common.get_env_variable(os.environ, 'TABLE_NAME')
-        identity = common.get_identity(event, os.environ)
-        list_id = common.get_path_parameter(event, 'id')
+        identity = request.identity(os.environ)
+        list_id = request.path_parameter('id')
         common.confirm_owner(table_name, identity, list_id)
 
         update_list(table_name, identity, list_id)
     except Exception as e:
         log.error("Exception: {}".format(e))
-        response = common.create_response(500, json.dumps({'error': str(e)}))
+        response = common.create_response(500, {'error': str(e)})
         return response
 
     data = {'closed': True, 'listId': list_id}
 
-    response = common.create_response(200, json.dumps(data))
+    response = common.create_response(200, data)
     return response
 
 
 def update_list(table_name, user_id, list_id):
-    dynamodb = boto3.client('dynamodb')
+    dynamodb = common_clients.get_client('dynamodb')
     
     key = {
         'PK': {'S': "LIST#{}".format(list_id)},
@@ -43,12 +44,14 @@ def update_list(table_name, user_id, list_id):
         response = dynamodb.update_item(
             TableName=table_name,
             Key=key,
-            UpdateExpression="set #st = :s",
+            UpdateExpression="set #st = :s ADD #v :one",
             ExpressionAttributeValues={
                 ':s': {'S': 'closed'},
+                ':one': {'N': '1'}
             },
             ExpressionAttributeNames={
-                '#st': 'state'
+                '#st': 'state',
+                '#v': 'version'
             },
             ReturnValues="UPDATED_NEW"
         )
@@ -57,6 +60,6 @@ def update_list(table_name, user_id, list_id):
         log.info("update item exception: " + str(e))
         raise Exception("Unexpected error when updating the list item.")
 
-    log.info("Attributes updated: " + json.dumps(response['Attributes']))
+    logger.log_payload(log, "Attributes updated: {}", response['Attributes'])
 
     return True
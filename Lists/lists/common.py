@@ -1,9 +1,5 @@
-import json
 import re
-from botocore.exceptions import ClientError
-import boto3
-from urllib.parse import unquote
-from lists import common_table_ops, logger
+from lists import common_encoder, common_request, common_table_ops, logger
 from lists.common_entities import List
 
 log = logger.setup_logger()
@@ -22,49 +18,15 @@ def get_env_variable(osenv, name):
 
 
 def get_path_parameter(event, type):
-    log.info("Getting path parameter ({}).".format(type))
-    if type not in event['pathParameters']:
-        raise Exception("Path did not contain a " + type + " parameter.")
-
-    value = event['pathParameters'][type]
-
-    if value == "null":
-        raise Exception("Path contained a null " + type + " parameter.")
-
-    value = unquote(value)
-    log.info(type + " path parameter: " + value)
-
-    return value
+    return common_request.get_request(event).path_parameter(type)
 
 
 def get_body_attribute(event, type):
-    if not event['body']:
-        raise Exception("Body was missing required attributes.")
-
-    body_object = json.loads(event['body'])
-
-    if type in body_object:
-        value = body_object[type]
-    else:
-        raise Exception('API Event did not contain a ' + type + ' body attribute.')
-
-    log.info(type + ": " + str(value))
-    return value
+    return common_request.get_request(event).body_attribute(type)
 
 
 def get_body_attribute_if_exists(event, type):
-    if not event['body']:
-        raise Exception("Body was missing required attributes.")
-
-    body_object = json.loads(event['body'])
-
-    if type in body_object:
-        value = body_object[type]
-    else:
-        value = None
-
-    log.info(type + ": " + str(value))
-    return value
+    return common_request.get_request(event).optional_body_attribute(type)
 
 
 def parse_email(email):
@@ -96,6 +58,63 @@ def calculate_new_reserved_quantity(product_item, update_amount):
     return new_quantity
 
 
+def create_product_quantity_update(table_name, product_key, reserved_change, purchased_change=0, product_item=None):
+    """Transaction item which adds to the reserved and purchased counters of a product on the server, rather than writing absolute values.
+
+    Reducing the reserved quantity is guarded so that it cannot go below zero. Increasing the reserved and purchased total needs
+    the product item that was read, as the guard is against the quantity and purchased values of that read.
+    """
+    update_expression = "ADD reserved :r"
+    conditions = ["attribute_exists(PK)"]
+    values = {':r': {'N': str(reserved_change)}}
+
+    if purchased_change:
+        update_expression += ", purchased :p"
+        values[':p'] = {'N': str(purchased_change)}
+
+    if reserved_change < 0:
+        conditions.append("reserved >= :min_reserved")
+        values[':min_reserved'] = {'N': str(-reserved_change)}
+
+    if reserved_change + purchased_change > 0:
+        max_reserved = product_item['quantity'] - product_item['purchased'] - reserved_change - purchased_change
+        conditions.append("quantity = :quantity AND purchased = :purchased AND reserved <= :max_reserved")
+        values[':quantity'] = {'N': str(product_item['quantity'])}
+        values[':purchased'] = {'N': str(product_item['purchased'])}
+        values[':max_reserved'] = {'N': str(max_reserved)}
+
+    return {
+        'Update': {
+            'TableName': table_name,
+            'Key': product_key,
+            'UpdateExpression': update_expression,
+            'ConditionExpression': " AND ".join(conditions),
+            'ExpressionAttributeValues': values
+        }
+    }
+
+
+def check_cancelled_reservation_transaction(error, table_name, reservation, reserved_change):
+    """For a transaction of a product update followed by a reservation update, re-reads the item whose guard failed and raises the
+    error the request would have had if it had read that item first.
+
+    Returns the latest product item if its counters had changed but the update still fits, so that the caller can retry.
+    """
+    product_item = None
+
+    # The table has changed since the items were read during this invocation.
+    common_table_ops.clear_memo()
+
+    if common_table_ops.transaction_condition_failed(error, 0):
+        product_item = common_table_ops.get_product_item(table_name, reservation['listId'], reservation['productId'])
+        calculate_new_reserved_quantity(product_item, reserved_change)
+
+    if common_table_ops.transaction_condition_failed(error, 1):
+        gift_is_reserved(common_table_ops.get_reservation_state(table_name, create_reservation_key(reservation)))
+
+    return product_item
+
+
 def confirm_owner(table_name, user_id, list_id):
     """Confirms that the user owns a specified list, from the response items relating to a query for the same list."""
 
@@ -107,7 +126,7 @@ def confirm_owner(table_name, user_id, list_id):
 
     if not list_response:
         try:
-            common_table_ops.get_list_query(table_name, list_id)
+            common_table_ops.get_list_query(table_name, list_id, attributes=('PK', 'SK'))
             # Query was succesful, which means list exists, but user is not owner.
             raise Exception("User {} was not owner of List {}.".format(user_id, list_id))
         except Exception as e:
@@ -118,6 +137,16 @@ def confirm_owner(table_name, user_id, list_id):
     return True
 
 
+def confirm_list_owner(list_details, user_id, list_id):
+    """Confirms that the user owns a list, from the list owner item returned by a query of the list's partition."""
+    if not list_details or list_details['listOwner'] != user_id:
+        log.info("User {} was not owner of List {}.".format(user_id, list_id))
+        raise Exception("User {} was not owner of List {}.".format(user_id, list_id))
+
+    log.info("User {} was owner of list {}".format(user_id, list_id))
+    return True
+
+
 def confirm_reservation_owner(reservation_item, user):
     if reservation_item['userId'] != user and reservation_item['email'] != user:
         raise Exception("Requestor is not reservation owner.")
@@ -125,7 +154,11 @@ def confirm_reservation_owner(reservation_item, user):
 
 
 def create_response(code, body):
-    log.info("Creating response with status code ({}) and body ({})".format(code, body))
+    """Response for API Gateway. The body is encoded as JSON, unless it is a string that has already been serialized."""
+    if not isinstance(body, str):
+        body = common_encoder.dumps(body)
+
+    log.info("Creating response with status code ({}) and body length ({})".format(code, len(body)))
     response = {'statusCode': code,
                 'body': body,
                 'headers': {
@@ -135,28 +168,6 @@ def create_response(code, body):
     return response
 
 
-def send_email(email, template, template_data):
-    ses = boto3.client('ses', region_name='eu-west-1')
-
-    log.info("Sending email template {} with data: {}".format(template, template_data))
-    try:
-        response = ses.send_templated_email(
-            Source=SENDER,
-            Destination={
-                'ToAddresses': [email],
-            },
-            ReplyToAddresses=[SENDER],
-            Template=template,
-            TemplateData=json.dumps(template_data)
-        )
-    except ClientError as e:
-        raise Exception("Could not send reserve email: " + e.response['Error']['Message'])
-    else:
-        log.info("Email sent! Message ID: " + response['MessageId'])
-
-    return True
-
-
 def get_user(event, osenv, table_name, index_name):
     user = {}
 
@@ -182,36 +193,12 @@ def get_user(event, osenv, table_name, index_name):
 
 
 def get_identity(event, osenv):
-    log.info('Getting identity.')
-    try:
-        userArn = event['requestContext']['identity']['userArn']
-        cognito_authentication_provider = event['requestContext']['identity']['cognitoAuthenticationProvider']
-    except KeyError:
-        raise Exception("There was no identity in the API event.")
-
-    if userArn is None:
-        raise Exception("There was no identity in the API event.")
-
-    # Check to see if request was generated by postman, which doesn't authenticate via cognito.
-    pattern = re.compile("^arn:aws:iam::[0-9]{12}:user/ApiTestUser$")
-    pattern2 = re.compile("^arn:aws:iam::[0-9]{12}:user/ApiTestUser2$")
-    if pattern.match(userArn):
-        log.info('Request was from postman, using API test identity.')
-        identity = get_env_variable(osenv, 'POSTMAN_USERPOOL_SUB')
-    elif pattern2.match(userArn):
-        log.info('Request was from postman, using API test identity 2.')
-        identity = get_env_variable(osenv, 'POSTMAN_USERPOOL_SUB2')
-    else:
-        identity = cognito_authentication_provider.split(':')[-1]
-        log.info('cognitoIdentityId was retrieved from event.')
-
-    return identity
+    return common_request.get_request(event).identity(osenv)
 
 
 def get_product_type(event):
     try:
-        body_object = json.loads(event['body'])
-        product_type = body_object['productType']
+        product_type = common_request.get_request(event).body()['productType']
         log.info("Product type: " + str(product_type))
     except Exception:
         log.error("API Event did not contain the product type in the body.")
@@ -256,10 +243,10 @@ def check_image_url(url):
 
 
 def get_list_details(table_name, list_id):
-    items = common_table_ops.get_list_query(table_name, list_id)
+    items = common_table_ops.get_list_query(table_name, list_id, attributes=List.ATTRIBUTES)
 
     for item in items:
         if item['SK']['S'].startswith("USER"):
-            list = List(item).get_details()
+            list = List.decode(item)
 
     return list
@@ -0,0 +1,54 @@
+# Assembles the list object returned by get_list and get_shared_list from the items in the partition of a list.
+from lists import common_context, logger
+from lists.common_entities import List, Product, Reservation
+
+log = logger.setup_logger()
+
+
+def assemble_list(response_items, group_reserved=False, list_item=None):
+    """Builds the list, products and reserved maps in one pass over the items, dispatching each item on the prefix of its SK.
+
+    Reserved items are returned as a list, or grouped by product and then user if group_reserved is set. Items with other
+    prefixes (e.g. SHARE, PENDING) are skipped. If list_item is given, the list owner item is kept in it as 'item'.
+    """
+    list_object = {"list": None, "products": {}, "reserved": {} if group_reserved else []}
+    products = list_object['products']
+    reserved = list_object['reserved']
+    counts = {'items': 0, 'cancelled': 0}
+
+    def add_list(item):
+        list_object['list'] = List.decode(item)
+        if list_item is not None:
+            list_item['item'] = item
+
+    def add_product(item):
+        product = Product.decode(item)
+        products[product['productId']] = product
+
+    def add_reservation(item):
+        if item['state']['S'] == 'cancelled':
+            counts['cancelled'] += 1
+            return
+
+        reservation = Reservation.decode(item)
+        if group_reserved:
+            reserved.setdefault(reservation['productId'], {}).setdefault(reservation['userId'], []).append(reservation)
+        else:
+            reserved.append(reservation)
+
+    dispatch = {
+        'USER': add_list,
+        'PRODUCT': add_product,
+        'RESERVATION': add_reservation
+    }
+
+    for item in response_items:
+        counts['items'] += 1
+        add = dispatch.get(item['SK']['S'].partition('#')[0])
+        if add is not None:
+            add(item)
+
+    log.info("Assembled list from {} items: {} products, {} cancelled reservations.".format(counts['items'], len(products), counts['cancelled']))
+    common_context.annotate(listItems=counts['items'], listProducts=len(products))
+
+    return list_object
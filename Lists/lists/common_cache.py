@@ -0,0 +1,60 @@
+# Bounded caches which live for the life of a warm lambda container.
+import threading
+import time
+from collections import OrderedDict
+from lists import logger
+
+log = logger.setup_logger()
+
+
+class LRUCache:
+    """Least recently used cache, where entries also expire a fixed number of seconds after they were stored."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                evicted, _ = self._entries.popitem(last=False)
+                log.info("Evicted {} from cache.".format(evicted))
+
+        return True
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+        return True
@@ -0,0 +1,109 @@
+# A registry of AWS clients which live for the life of a warm lambda container.
+import os
+import threading
+import boto3
+from botocore.config import Config
+from lists import common_context, logger
+
+log = logger.setup_logger()
+
+# Tuned for lambda functions with a 5 second timeout: two attempts of at most 0.5 + 1 seconds, and the backoff between
+# them, fit within it. Connections are kept alive and pooled, so that concurrent requests (e.g. batch deletes on a
+# thread pool) can each hold a connection.
+CLIENT_CONFIG = Config(
+    connect_timeout=0.5,
+    read_timeout=1,
+    retries={'total_max_attempts': 2, 'mode': 'standard'},
+    max_pool_connections=16,
+    tcp_keepalive=True
+)
+
+# Services which must be called in a specific region, regardless of the region the function runs in.
+SERVICE_REGIONS = {
+    'ses': 'eu-west-1'
+}
+
+# Cheap requests which open a connection to a service, so that the first real request does not pay for the TLS
+# handshake. An error response still leaves the connection open in the client's pool.
+PRIMERS = {
+    'dynamodb': lambda client: client.describe_limits(),
+    'ses': lambda client: client.get_send_quota()
+}
+
+# Connections are only primed in lambda, so that importing a handler, e.g. in unit tests, never makes a request.
+IN_LAMBDA = 'AWS_LAMBDA_FUNCTION_NAME' in os.environ
+
+_clients = {}
+_lock = threading.Lock()
+_session = None
+
+
+def get_client(service_name):
+    """Returns the client for a service, creating it on first use."""
+    client = _clients.get(service_name)
+    if client is not None:
+        return client
+
+    with _lock:
+        if service_name not in _clients:
+            _clients[service_name] = create_client(service_name)
+
+    return _clients[service_name]
+
+
+def create_client(service_name):
+    global _session
+
+    if _session is None:
+        _session = boto3.session.Session()
+
+    log.info("Creating {} client.".format(service_name))
+    client = _session.client(service_name, region_name=SERVICE_REGIONS.get(service_name), config=CLIENT_CONFIG)
+    return common_context.instrument(client)
+
+
+def warm_up(*service_names):
+    """Creates clients during the lambda init phase, so that credential and endpoint resolution is not paid by the first
+    request, and opens their connections.
+    """
+    for service_name in service_names:
+        try:
+            get_client(service_name)
+        except Exception as e:
+            log.info("Could not warm up {} client: {}".format(service_name, e))
+
+    prime(*service_names)
+    return True
+
+
+def prime(*service_names):
+    """Opens a connection to each of the services, or to the service of each client that has been created. Returns
+    the services that were primed.
+    """
+    if not IN_LAMBDA:
+        return []
+
+    primed = []
+    for service_name in service_names or list(_clients):
+        if service_name not in PRIMERS or service_name not in _clients:
+            continue
+
+        try:
+            PRIMERS[service_name](_clients[service_name])
+        except Exception as e:
+            log.info("Priming {} connection returned: {}".format(service_name, e))
+
+        primed.append(service_name)
+
+    return primed
+
+
+def reset():
+    """Discards all clients, e.g. between unit tests."""
+    global _session
+
+    with _lock:
+        _clients.clear()
+        _session = None
+
+    return True
@@ -0,0 +1,183 @@
+# The context of the invocation being handled, which is written out as a single structured summary line when it ends.
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+_current = {'context': None}
+_lock = threading.Lock()
+
+POSTMAN_USER_ARN = re.compile("^arn:aws:iam::[0-9]{12}:user/ApiTestUser2?$")
+
+
+class InvocationContext:
+    """What happened during an invocation: the route and identity it was for, each AWS call with its duration and item
+    count, counters (e.g. memo and cache hits) and annotations added by handlers, and the outcome.
+    """
+    __slots__ = ('function', 'route', 'identity_type', 'started', 'calls', 'counts', 'annotations')
+
+    def __init__(self, function, event):
+        self.function = os.environ.get('AWS_LAMBDA_FUNCTION_NAME', function)
+        self.route = get_route(event)
+        self.identity_type = get_identity_type(event)
+        self.started = time.perf_counter()
+        self.calls = []
+        self.counts = {}
+        self.annotations = {}
+
+    def summary(self, response=None, error=None):
+        duration = time.perf_counter() - self.started
+        summary = {
+            'type': 'invocation',
+            'function': self.function,
+            'route': self.route,
+            'identityType': self.identity_type,
+            'durationMs': round(duration * 1000, 2),
+            'awsMs': round(sum(call['durationMs'] for call in self.calls), 2),
+            'calls': self.calls,
+            'counts': self.counts
+        }
+        summary.update(self.annotations)
+
+        if error is not None:
+            summary['outcome'] = 'exception'
+            summary['error'] = str(error)
+        elif isinstance(response, dict) and 'statusCode' in response:
+            summary['statusCode'] = response['statusCode']
+            summary['outcome'] = 'success' if response['statusCode'] < 400 else 'error'
+            if response['statusCode'] >= 400:
+                summary['error'] = get_error(response)
+        else:
+            summary['outcome'] = 'success'
+
+        return summary
+
+
+def get_route(event):
+    if not isinstance(event, dict):
+        return None
+
+    if 'httpMethod' in event:
+        return "{} {}".format(event['httpMethod'], event.get('resource') or event.get('path'))
+
+    # Scheduled events, and cognito triggers, e.g. PreSignUp_SignUp and PostAuthentication_Authentication.
+    return event.get('detail-type') or event.get('triggerSource')
+
+
+def get_identity_type(event):
+    try:
+        identity = event['requestContext']['identity']
+    except (KeyError, TypeError):
+        return None
+
+    if identity.get('userArn') and POSTMAN_USER_ARN.match(identity['userArn']):
+        return 'postman'
+    elif identity.get('cognitoAuthenticationProvider'):
+        return 'cognito'
+
+    return 'unauthenticated'
+
+
+def get_error(response):
+    try:
+        return json.loads(response['body'])['error']
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def start(function, event):
+    context = InvocationContext(function, event)
+    _current['context'] = context
+    return context
+
+
+def current():
+    return _current['context']
+
+
+def finish(response=None, error=None):
+    """Ends the invocation, writing its summary as one JSON line to stdout, where lambda sends it to the log stream."""
+    context = _current['context']
+    if context is None:
+        return None
+
+    _current['context'] = None
+    summary = context.summary(response, error)
+    sys.stdout.write(json.dumps(summary, default=str) + "\n")
+
+    return summary
+
+
+def record_call(service, operation, duration, items=None, status=None):
+    context = _current['context']
+    if context is None:
+        return False
+
+    call = {'service': service, 'operation': operation, 'durationMs': round(duration * 1000, 2)}
+    if items is not None:
+        call['items'] = items
+    if status is not None:
+        call['status'] = status
+
+    with _lock:
+        context.calls.append(call)
+
+    return True
+
+
+def count(name, amount=1):
+    context = _current['context']
+    if context is None:
+        return False
+
+    with _lock:
+        context.counts[name] = context.counts.get(name, 0) + amount
+
+    return True
+
+
+def annotate(**annotations):
+    context = _current['context']
+    if context is None:
+        return False
+
+    context.annotations.update(annotations)
+    return True
+
+
+def count_items(parsed):
+    if 'Count' in parsed:
+        return parsed['Count']
+    elif 'Items' in parsed:
+        return len(parsed['Items'])
+    elif 'Item' in parsed:
+        return 1
+
+    return None
+
+
+def before_call(context, **kwargs):
+    context['call_started'] = time.perf_counter()
+
+
+def after_call(http_response, parsed, model, context, **kwargs):
+    started = context.get('call_started')
+    if started is None:
+        return
+
+    record_call(
+        model.service_model.service_name,
+        model.name,
+        time.perf_counter() - started,
+        count_items(parsed),
+        http_response.status_code if http_response.status_code >= 300 else None
+    )
+
+
+def instrument(client):
+    """Records every call made by a client, including its retries, in the context of the current invocation."""
+    client.meta.events.register('before-call.*.*', before_call)
+    client.meta.events.register('after-call.*.*', after_call)
+    return client
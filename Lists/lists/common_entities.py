@@ -1,121 +1,150 @@
-class User:
+# Kinds of the attributes of an entity. Plans name the kind of each field rather than a decoder function, so that
+# decode_item converts each value inline, without a function call per field.
+STRING = 'S'
+NUMBER = 'N'
+# Id from a key attribute, e.g. USER#12345678-user-0001-1234-abcdefghijkl.
+KEY_ID = '#'
+
+
+def compile_plan(fields):
+    """Field plan of an entity, from (name, attribute, kind, required) declarations."""
+    plan = []
+    for field in fields:
+        name, attribute, kind = field[:3]
+        required = field[3] if len(field) > 3 else True
+        plan.append((name, attribute, kind, required))
+
+    return tuple(plan)
+
+
+def decode_item(plan, item):
+    """Decodes a DynamoDB item straight into the details dict of an entity, by walking the plan. Optional attributes
+    missing from the item are left out of the details.
+    """
+    details = {}
+    for name, attribute, kind, required in plan:
+        value = item.get(attribute)
+        if value is None:
+            if required:
+                raise Exception("Item did not have a {} attribute.".format(attribute))
+            continue
+
+        if kind is STRING:
+            details[name] = value['S']
+        elif kind is NUMBER:
+            details[name] = int(value['N'])
+        else:
+            details[name] = value['S'].split("#")[1]
 
-    def __init__(self, item):
-        self.user_id = item.get('userId').get('S')
-        self.email = item.get('email').get('S')
-        if item.get('name'):
-            self.name = item.get('name').get('S')
+    return details
 
-    def __repr__(self):
-        return "User<{} -- {} -- {}>".format(self.username, self.name, self.email)
 
-    def get_basic_details(self):
-        user = {
-            'email': self.email,
-            'userId': self.user_id
-        }
+class Entity:
+    """Base of the entities decoded from table items.
 
-        if hasattr(self, 'name'):
-            user['name'] = self.name
-        else:
-            user['name'] = self.email
+    Subclasses declare their FIELDS and the matching __slots__. From these each class gets its PLAN, which items are
+    decoded by, and the ATTRIBUTES to project reads to, which always include the key so that items can be told apart.
+    """
+    __slots__ = ()
+    FIELDS = ()
 
-        return user
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.PLAN = compile_plan(cls.FIELDS)
 
-
-class List:
+        attributes = ['PK', 'SK']
+        for name, attribute, kind, required in cls.PLAN:
+            if attribute not in attributes:
+                attributes.append(attribute)
+        cls.ATTRIBUTES = tuple(attributes)
 
     def __init__(self, item):
-        self.listId = item.get('listId').get('S')
-        self.title = item.get('title').get('S')
-        self.description = item.get('description').get('S')
-        self.occasion = item.get('occasion').get('S')
-        self.imageUrl = item.get('imageUrl').get('S')
-        self.listOwner = item.get('SK').get('S').split("#")[1]
-        self.state = item.get('state').get('S')
-        if item.get('eventDate'):
-            self.eventDate = item.get('eventDate').get('S')
+        for name, value in self.decode(item).items():
+            setattr(self, name, value)
 
-    def __repr__(self):
-        return "List<{} -- {} -- {} -- {}>".format(self.listId, self.title, self.occasion, self.imageUrl)
+    @classmethod
+    def decode(cls, item):
+        return decode_item(cls.PLAN, item)
 
     def get_details(self):
-        list = {
-            'listId': self.listId,
-            'title': self.title,
-            'description': self.description,
-            'occasion': self.occasion,
-            'imageUrl': self.imageUrl,
-            'listOwner': self.listOwner,
-            'state': self.state
-        }
+        details = {}
+        for name, attribute, kind, required in self.PLAN:
+            if hasattr(self, name):
+                details[name] = getattr(self, name)
 
-        if hasattr(self, 'eventDate'):
-            list['eventDate'] = self.eventDate
+        return details
 
-        return list
 
+class User(Entity):
+    __slots__ = ('email', 'userId', 'name')
+    FIELDS = (
+        ('email', 'email', STRING),
+        ('userId', 'userId', STRING),
+        ('name', 'name', STRING, False)
+    )
 
-class Product:
+    def __repr__(self):
+        return "User<{} -- {}>".format(self.userId, self.email)
 
-    def __init__(self, item):
-        self.listId = item.get('PK').get('S')
-        self.productId = item.get('SK').get('S').split("#")[1]
-        self.quantity = item.get('quantity').get('N')
-        self.reserved = item.get('reserved').get('N')
-        self.purchased = item.get('purchased').get('N')
-        self.type = item.get('type').get('S')
-        if item.get('notes'):
-            self.notes = item.get('notes').get('S')
+    @classmethod
+    def decode(cls, item):
+        user = decode_item(cls.PLAN, item)
+        if 'name' not in user:
+            user['name'] = user['email']
 
-    def __repr__(self):
-        return "Product<{} -- {} -- {} -- {} -- {}>".format(self.productId, self.listId, self.quantity, self.reserved, self.type)
+        return user
 
-    def get_details(self):
-        product = {
-            'productId': self.productId,
-            'quantity': int(self.quantity),
-            'reserved': int(self.reserved),
-            'purchased': int(self.purchased),
-            'type': self.type
-        }
+    def get_basic_details(self):
+        return self.get_details()
+
+
+class List(Entity):
+    __slots__ = ('listId', 'title', 'description', 'occasion', 'imageUrl', 'listOwner', 'state', 'eventDate')
+    FIELDS = (
+        ('listId', 'listId', STRING),
+        ('title', 'title', STRING),
+        ('description', 'description', STRING),
+        ('occasion', 'occasion', STRING),
+        ('imageUrl', 'imageUrl', STRING),
+        ('listOwner', 'SK', KEY_ID),
+        ('state', 'state', STRING),
+        ('eventDate', 'eventDate', STRING, False)
+    )
 
-        if hasattr(self, 'notes'):
-            product['notes'] = self.notes
+    def __repr__(self):
+        return "List<{} -- {} -- {} -- {}>".format(self.listId, self.title, self.occasion, self.imageUrl)
 
-        return product
 
+class Product(Entity):
+    __slots__ = ('productId', 'quantity', 'reserved', 'purchased', 'type', 'notes')
+    FIELDS = (
+        ('productId', 'SK', KEY_ID),
+        ('quantity', 'quantity', NUMBER),
+        ('reserved', 'reserved', NUMBER),
+        ('purchased', 'purchased', NUMBER),
+        ('type', 'type', STRING),
+        ('notes', 'notes', STRING, False)
+    )
 
-class Reservation:
-    def __init__(self, item):
-        self.reservationId = item.get('reservationId').get('S')
-        self.userId = item.get('userId').get('S')
-        self.name = item.get('name').get('S')
-        self.email = item.get('email').get('S')
-        self.listId = item.get('listId').get('S')
-        self.listOwnerId = item.get('listOwnerId').get('S')
-        self.listTitle = item.get('listTitle').get('S')
-        self.productId = item.get('productId').get('S')
-        self.productType = item.get('productType').get('S')
-        self.quantity = item.get('quantity').get('N')
-        self.state = item.get('state').get('S')
+    def __repr__(self):
+        return "Product<{} -- {} -- {} -- {}>".format(self.productId, self.quantity, self.reserved, self.type)
+
+
+class Reservation(Entity):
+    __slots__ = ('reservationId', 'productId', 'userId', 'listId', 'listOwnerId', 'name', 'email', 'quantity', 'state', 'listTitle', 'productType')
+    FIELDS = (
+        ('reservationId', 'reservationId', STRING),
+        ('productId', 'productId', STRING),
+        ('userId', 'userId', STRING),
+        ('listId', 'listId', STRING),
+        ('listOwnerId', 'listOwnerId', STRING),
+        ('name', 'name', STRING),
+        ('email', 'email', STRING),
+        ('quantity', 'quantity', NUMBER),
+        ('state', 'state', STRING),
+        ('listTitle', 'listTitle', STRING),
+        ('productType', 'productType', STRING)
+    )
 
     def __repr__(self):
         return "Reservation<{}>".format(self.reservationId)
-
-    def get_details(self):
-        reserved = {
-            'reservationId': self.reservationId,
-            'productId': self.productId,
-            'userId': self.userId,
-            'listId': self.listId,
-            'listOwnerId': self.listOwnerId,
-            'name': self.name,
-            'email': self.email,
-            'quantity': int(self.quantity),
-            'state': self.state,
-            'listTitle': self.listTitle,
-            'productType': self.productType
-        }
-
-        return reserved
@@ -0,0 +1,49 @@
+# Wraps lambda handlers with the work that must happen around every invocation of a warm container.
+import functools
+from lists import common_clients, common_context, common_kpi, common_request, common_table_ops, logger
+
+log = logger.setup_logger()
+
+# Source of warm-up events, e.g. the input of a scheduled rule: {"source": "ewelists.warmup"}.
+WARM_UP_SOURCE = 'ewelists.warmup'
+
+
+def invocation_handler(handler):
+    """Decorator for lambda handlers, which decides whether payloads are logged for the request, clears the
+    request-scoped table read memo and decoded request when the invocation ends, posts the KPIs if the invocation
+    counted any, and writes the one summary line for the invocation. Warm-up events only prime the connections of the
+    handler's clients.
+    """
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        if is_warm_up(event):
+            return warm_up_response()
+
+        logger.sample_request()
+        common_context.start(handler.__module__, event)
+        response = None
+        error = None
+        try:
+            response = handler(event, context)
+            return response
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            common_table_ops.clear_memo()
+            common_request.reset()
+            common_kpi.flush_if_posted()
+            common_kpi.record_stats()
+            common_context.finish(response, error)
+
+    return wrapper
+
+
+def is_warm_up(event):
+    return isinstance(event, dict) and event.get('source') == WARM_UP_SOURCE
+
+
+def warm_up_response():
+    primed = common_clients.prime()
+    log.info("Warm-up event, primed connections to: {}".format(primed))
+    return {'warmedUp': True, 'primed': primed}
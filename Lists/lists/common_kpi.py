@@ -1,12 +1,34 @@
-import requests
+import os
 import json
+import threading
+import time
 from datetime import datetime
-from lists import logger
+from lists import common_context, common_request, logger
 
 log = logger.setup_logger()
 
+# KPI events are counted into a bounded buffer per url, metric and day. An invocation which counted events posts the
+# buffer when it ends, within FLUSH_SECONDS in all, so that a slow KPI endpoint adds little to it; invocations which
+# counted nothing never post. A background thread is not used, as it would be frozen with the container once the
+# response is sent. Metrics which are not posted in time are kept for the next flush, and those which fail
+# MAX_ATTEMPTS posts are dropped. Dropped events, and those which do not fit in the buffer, are counted.
+BUFFER_SIZE = int(os.environ.get('KPI_BUFFER_SIZE', '100'))
+FLUSH_SECONDS = float(os.environ.get('KPI_FLUSH_SECONDS', '0.2'))
+MAX_ATTEMPTS = int(os.environ.get('KPI_MAX_ATTEMPTS', '3'))
+# Connect and read timeouts of KPI posts, in seconds, of which neither is longer than the time left of the flush.
+TIMEOUT = (0.5, float(os.environ.get('KPI_TIMEOUT', '1')))
+
+_buffer = {}
+_state = {'events': 0, 'posted': False}
+_stats = {'enqueued': 0, 'dropped': 0, 'sent': 0, 'failed': 0}
+_lock = threading.Lock()
+_session = None
+
 
 def post(osenv, event, name):
+    """Counts a KPI event, which is posted by the flush at the end of the invocation. Returns whether the event was
+    buffered.
+    """
     url = get_url(osenv, 'KPI_URL')
 
     if not url:
@@ -16,18 +38,150 @@ def post(osenv, event, name):
         log.info("KPI post skipped, request was from postman or cypress.")
         return False
 
-    datestamp = get_date()
     colour = get_colour(osenv, 'KPI_COLOUR')
     type = get_type(osenv, 'KPI_TYPE')
-    data = create_json_data(name, datestamp, colour, type)
-    result = post_request(url, data)
+    result = enqueue(url, name, get_date(), colour, type)
 
     if result:
-        log.info("KPI post succeeded. name={} url={}.".format(name, url))
+        with _lock:
+            _state['posted'] = True
 
     return result
 
 
+def enqueue(url, name, date, colour, type, count=1):
+    key = (url, name, date)
+
+    with _lock:
+        if key not in _buffer:
+            if len(_buffer) >= BUFFER_SIZE:
+                _stats['dropped'] += count
+                log.info("KPI buffer is full, dropped {} {} events.".format(count, name))
+                return False
+
+            _buffer[key] = {'count': 0, 'colour': colour, 'type': type, 'attempts': 0}
+
+        _buffer[key]['count'] += count
+        _stats['enqueued'] += count
+        _state['events'] += count
+
+    return True
+
+
+def requeue(key, metric):
+    """Puts a metric which was not sent back in the buffer, with the failed attempts of its events."""
+    with _lock:
+        if key not in _buffer:
+            if len(_buffer) >= BUFFER_SIZE:
+                _stats['dropped'] += metric['count']
+                return False
+
+            _buffer[key] = dict(metric, count=0, attempts=0)
+
+        _buffer[key]['count'] += metric['count']
+        _buffer[key]['attempts'] = max(_buffer[key]['attempts'], metric['attempts'])
+        _state['events'] += metric['count']
+
+    return True
+
+
+def flush_if_posted():
+    """Flushes the buffer if events were counted since the last flush, e.g. by the current invocation."""
+    with _lock:
+        posted = _state['posted']
+        _state['posted'] = False
+
+    if not posted:
+        return None
+
+    return flush()
+
+
+def flush(seconds=None):
+    """Posts the buffered metrics, until seconds (FLUSH_SECONDS by default) have passed. Metrics which are not reached
+    in time, or fail, are put back in the buffer for the next flush, unless they have failed MAX_ATTEMPTS times.
+    Returns the number of events sent.
+    """
+    deadline = time.monotonic() + (FLUSH_SECONDS if seconds is None else seconds)
+
+    with _lock:
+        metrics = list(_buffer.items())
+        _buffer.clear()
+        _state['events'] = 0
+
+    sent = 0
+    for i, (key, metric) in enumerate(metrics):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            log.info("KPI flush ran out of time, {} metrics were kept for the next flush.".format(len(metrics) - i))
+            for key, metric in metrics[i:]:
+                requeue(key, metric)
+            break
+
+        url, name, date = key
+        data = create_json_data(name, date, metric['colour'], metric['type'], metric['count'])
+        timeout = (min(TIMEOUT[0], remaining), min(TIMEOUT[1], remaining))
+
+        if post_request(url, data, timeout):
+            log.info("KPI post succeeded. name={} count={} url={}.".format(name, metric['count'], url))
+            sent += metric['count']
+            continue
+
+        metric['attempts'] += 1
+        with _lock:
+            _stats['failed'] += metric['count']
+            if metric['attempts'] >= MAX_ATTEMPTS:
+                _stats['dropped'] += metric['count']
+                log.info("KPI post failed {} times, dropped {} {} events.".format(metric['attempts'], metric['count'], name))
+                continue
+
+        requeue(key, metric)
+
+    with _lock:
+        _stats['sent'] += sent
+
+    return sent
+
+
+def get_stats():
+    """Events buffered and counts of events enqueued, dropped, sent and failed, for the life of the container."""
+    with _lock:
+        stats = dict(_stats)
+        stats['buffered'] = _state['events']
+
+    return stats
+
+
+def record_stats():
+    """Adds the buffer size and dropped events to the summary of the current invocation."""
+    stats = get_stats()
+    return common_context.annotate(kpiBuffered=stats['buffered'], kpiDropped=stats['dropped'])
+
+
+def reset():
+    """Discards buffered events and counts, e.g. between unit tests."""
+    with _lock:
+        _buffer.clear()
+        _state['events'] = 0
+        _state['posted'] = False
+        for name in _stats:
+            _stats[name] = 0
+
+
+def get_session():
+    global _session
+
+    if _session is None:
+        # Imported on first use, as most invocations do not post KPIs.
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        _session = requests.Session()
+        _session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=2))
+
+    return _session
+
+
 def is_postman(event):
     try:
         userAgent = event['requestContext']['identity']['userAgent']
@@ -43,19 +197,14 @@ def is_postman(event):
 
 def is_cypress(event):
     try:
-        body = event['body']
+        return common_request.get_request(event).body_contains('Cypress')
     except Exception:
         return False
 
-    if 'Cypress' in body:
-        return True
-
-    return False
-
 
 def has_test_flag(event):
     try:
-        body = json.loads(event['body'])
+        body = common_request.get_request(event).body()
     except Exception:
         return False
 
@@ -67,15 +216,14 @@ def has_test_flag(event):
     return False
 
 
-def post_request(url, data):
+def post_request(url, data, timeout=TIMEOUT):
     try:
-        r = requests.post(url, data=json.dumps(data))
+        r = get_session().post(url, data=json.dumps(data), timeout=timeout)
+        output = json.loads(r.text)
     except Exception as e:
         log.error("KPI post failed with exception: {}".format(e))
         return False
 
-    output = json.loads(r.text)
-
     if output['status'] == 'error':
         log.error("KPI post failed: {}".format(r.json()))
         return False
@@ -121,12 +269,12 @@ def get_date():
     return dateTimeObj.strftime("%Y%m%d")
 
 
-def create_json_data(name, date, colour, type):
+def create_json_data(name, date, colour, type, count=1):
     return {
       "data":  [
         {
           "Date":  date,
-          name:  "1"
+          name:  str(count)
         }
       ],
       "cumulative": {
@@ -0,0 +1,56 @@
+# Outbox of email jobs. Handlers write a job in the same transaction as the change it is about, so that requests do not
+# wait on SES, and the send_emails worker delivers the jobs in batches.
+import json
+import time
+import uuid
+from lists import logger
+
+log = logger.setup_logger()
+
+OUTBOX_PK = "OUTBOX#EMAIL"
+FAILED_PK = "OUTBOX#FAILED"
+# The recipient is not stored as email, which is the key of the email-index, so that jobs stay out of the index and of
+# the user lookups made with it.
+TO_ADDRESS = 'toAddress'
+
+
+def create_email_job(email, template, template_data):
+    """Outbox item for one templated email. Sort keys start with the creation time, so jobs are sent oldest first."""
+    created = int(time.time() * 1000)
+    job_id = str(uuid.uuid4())
+
+    return {
+        'PK': {'S': OUTBOX_PK},
+        'SK': {'S': "EMAIL#{:013d}#{}".format(created, job_id)},
+        'jobId': {'S': job_id},
+        TO_ADDRESS: {'S': email},
+        'template': {'S': template},
+        'templateData': {'S': json.dumps(template_data)},
+        'attempts': {'N': '0'},
+        'createdAt': {'N': str(created)}
+    }
+
+
+def create_email_job_put(table_name, email, template, template_data):
+    """Transaction item which adds an email job to the outbox."""
+    job = create_email_job(email, template, template_data)
+    log.info("Adding email job {} with template {} to the outbox.".format(job['jobId']['S'], template))
+
+    return {
+        'Put': {
+            'TableName': table_name,
+            'Item': job
+        }
+    }
+
+
+def get_job(item):
+    return {
+        'key': {'PK': item['PK'], 'SK': item['SK']},
+        'jobId': item['jobId']['S'],
+        # Jobs written before the recipient was renamed still have it as email.
+        'email': item[TO_ADDRESS]['S'] if TO_ADDRESS in item else item['email']['S'],
+        'template': item['template']['S'],
+        'templateData': item['templateData']['S'],
+        'attempts': int(item['attempts']['N'])
+    }
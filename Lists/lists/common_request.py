@@ -0,0 +1,128 @@
+# API events decoded once per invocation. The body is parsed, and path parameters unquoted, on first use and then shared
+# by every accessor, rather than each helper decoding the event again.
+import json
+import re
+from urllib.parse import unquote
+from lists import logger
+
+log = logger.setup_logger()
+
+_current = {'request': None}
+
+# Requests generated by postman, which doesn't authenticate via cognito, and the environment variable of their identity.
+POSTMAN_USERS = [
+    (re.compile("^arn:aws:iam::[0-9]{12}:user/ApiTestUser$"), 'POSTMAN_USERPOOL_SUB'),
+    (re.compile("^arn:aws:iam::[0-9]{12}:user/ApiTestUser2$"), 'POSTMAN_USERPOOL_SUB2')
+]
+
+
+class Request:
+    """Accessors for an API event. Errors are raised with the same messages as the common helpers."""
+    __slots__ = ('event', 'raw_body', 'path', '_body', '_path_parameters', '_identity')
+
+    def __init__(self, event):
+        self.event = event
+        self.raw_body = event.get('body')
+        self.path = event.get('pathParameters')
+        self._body = None
+        self._path_parameters = {}
+        self._identity = None
+
+    def is_for(self, event):
+        """Whether this is still the request of the event, which tests and callers may have changed since."""
+        return self.event is event and self.raw_body is event.get('body') and self.path is event.get('pathParameters')
+
+    def body(self):
+        if not self.raw_body:
+            raise Exception("Body was missing required attributes.")
+
+        if self._body is None:
+            self._body = json.loads(self.raw_body)
+
+        return self._body
+
+    def body_attribute(self, name):
+        body = self.body()
+
+        if not isinstance(body, dict) or name not in body:
+            raise Exception('API Event did not contain a ' + name + ' body attribute.')
+
+        value = body[name]
+        log.info(name + ": " + str(value))
+        return value
+
+    def optional_body_attribute(self, name):
+        body = self.body()
+
+        # A body which is not an object, e.g. a list, string or number, cannot have the attribute.
+        if not isinstance(body, dict):
+            raise Exception('API Event did not contain a ' + name + ' body attribute.')
+
+        value = body.get(name)
+        log.info(name + ": " + str(value))
+        return value
+
+    def body_contains(self, text):
+        return self.raw_body is not None and text in self.raw_body
+
+    def path_parameter(self, name):
+        if name in self._path_parameters:
+            return self._path_parameters[name]
+
+        log.info("Getting path parameter ({}).".format(name))
+        if name not in self.path:
+            raise Exception("Path did not contain a " + name + " parameter.")
+
+        value = self.path[name]
+
+        if value == "null":
+            raise Exception("Path contained a null " + name + " parameter.")
+
+        value = unquote(value)
+        log.info(name + " path parameter: " + value)
+
+        self._path_parameters[name] = value
+        return value
+
+    def identity(self, osenv):
+        if self._identity is None:
+            self._identity = get_identity(self.event, osenv)
+
+        return self._identity
+
+
+def get_identity(event, osenv):
+    log.info('Getting identity.')
+    try:
+        userArn = event['requestContext']['identity']['userArn']
+        cognito_authentication_provider = event['requestContext']['identity']['cognitoAuthenticationProvider']
+    except KeyError:
+        raise Exception("There was no identity in the API event.")
+
+    if userArn is None:
+        raise Exception("There was no identity in the API event.")
+
+    for pattern, variable in POSTMAN_USERS:
+        if pattern.match(userArn):
+            log.info('Request was from postman, using API test identity ({}).'.format(variable))
+            try:
+                return osenv[variable]
+            except KeyError:
+                raise Exception(variable + ' environment variable not set correctly.')
+
+    log.info('cognitoIdentityId was retrieved from event.')
+    return cognito_authentication_provider.split(':')[-1]
+
+
+def get_request(event):
+    """The request for an event, which is decoded once and reused for as long as the event is unchanged."""
+    request = _current['request']
+    if request is None or not request.is_for(event):
+        request = Request(event)
+        _current['request'] = request
+
+    return request
+
+
+def reset():
+    _current['request'] = None
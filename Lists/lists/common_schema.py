@@ -0,0 +1,148 @@
+# Request body schemas. Each route declares its body fields once, and the declaration is compiled at import into a
+# validator which checks a decoded body in one pass, collecting every error, before the handler makes any table call.
+from lists import logger
+
+log = logger.setup_logger()
+
+INVALID_BODY = "Request body was not valid."
+
+
+class ValidationError(Exception):
+    """A request which is rejected with a 400 response, with the errors of each body field that was not valid."""
+
+    def __init__(self, message, errors=()):
+        super().__init__(message)
+        self.errors = list(errors)
+
+    def get_details(self):
+        details = {'error': str(self)}
+        if self.errors:
+            details['errors'] = self.errors
+
+        return details
+
+
+def string(max_length=None, allow_empty=False):
+    def check(value):
+        if not isinstance(value, str):
+            return "must be a string"
+        if not allow_empty and not value.strip():
+            return "must not be empty"
+        if max_length is not None and len(value) > max_length:
+            return "must be at most {} characters".format(max_length)
+
+    return check
+
+
+def integer(minimum=None, maximum=None):
+    def check(value):
+        # bool is a subclass of int, but true is not a quantity.
+        if not isinstance(value, int) or isinstance(value, bool):
+            return "must be an integer"
+        if minimum is not None and value < minimum:
+            return "must be at least {}".format(minimum)
+        if maximum is not None and value > maximum:
+            return "must be at most {}".format(maximum)
+
+    return check
+
+
+def boolean():
+    def check(value):
+        if not isinstance(value, bool):
+            return "must be true or false"
+
+    return check
+
+
+def one_of(*values):
+    message = "must be one of {}".format(", ".join(values))
+
+    def check(value):
+        if value not in values:
+            return message
+
+    return check
+
+
+def nullable(inner):
+    def check(value):
+        if value is not None:
+            return inner(value)
+
+    return check
+
+
+def compile_fields(fields, additional=True, prefix=''):
+    """Validator of a dict, from (name, check, required) declarations. Returns a function which appends an error for
+    each field that is missing, not valid, or, if additional fields are not allowed, not declared.
+    """
+    plan = []
+    for field in fields:
+        name, check = field[:2]
+        required = field[2] if len(field) > 2 else True
+        plan.append((name, prefix + name, check, required))
+    names = frozenset(name for name, path, check, required in plan)
+
+    def validate(body, errors):
+        if not isinstance(body, dict):
+            errors.append({'field': prefix.rstrip('.') or None, 'error': "must be an object"})
+            return
+
+        for name, path, check, required in plan:
+            if name in body:
+                error = check(body[name])
+                if isinstance(error, list):
+                    errors.extend(error)
+                elif error is not None:
+                    errors.append({'field': path, 'error': error})
+            elif required:
+                errors.append({'field': path, 'error': "is required"})
+
+        if not additional:
+            for name in body:
+                if name not in names:
+                    errors.append({'field': prefix + name, 'error': "is not allowed"})
+
+    return validate
+
+
+def obj(name, fields, additional=True):
+    """Check of a nested object, which returns the errors of its fields rather than a single message."""
+    validate = compile_fields(fields, additional, name + '.')
+
+    def check(value):
+        errors = []
+        validate(value, errors)
+        return errors or None
+
+    return check
+
+
+def compile_schema(fields, additional=True):
+    """Compiles the body schema of a route into a validator, which returns the body or raises a ValidationError."""
+    validate = compile_fields(fields, additional)
+
+    def validator(body):
+        errors = []
+        validate(body, errors)
+
+        if errors:
+            log.info("Request body was not valid: {}".format(errors))
+            raise ValidationError(INVALID_BODY, errors)
+
+        return body
+
+    return validator
+
+
+def validate_body(request, validator, message="Body was missing required attributes."):
+    """Decodes the body of a request and validates it. A body which is missing or is not JSON is rejected with the
+    message the route has always used for it.
+    """
+    try:
+        body = request.body()
+    except Exception:
+        raise ValidationError(message)
+
+    return validator(body)
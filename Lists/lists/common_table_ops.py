@@ -1,15 +1,141 @@
-import boto3
 import json
-from lists import logger
+import re
+import threading
+from lists import common_clients, common_context, logger
 from lists.common_entities import User, List, Product, Reservation
 from botocore.exceptions import ClientError
 
 log = logger.setup_logger()
 
+# Backoff before retrying the unprocessed items of a batch write, which doubles with each attempt up to the maximum.
+BATCH_BACKOFF_BASE = 0.05
+BATCH_BACKOFF_MAX = 1
 
-def get_list(table_name, user_id, list_id):
-    dynamodb = boto3.client('dynamodb')
+# Read-through memo of get_item responses and query pages, for the life of one invocation. Items returned by queries of the
+# table are also mapped by (PK, SK), along with the attributes they were read with, so that a later get_item of the same item
+# does not go to the table.
+_memo = {}
+_memo_stats = {'hits': 0, 'misses': 0}
+_memo_lock = threading.Lock()
+
+
+def batch_backoff(attempt):
+    """Seconds to wait after a batch write attempt left unprocessed items, before they are retried."""
+    return min(BATCH_BACKOFF_BASE * (2 ** (attempt - 1)), BATCH_BACKOFF_MAX)
+
+
+def item_memo_key(table_name, key, get_args=None):
+    return ('item', table_name, key['PK']['S'], key['SK']['S'], json.dumps(get_args or {}, sort_keys=True))
+
+
+def row_memo_key(table_name, key):
+    return ('row', table_name, key['PK']['S'], key['SK']['S'])
+
+
+def query_memo_key(table_name, page_size, query_args):
+    return ('query', table_name, page_size, json.dumps(query_args, sort_keys=True))
+
+
+def memo_get(memo_key):
+    with _memo_lock:
+        if memo_key in _memo:
+            _memo_stats['hits'] += 1
+            return _memo[memo_key]
+
+        _memo_stats['misses'] += 1
+
+    return None
+
+
+def memo_get_row(table_name, key, attributes=None):
+    """An item seen in the results of a query, if it was read with at least the attributes asked for."""
+    with _memo_lock:
+        row = _memo.get(row_memo_key(table_name, key))
+        if row is None:
+            return None
+
+        row_attributes, item = row
+        if row_attributes is not None and (attributes is None or not row_attributes.issuperset(attributes)):
+            return None
+
+        _memo_stats['hits'] += 1
+
+    return {'Item': item}
+
+
+def memo_put(memo_key, value):
+    with _memo_lock:
+        _memo[memo_key] = value
+
+
+def clear_memo():
+    """Forgets all reads, e.g. at the end of an invocation or when the table is known to have changed since they were made."""
+    with _memo_lock:
+        if _memo_stats['hits'] or _memo_stats['misses']:
+            log.info("Table read memo: {} hits, {} misses.".format(_memo_stats['hits'], _memo_stats['misses']))
+            common_context.count('memoHits', _memo_stats['hits'])
+            common_context.count('memoMisses', _memo_stats['misses'])
+
+        _memo.clear()
+        _memo_stats['hits'] = 0
+        _memo_stats['misses'] = 0
+
+    return True
+
+
+def projection(*attribute_groups):
+    """ProjectionExpression arguments for a read of the given attributes. Every attribute is referenced by a placeholder, as many
+    of the attributes used (e.g. name, state, type) are DynamoDB reserved words.
+    """
+    attributes = []
+    for group in attribute_groups:
+        for attribute in group:
+            if attribute not in attributes:
+                attributes.append(attribute)
 
+    names = {"#p{}".format(i): attribute for i, attribute in enumerate(attributes)}
+
+    return {
+        'ProjectionExpression': ", ".join(names),
+        'ExpressionAttributeNames': names
+    }
+
+
+def add_projection(args, attributes):
+    if not attributes:
+        return args
+
+    projection_args = projection(attributes)
+    args['ProjectionExpression'] = projection_args['ProjectionExpression']
+    args['ExpressionAttributeNames'] = dict(args.get('ExpressionAttributeNames', {}), **projection_args['ExpressionAttributeNames'])
+
+    return args
+
+
+def get_item(table_name, key, attributes=None, **get_args):
+    """Memoized get_item, returning the raw response. Attributes, if given, limits the item returned to just those attributes.
+
+    An item already read by a query during the invocation is returned as is, if it has all of the attributes asked for.
+    """
+    if not get_args:
+        response = memo_get_row(table_name, key, attributes)
+        if response is not None:
+            return response
+
+    add_projection(get_args, attributes)
+    memo_key = item_memo_key(table_name, key, get_args)
+    response = memo_get(memo_key)
+    if response is not None:
+        return response
+
+    dynamodb = common_clients.get_client('dynamodb')
+    response = dynamodb.get_item(TableName=table_name, Key=key, **get_args)
+    memo_put(memo_key, response)
+
+    return response
+
+
+def get_list(table_name, user_id, list_id):
     list_details = {}
 
     key = {
@@ -18,16 +144,13 @@ def get_list(table_name, user_id, list_id):
     }
 
     try:
-        response = dynamodb.get_item(
-            TableName=table_name,
-            Key=key
-        )
-        log.info("Get list item response: {}".format(response))
+        response = get_item(table_name, key, List.ATTRIBUTES)
+        logger.log_payload(log, "Get list item response: {}", response)
     except ClientError as e:
         raise Exception("Unexpected error: " + e.response['Error']['Message'])
 
     if 'Item' in response:
-        list_details = List(response['Item']).get_details()
+        list_details = List.decode(response['Item'])
     else:
         log.info("List ID {} for user {} does not exist.".format(list_id, user_id))
 
@@ -36,41 +159,147 @@ def get_list(table_name, user_id, list_id):
     return list_details
 
 
-def get_list_query(table_name, list_id):
+def query_pages(table_name, page_size=None, attributes=None, **query_args):
+    """Generator of query result pages, following LastEvaluatedKey until all matching items have been read."""
+    add_projection(query_args, attributes)
+    memo_key = query_memo_key(table_name, page_size, query_args)
+    pages = memo_get(memo_key)
+    if pages is not None:
+        yield from pages
+        return
+
+    dynamodb = common_clients.get_client('dynamodb')
+    # Items can only be mapped by key if they were read with their key and it is known which other attributes they were read with.
+    if attributes:
+        map_items = 'IndexName' not in query_args and {'PK', 'SK'}.issubset(attributes)
+    else:
+        map_items = 'IndexName' not in query_args and 'ProjectionExpression' not in query_args
+    row_attributes = frozenset(attributes) if attributes else None
+
+    query_args['TableName'] = table_name
+    if page_size:
+        query_args['Limit'] = page_size
+
+    pages = []
+    while True:
+        response = dynamodb.query(**query_args)
+        pages.append(response['Items'])
+        log.info("Query page {} returned {} items.".format(len(pages), response['Count']))
+
+        if map_items:
+            for item in response['Items']:
+                memo_put(row_memo_key(table_name, item), (row_attributes, item))
+
+        yield response['Items']
+
+        if 'LastEvaluatedKey' not in response:
+            break
+
+        query_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    memo_put(memo_key, pages)
+
+
+def query_items(table_name, page_size=None, attributes=None, **query_args):
+    """Generator of the items from all pages of a query, streamed as each page arrives."""
+    for page in query_pages(table_name, page_size, attributes, **query_args):
+        for item in page:
+            yield item
+
+
+def iter_list_query(table_name, list_id, page_size=None, attributes=None):
+    """Streams all items in the partition of a list, i.e. the list owner item, products and reservations."""
     log.info("Querying table {} for list ID {}.".format(table_name, list_id))
-    dynamodb = boto3.client('dynamodb')
 
+    items = query_items(
+        table_name,
+        page_size,
+        attributes,
+        KeyConditionExpression="PK = :PK",
+        ExpressionAttributeValues={":PK":  {'S': "LIST#{}".format(list_id)}}
+    )
+
+    count = 0
     try:
-        response = dynamodb.query(
-            TableName=table_name,
-            KeyConditionExpression="PK = :PK",
-            ExpressionAttributeValues={":PK":  {'S': "LIST#{}".format(list_id)}}
-        )
-        log.info("Response: " + json.dumps(response))
+        for item in items:
+            count += 1
+            yield item
     except ClientError as e:
-        log.info("get item response: " + json.dumps(e.response))
+        log.info(logger.lazy("Query error response: {}", e.response))
         raise Exception("Unexpected error when getting list item from table.")
 
-    if len(response['Items']) == 0:
+    if count == 0:
         raise Exception("List {} does not exist.".format(list_id))
 
-    return response['Items']
 
+def get_list_query(table_name, list_id, page_size=None, attributes=None):
+    return list(iter_list_query(table_name, list_id, page_size, attributes))
 
-def get_users_details(table_name, user_id):
-    dynamodb = boto3.client('dynamodb')
 
+def create_list_key(list_id, owner_id):
+    return {
+        'PK': {'S': "LIST#{}".format(list_id)},
+        'SK': {'S': "USER#{}".format(owner_id)}
+    }
+
+
+def create_list_version_update(table_name, list_id, owner_id):
+    """Transaction item which increments the version of a list, so that cached copies of the list are known to be stale."""
+    return {
+        'Update': {
+            'TableName': table_name,
+            'Key': create_list_key(list_id, owner_id),
+            'UpdateExpression': "ADD #v :one",
+            'ConditionExpression': "attribute_exists(PK)",
+            'ExpressionAttributeNames': {'#v': 'version'},
+            'ExpressionAttributeValues': {':one': {'N': '1'}}
+        }
+    }
+
+
+def bump_list_version(table_name, list_id, owner_id):
+    """Increments the version of a list after a write which could not be made in the same transaction.
+
+    The write has already succeeded, so a failure is logged rather than raised. Cached copies then expire with their TTL.
+    """
+    dynamodb = common_clients.get_client('dynamodb')
+
+    try:
+        dynamodb.update_item(**create_list_version_update(table_name, list_id, owner_id)['Update'])
+    except ClientError as e:
+        log.error("Version of list {} could not be updated: {}".format(list_id, e))
+        return False
+
+    return True
+
+
+def get_list_version(table_name, list_id, owner_id):
+    """Version of a list from a get_item projected to just that attribute. None if the list item no longer exists."""
+    try:
+        response = get_item(table_name, create_list_key(list_id, owner_id), ('version',))
+    except ClientError as e:
+        log.info(logger.lazy("Get item error response: {}", e.response))
+        raise Exception("Unexpected error when getting list item from table.")
+
+    if 'Item' not in response:
+        return None
+
+    return get_item_version(response['Item'])
+
+
+def get_item_version(item):
+    return int(item.get('version', {'N': '0'})['N'])
+
+
+def get_users_details(table_name, user_id):
     key = {
         'PK': {'S': "USER#" + user_id},
         'SK': {'S': "USER#" + user_id}
     }
 
     try:
-        response = dynamodb.get_item(
-            TableName=table_name,
-            Key=key
-        )
-        log.info("Get user item response: {}".format(response))
+        response = get_item(table_name, key, User.ATTRIBUTES)
+        logger.log_payload(log, "Get user item response: {}", response)
     except ClientError as e:
         print(e.response['Error']['Message'])
 
@@ -78,24 +307,23 @@ def get_users_details(table_name, user_id):
         log.info("No user id {} was found.".format(user_id))
         raise Exception("No user exists with this ID.")
 
-    return User(response['Item']).get_basic_details()
+    return User.decode(response['Item'])
 
 
 def get_user_id_from_email(table_name, index_name, email):
-    dynamodb = boto3.client('dynamodb')
-
     try:
-        response = dynamodb.query(
-            TableName=table_name,
+        items = list(query_items(
+            table_name,
+            attributes=('PK', 'userId'),
             IndexName=index_name,
             KeyConditionExpression="email = :email",
             ExpressionAttributeValues={":email":  {'S': email}}
-        )
+        ))
     except Exception as e:
         log.info("Exception: " + str(e))
         raise Exception("Unexpected error when getting user from table.")
 
-    for item in response['Items']:
+    for item in items:
         if item['PK']['S'].startswith("USER"):
             log.info("User with email {} was found.".format(email))
             return item['userId']['S']
@@ -104,8 +332,6 @@ def get_user_id_from_email(table_name, index_name, email):
 
 
 def get_product_item(table_name, list_id, product_id):
-    dynamodb = boto3.client('dynamodb')
-
     log.info("Getting product item {} for list {}.".format(product_id, list_id))
     key = {
         'PK': {'S': "LIST#" + list_id},
@@ -113,11 +339,8 @@ def get_product_item(table_name, list_id, product_id):
     }
 
     try:
-        response = dynamodb.get_item(
-            TableName=table_name,
-            Key=key
-        )
-        log.info("Get product item response: {}".format(response))
+        response = get_item(table_name, key, Product.ATTRIBUTES)
+        logger.log_payload(log, "Get product item response: {}", response)
     except ClientError as e:
         print(e.response['Error']['Message'])
 
@@ -126,34 +349,73 @@ def get_product_item(table_name, list_id, product_id):
         raise Exception("No product item exists with this ID.")
 
     item = response['Item']
-    log.info("Product Item: {}".format(item))
+    logger.log_payload(log, "Product Item: {}", item)
+
+    return Product.decode(item)
+
+
+def get_reservation_context(table_name, list_id, product_id):
+    """Reads the list owner item, a product and all reservations of that product with one query of the list partition."""
+    log.info("Getting reservation context for product {} of list {}.".format(product_id, list_id))
+    product_sk = "PRODUCT#" + product_id
+    context = {'list': None, 'product': None, 'reservations': []}
+
+    items = query_items(
+        table_name,
+        attributes=List.ATTRIBUTES + Product.ATTRIBUTES + Reservation.ATTRIBUTES,
+        KeyConditionExpression="PK = :PK",
+        FilterExpression="begins_with(SK, :user) OR SK = :product OR begins_with(SK, :reservation)",
+        ExpressionAttributeValues={
+            ":PK":  {'S': "LIST#" + list_id},
+            ":user":  {'S': "USER#"},
+            ":product":  {'S': product_sk},
+            ":reservation":  {'S': "RESERVATION#" + product_id + "#"}
+        }
+    )
+
+    try:
+        for item in items:
+            sk = item['SK']['S']
+            if sk.startswith("USER#"):
+                context['list'] = List.decode(item)
+            elif sk == product_sk:
+                context['product'] = Product.decode(item)
+            else:
+                context['reservations'].append(Reservation.decode(item))
+    except ClientError as e:
+        log.info(logger.lazy("Query error response: {}", e.response))
+        raise Exception("Unexpected error when getting list item from table.")
 
-    return Product(item).get_details()
+    if context['list'] is None:
+        raise Exception("List {} does not exist.".format(list_id))
 
+    log.info("Reservation context contained {} reservations.".format(len(context['reservations'])))
+    return context
 
-def get_reservation_items_query(table_name, list_id, product_id, user_id):
-    dynamodb = boto3.client('dynamodb')
 
+def get_reservation_items_query(table_name, list_id, product_id, user_id, attributes=None):
     try:
-        response = dynamodb.query(
-            TableName=table_name,
+        items = list(query_items(
+            table_name,
+            attributes=attributes,
             KeyConditionExpression="PK = :PK and begins_with(SK, :SK)",
             ExpressionAttributeValues={
                 ":PK":  {'S': "LIST#" + list_id},
                 ":SK":  {'S': "RESERVATION#" + product_id + "#" + user_id}
             }
-        )
-        log.info("Get reserved item response: {}".format(response))
+        ))
+        log.info("Get reserved items returned {} items.".format(len(items)))
     except ClientError as e:
         print(e.response['Error']['Message'])
+        raise Exception("Unexpected error when getting reservations from table.")
 
-    return response['Items']
+    return items
 
 
 def get_reservations(table_name, list_id, product_id, user_id):
-    items = get_reservation_items_query(table_name, list_id, product_id, user_id)
+    items = get_reservation_items_query(table_name, list_id, product_id, user_id, Reservation.ATTRIBUTES)
 
-    log.info("Items {}.".format(items))
+    logger.log_payload(log, "Items {}.", items)
 
     if len(items) == 0:
         log.info("No reserved details were found for list {} and product id {}.".format(list_id, product_id))
@@ -161,7 +423,7 @@ def get_reservations(table_name, list_id, product_id, user_id):
 
     return_items = []
     for item in items:
-        return_items.append(Reservation(item).get_details())
+        return_items.append(Reservation.decode(item))
 
     return return_items
 
@@ -169,8 +431,8 @@ def get_reservations(table_name, list_id, product_id, user_id):
 def check_product_not_reserved_by_user(table_name, list_id, product_id, user_id):
     log.info("Checking product not already reserved by user.")
 
-    items = get_reservation_items_query(table_name, list_id, product_id, user_id)
-    log.info("Items to check: {}.".format(items))
+    items = get_reservation_items_query(table_name, list_id, product_id, user_id, ('state',))
+    logger.log_payload(log, "Items to check: {}.", items)
 
     if len(items) > 0:
         for item in items:
@@ -181,21 +443,19 @@ def check_product_not_reserved_by_user(table_name, list_id, product_id, user_id)
 
 
 def get_reservation(table_name, index_name, resv_id):
-    dynamodb = boto3.client('dynamodb')
-
     try:
-        response = dynamodb.query(
-            TableName=table_name,
+        items = list(query_items(
+            table_name,
+            attributes=Reservation.ATTRIBUTES,
             IndexName=index_name,
             KeyConditionExpression="reservationId = :reservationId",
             ExpressionAttributeValues={":reservationId":  {'S': resv_id}}
-        )
+        ))
     except Exception as e:
         log.info("Exception: " + str(e))
         raise Exception("Unexpected error when getting user from table.")
 
-    items = response['Items']
-    log.info("Items returned {}.".format(items))
+    logger.log_payload(log, "Items returned {}.", items)
 
     if len(items) == 0:
         raise Exception("Reservation ID does not exist.")
@@ -203,4 +463,38 @@ def get_reservation(table_name, index_name, resv_id):
         log.info("Multiple items were found with same reservation id {}.".format(resv_id))
         raise Exception("Multiple items were found with same reservation id.")
 
-    return Reservation(items[0]).get_details()
+    return Reservation.decode(items[0])
+
+
+def get_reservation_state(table_name, reservation_key):
+    try:
+        response = get_item(table_name, reservation_key, ('state',))
+    except ClientError as e:
+        log.info(logger.lazy("Get item error response: {}", e.response))
+        raise Exception("Unexpected error when getting reservations from table.")
+
+    if 'Item' not in response:
+        raise Exception("Reservation ID does not exist.")
+
+    return {'state': response['Item']['state']['S']}
+
+
+def get_transaction_cancellation_reasons(error):
+    """Codes for each item of a cancelled transaction, e.g. ['ConditionalCheckFailed', 'None']."""
+    if 'CancellationReasons' in error.response:
+        return [reason.get('Code', 'None') for reason in error.response['CancellationReasons']]
+
+    # The reasons are also listed, in item order, at the end of the error message.
+    match = re.search(r'\[([A-Za-z, ]*)\]$', error.response.get('Error', {}).get('Message', ''))
+    if match is None:
+        return []
+
+    return [code.strip() for code in match.group(1).split(',')]
+
+
+def transaction_condition_failed(error, index):
+    if not isinstance(error, ClientError) or error.response.get('Error', {}).get('Code') != 'TransactionCanceledException':
+        return False
+
+    reasons = get_transaction_cancellation_reasons(error)
+    return len(reasons) > index and reasons[index] == 'ConditionalCheckFailed'
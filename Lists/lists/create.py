@@ -1,13 +1,21 @@
-import json
 import os
-import boto3
 import time
 import uuid
-from lists import common, common_table_ops, common_kpi, logger
+from lists import common, common_clients, common_invocation, common_table_ops, common_kpi, common_request, common_schema, logger
 
 log = logger.setup_logger()
+common_clients.warm_up('dynamodb')
 
+SCHEMA = common_schema.compile_schema([
+    ('title', common_schema.string()),
+    ('description', common_schema.string(allow_empty=True)),
+    ('occasion', common_schema.string()),
+    ('imageUrl', common_schema.string()),
+    ('eventDate', common_schema.string(allow_empty=True), False)
+])
 
+
+@common_invocation.invocation_handler
 def handler(event, context):
     response = create_main(event)
     return response
@@ -15,27 +23,31 @@ def handler(event, context):
 
 def create_main(event):
     try:
+        request = common_request.get_request(event)
         table_name = common.get_env_variable(os.environ, 'TABLE_NAME')
-        identity = common.get_identity(event, os.environ)
+        identity = request.identity(os.environ)
+        attributes = get_attribute_details(event)
         users_name = common_table_ops.get_users_details(table_name, identity)['name']
 
         listId = generate_list_id()
-        attributes = get_attribute_details(event)
         put_item_in_table(table_name, identity, listId, attributes, users_name)
+    except common_schema.ValidationError as e:
+        log.info("Request was not valid: {}".format(e))
+        return common.create_response(400, e.get_details())
     except Exception as e:
         log.error("Exception: {}".format(e))
-        response = common.create_response(500, json.dumps({'error': str(e)}))
+        response = common.create_response(500, {'error': str(e)})
         return response
 
     common_kpi.post(os.environ, event, 'New Lists')
 
     data = {'listId': listId}
-    response = common.create_response(200, json.dumps(data))
+    response = common.create_response(200, data)
     return response
 
 
 def put_item_in_table(table_name, cognito_user_id, listId, attributes, users_name):
-    dynamodb = boto3.client('dynamodb')
+    dynamodb = common_clients.get_client('dynamodb')
 
     item = {
         'PK': {'S': "LIST#{}".format(listId)},
@@ -54,7 +66,7 @@ def put_item_in_table(table_name, cognito_user_id, listId, attributes, users_nam
         item['eventDate'] = {'S': attributes['eventDate']}
 
     try:
-        log.info("Put owned item for lists table: {}".format(item))
+        logger.log_payload(log, "Put owned item for lists table: {}", item)
         dynamodb.put_item(TableName=table_name, Item=item)
     except Exception as e:
         log.error("List could not be created: {}".format(e))
@@ -71,19 +83,8 @@ def generate_list_id():
 
 
 def get_attribute_details(event):
-    if event['body'] == "null":
-        raise Exception('API Event Body was empty.')
-
-    try:
-        body = event['body']
-        log.info("Event body: " + json.dumps(body))
-    except Exception:
-        raise Exception('API Event was empty.')
-
-    try:
-        attribute_details = json.loads(body)
-        log.info("Attributes for create: " + json.dumps(attribute_details))
-    except Exception:
-        raise Exception('API Event did not contain a valid body.')
+    request = common_request.get_request(event)
+    attribute_details = common_schema.validate_body(request, SCHEMA, 'API Event did not contain a valid body.')
+    logger.log_payload(log, "Attributes for create: {}", attribute_details)
 
     return attribute_details
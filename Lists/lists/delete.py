@@ -1,12 +1,19 @@
-import json
 import os
-import boto3
-from lists import common, logger
+import time
+from concurrent.futures import ThreadPoolExecutor
+from lists import common, common_clients, common_invocation, common_request, common_table_ops, logger
 from botocore.exceptions import ClientError
 
 log = logger.setup_logger()
+common_clients.warm_up('dynamodb')
 
+# BatchWriteItem accepts at most 25 requests.
+BATCH_SIZE = 25
+MAX_WORKERS = 8
+MAX_ATTEMPTS = 5
 
+
+@common_invocation.invocation_handler
 def handler(event, context):
     response = delete_main(event)
     return response
@@ -14,74 +21,164 @@ def handler(event, context):
 
 def delete_main(event):
     try:
+        request = common_request.get_request(event)
         table_name = common.get_env_variable(os.environ, 'TABLE_NAME')
-        identity = common.get_identity(event, os.environ)
-        list_id = common.get_path_parameter(event, 'id')
+        identity = request.identity(os.environ)
+        list_id = request.path_parameter('id')
         common.confirm_owner(table_name, identity, list_id)
 
         items = get_items_associated_with_list(table_name, list_id)
-        delete_items(table_name, identity, list_id, items)
+        result = delete_items(table_name, identity, list_id, items)
     except Exception as e:
         log.error("Exception: {}".format(e))
-        response = common.create_response(500, json.dumps({'error': str(e)}))
+        response = common.create_response(500, {'error': str(e)})
         log.info("Returning response: {}".format(response))
         return response
 
-    data = {'deleted': True, 'listId': list_id, "count": len(items)}
+    data = {'deleted': True, 'listId': list_id, "count": result['count']}
 
-    response = common.create_response(200, json.dumps(data))
+    response = common.create_response(200, data)
     return response
 
 
 def delete_items(table_name, cognito_user_id, list_id, items):
-    dynamodb = boto3.client('dynamodb')
-
     log.info("Deleting List ID: {} for user: {}.".format(list_id, cognito_user_id))
+    start = time.perf_counter()
+
+    keys = get_item_keys(list_id, items)
+    confirm_list_exists(table_name, cognito_user_id, list_id)
+
+    # The owner item is deleted last, once every other item has been, as the list can only be deleted again (e.g. to
+    # retry a failed batch) while its owner item exists.
+    owner_key = get_owner_key(cognito_user_id, list_id)
+    other_keys = [key for key in keys if key != owner_key]
+
+    chunks = [other_keys[i:i + BATCH_SIZE] for i in range(0, len(other_keys), BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(chunks) or 1)) as executor:
+        attempts = list(executor.map(lambda chunk: delete_batch(table_name, chunk), chunks))
+
+    if len(other_keys) < len(keys):
+        delete_owner_item(table_name, cognito_user_id, list_id)
+        attempts.append(1)
 
+    result = {
+        'count': len(keys),
+        'batches': len(chunks),
+        'attempts': sum(attempts),
+        'duration_ms': round((time.perf_counter() - start) * 1000, 2)
+    }
+
+    log.info("Deleted all items [{}] for List ID: {} and user: {}. Batches: {}. Attempts: {}. Duration: {}ms.".format(result['count'], list_id, cognito_user_id, result['batches'], result['attempts'], result['duration_ms']))
+    return result
+
+
+def get_item_keys(list_id, items):
+    """Keys of the items to delete, which must all belong to the partition of the list being deleted."""
+    partition = "LIST#{}".format(list_id)
+
+    keys = []
     for item in items:
-        log.info("Deleting item with key: PK={}, SK={}".format(item['PK']['S'], item['SK']['S']))
-        key = {
+        if item['PK']['S'] != partition:
+            log.info("Item with key PK={}, SK={} does not belong to list {}.".format(item['PK']['S'], item['SK']['S'], list_id))
+            raise Exception("List does not exist.")
+
+        keys.append({
             'PK': {'S': item['PK']['S']},
             'SK': {'S': item['SK']['S']}
-        }
+        })
+
+    return keys
+
+
+def get_owner_key(cognito_user_id, list_id):
+    return {
+        'PK': {'S': "LIST#{}".format(list_id)},
+        'SK': {'S': "USER#{}".format(cognito_user_id)}
+    }
+
+
+def confirm_list_exists(table_name, cognito_user_id, list_id):
+    """Single up-front guard, as batch writes cannot be conditional. The list owner item must exist for the user."""
+    dynamodb = common_clients.get_client('dynamodb')
+
+    try:
+        response = dynamodb.get_item(
+            TableName=table_name,
+            Key=get_owner_key(cognito_user_id, list_id),
+            ProjectionExpression="PK",
+            ConsistentRead=True
+        )
+    except ClientError as e:
+        log.info("Get list item exception: {}".format(e))
+        raise Exception("Unexpected error when deleting list items.")
+
+    if 'Item' not in response:
+        log.info("Delete request failed for List ID: {} and user {} as the list item does not exist.".format(list_id, cognito_user_id))
+        raise Exception("List does not exist.")
 
+    return True
+
+
+def delete_owner_item(table_name, cognito_user_id, list_id):
+    dynamodb = common_clients.get_client('dynamodb')
+
+    try:
+        dynamodb.delete_item(
+            TableName=table_name,
+            Key=get_owner_key(cognito_user_id, list_id),
+            ConditionExpression="attribute_exists(PK)"
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] == "ConditionalCheckFailedException":
+            log.info("Delete request failed for List ID: {} and user {} as the list item does not exist.".format(list_id, cognito_user_id))
+            raise Exception("List does not exist.")
+
+        log.info("Delete list item exception: {}".format(e))
+        raise Exception("Unexpected error when deleting list items.")
+
+    return True
+
+
+def delete_batch(table_name, keys):
+    """Deletes up to 25 items with a BatchWriteItem request, retrying any unprocessed items with exponential backoff."""
+    dynamodb = common_clients.get_client('dynamodb')
+
+    request_items = {table_name: [{'DeleteRequest': {'Key': key}} for key in keys]}
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
         try:
-            response = dynamodb.delete_item(
-                TableName=table_name,
-                Key=key,
-                ConditionExpression="PK = :PK",
-                ExpressionAttributeValues={":PK":  {'S': "LIST#{}".format(list_id)}}
-            )
-            log.info("Delete response: {}".format(response))
+            response = dynamodb.batch_write_item(RequestItems=request_items)
         except ClientError as e:
-            if e.response['Error']['Code'] == "ConditionalCheckFailedException":
-                log.info("Delete request failed for List ID: {} and user {} as condition check for List ID failed.  List does not exist.".format(list_id, cognito_user_id))
-                raise Exception("List does not exist.")
-            else:
-                raise
+            log.info("Batch delete exception: {}".format(e))
+            raise Exception("Unexpected error when deleting list items.")
 
-    log.info("Deleted all items [{}] for List ID: {} and user: {}.".format(len(items), list_id, cognito_user_id)),
-    return True
+        request_items = response.get('UnprocessedItems', {})
+        if not request_items:
+            return attempt
 
+        log.info("Batch delete attempt {} left {} unprocessed items.".format(attempt, len(request_items[table_name])))
+        time.sleep(common_table_ops.batch_backoff(attempt))
+
+    raise Exception("Unexpected error when deleting list items.")
 
-def get_items_associated_with_list(table_name, list_id):
-    dynamodb = boto3.client('dynamodb')
 
+def get_items_associated_with_list(table_name, list_id):
     log.info("Querying table for all items to delete")
 
     try:
-        response = dynamodb.query(
-            TableName=table_name,
+        items = list(common_table_ops.query_items(
+            table_name,
+            attributes=('PK', 'SK'),
             KeyConditionExpression="PK = :PK",
             ExpressionAttributeValues={":PK":  {'S': "LIST#{}".format(list_id)}}
-        )
-        log.info("All items in query response. ({})".format(response['Items']))
+        ))
+        log.info("Query returned {} items.".format(len(items)))
     except Exception as e:
         log.info("Exception: " + str(e))
         raise Exception("Unexpected error when getting lists from table.")
 
-    if len(response['Items']) == 0:
+    if len(items) == 0:
         log.info("No items for the list {} were found.".format(list_id))
         raise Exception("No list exists with this ID.")
 
-    return response['Items']
+    return items
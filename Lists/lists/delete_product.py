@@ -1,11 +1,11 @@
-import json
 import os
-import boto3
-from lists import common, logger
+from lists import common, common_clients, common_invocation, common_request, common_table_ops, logger
 
 log = logger.setup_logger()
+common_clients.warm_up('dynamodb')
 
 
+@common_invocation.invocation_handler
 def handler(event, context):
     response = delete_product_main(event)
     return response
@@ -13,26 +13,28 @@ def handler(event, context):
 
 def delete_product_main(event):
     try:
+        request = common_request.get_request(event)
         table_name = common.get_env_variable(os.environ, 'TABLE_NAME')
-        identity = common.get_identity(event, os.environ)
-        list_id = common.get_path_parameter(event, 'id')
-        product_id = common.get_path_parameter(event, 'productid')
+        identity = request.identity(os.environ)
+        list_id = request.path_parameter('id')
+        product_id = request.path_parameter('productid')
         common.confirm_owner(table_name, identity, list_id)
 
         message = delete_product_item(table_name, list_id, product_id)
+        common_table_ops.bump_list_version(table_name, list_id, identity)
     except Exception as e:
         log.error("Exception: {}".format(e))
-        response = common.create_response(500, json.dumps({'error': str(e)}))
+        response = common.create_response(500, {'error': str(e)})
         log.info("Returning response: {}".format(response))
         return response
 
     data = {'message': message}
-    response = common.create_response(200, json.dumps(data))
+    response = common.create_response(200, data)
     return response
 
 
 def delete_product_item(table_name, list_id, product_id):
-    dynamodb = boto3.client('dynamodb')
+    dynamodb = common_clients.get_client('dynamodb')
     
     key = {
         'PK': {'S': "LIST#{}".format(list_id)},
@@ -56,6 +58,6 @@ def delete_product_item(table_name, list_id, product_id):
         log.error("Product could not be deleted: {}".format(e))
         raise Exception('Product could not be deleted.')
 
-    log.info("Delete response: {}".format(response))
+    logger.log_payload(log, "Delete response: {}", response)
 
     return True
@@ -1,41 +1,43 @@
-import json
 import os
-import boto3
-from lists import common, common_table_ops, logger
+from lists import common, common_clients, common_invocation, common_request, common_table_ops, logger
 
 log = logger.setup_logger()
+common_clients.warm_up('dynamodb')
 
 
+@common_invocation.invocation_handler
 def handler(event, context):
-    log.info("Path Parameters: {}".format(json.dumps(event['pathParameters'])))
+    logger.log_payload(log, "Path Parameters: {}", event['pathParameters'])
     response = delete_main(event)
     return response
 
 
 def delete_main(event):
     try:
+        request = common_request.get_request(event)
         table_name = common.get_env_variable(os.environ, 'TABLE_NAME')
         resv_id_index = common.get_env_variable(os.environ, 'RESERVATIONID_INDEX')
-        resv_id = common.get_path_parameter(event, 'id')
+        resv_id = request.path_parameter('id')
 
         item = common_table_ops.get_reservation(table_name, resv_id_index, resv_id)
         key = common.create_reservation_key(item)
 
         delete_reservation_item(table_name, key)
+        common_table_ops.bump_list_version(table_name, item['listId'], item['listOwnerId'])
 
     except Exception as e:
         log.error("Exception: {}".format(e))
-        response = common.create_response(500, json.dumps({'error': str(e)}))
+        response = common.create_response(500, {'error': str(e)})
         log.info("Returning response: {}".format(response))
         return response
 
     data = {'deleted': True}
-    response = common.create_response(200, json.dumps(data))
+    response = common.create_response(200, data)
     return response
 
 
 def delete_reservation_item(table_name, key):
-    dynamodb = boto3.client('dynamodb')
+    dynamodb = common_clients.get_client('dynamodb')
 
     log.info("Deleting reservation id: {}".format(id))
 
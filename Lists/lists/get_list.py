@@ -1,11 +1,16 @@
-import json
 import os
-from lists import common, common_table_ops, logger
+from lists import common, common_assembler, common_clients, common_invocation, common_request, common_table_ops, logger
 from lists.common_entities import List, Product, Reservation
 
 log = logger.setup_logger()
 
+# Attributes of the list owner, product and reservation items that are assembled into the list.
+LIST_ATTRIBUTES = List.ATTRIBUTES + Product.ATTRIBUTES + Reservation.ATTRIBUTES
 
+common_clients.warm_up('dynamodb')
+
+
+@common_invocation.invocation_handler
 def handler(event, context):
     response = get_list_main(event)
     return response
@@ -13,38 +18,29 @@ def handler(event, context):
 
 def get_list_main(event):
     try:
+        request = common_request.get_request(event)
         table_name = common.get_env_variable(os.environ, 'TABLE_NAME')
-        identity = common.get_identity(event, os.environ)
-        list_id = common.get_path_parameter(event, 'id')
-        common.confirm_owner(table_name, identity, list_id)
-
-        response_items = common_table_ops.get_list_query(table_name, list_id)
-        list_object = generate_list_object(response_items)
+        identity = request.identity(os.environ)
+        list_id = request.path_parameter('id')
+        list_object = get_owned_list(table_name, identity, list_id)
     except Exception as e:
         log.error("Exception: {}".format(e))
-        response = common.create_response(500, json.dumps({'error': str(e)}))
+        response = common.create_response(500, {'error': str(e)})
         log.info("Returning response: {}".format(response))
         return response
 
-    response = common.create_response(200, json.dumps(list_object))
+    response = common.create_response(200, list_object)
     return response
 
 
+def get_owned_list(table_name, identity, list_id):
+    """Reads the list partition once, confirming ownership from the list owner item in the same result set."""
+    response_items = common_table_ops.iter_list_query(table_name, list_id, attributes=LIST_ATTRIBUTES)
+    list_object = generate_list_object(response_items)
+    common.confirm_list_owner(list_object['list'], identity, list_id)
+
+    return list_object
+
+
 def generate_list_object(response_items):
-    list = {"list": None, "products": {}, "reserved": []}
-
-    for item in response_items:
-        if item['SK']['S'].startswith("USER"):
-            log.info("List Owner Item: {}".format(item))
-            list['list'] = List(item).get_details()
-        elif item['SK']['S'].startswith("PRODUCT"):
-            log.info("Product Item: {}".format(item))
-            product = Product(item).get_details()
-            productId = product['productId']
-            list['products'][productId] = product
-        elif item['SK']['S'].startswith("RESERVATION") and item['state']['S'] != 'cancelled':
-            log.info("Reserved Item: {}".format(item))
-            reserved = Reservation(item).get_details()
-            list['reserved'].append(reserved)
-
-    return list
+    return common_assembler.assemble_list(response_items)
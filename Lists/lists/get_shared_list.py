@@ -1,58 +1,76 @@
-import json
 import os
-from lists import common, common_table_ops, logger
+from lists import common, common_assembler, common_cache, common_clients, common_context, common_encoder, common_invocation, common_request, common_table_ops, logger
 from lists.common_entities import List, Product, Reservation
 
 log = logger.setup_logger()
 
+# Attributes of the list owner, product and reservation items that are assembled into the list.
+LIST_ATTRIBUTES = List.ATTRIBUTES + Product.ATTRIBUTES + Reservation.ATTRIBUTES + ('version',)
 
+common_clients.warm_up('dynamodb')
+
+# Response bodies of assembled shared lists, kept while the container is warm and revalidated against the list version
+# on every request. The body is cached already encoded, as an immutable string, so that a hit is served without copying
+# or encoding the list again.
+CACHE_MAX_SIZE = 128
+CACHE_TTL = 300
+shared_lists = common_cache.LRUCache(CACHE_MAX_SIZE, CACHE_TTL)
+
+
+@common_invocation.invocation_handler
 def handler(event, context):
-    log.info("event: {}".format(json.dumps(event)))
+    logger.log_payload(log, "event: {}", event)
     response = get_shared_list_main(event)
     return response
 
 
 def get_shared_list_main(event):
     try:
+        request = common_request.get_request(event)
         table_name = common.get_env_variable(os.environ, 'TABLE_NAME')
-        list_id = common.get_path_parameter(event, 'id')
-        response_items = common_table_ops.get_list_query(table_name, list_id)
-
-        list_object = generate_list_object(response_items)
+        list_id = request.path_parameter('id')
+        body = get_shared_list(table_name, list_id)
     except Exception as e:
         log.error("Exception: {}".format(e))
-        response = common.create_response(500, json.dumps({'error': str(e)}))
+        response = common.create_response(500, {'error': str(e)})
         log.info("Returning response: {}".format(response))
         return response
 
-    response = common.create_response(200, json.dumps(list_object))
+    response = common.create_response(200, body)
     return response
 
 
-def generate_list_object(response_items):
-    list = {"list": None, "products": {}, "reserved": {}}
+def get_shared_list(table_name, list_id):
+    """Encoded response body of the shared list, from the cache if the list has not changed since it was cached."""
+    cached = shared_lists.get(list_id)
+
+    if cached is not None:
+        version = common_table_ops.get_list_version(table_name, list_id, cached['owner'])
+        if version == cached['version']:
+            log.info("List {} was served from cache at version {}.".format(list_id, version))
+            common_context.annotate(listCache='hit')
+            return cached['body']
+
+        log.info("Cached list {} was at version {}, but list is now at version {}.".format(list_id, cached['version'], version))
+        common_context.annotate(listCache='stale')
+        shared_lists.invalidate(list_id)
+    else:
+        common_context.annotate(listCache='miss')
 
-    for item in response_items:
-        if item['SK']['S'].startswith("USER"):
-            log.info("List Owner Item: {}".format(item))
-            list['list'] = List(item).get_details()
-        elif item['SK']['S'].startswith("PRODUCT"):
-            log.info("Product Item: {}".format(item))
-            product = Product(item).get_details()
-            productId = product['productId']
-            list['products'][productId] = product
-        elif item['SK']['S'].startswith("RESERVATION") and item['state']['S'] != 'cancelled':
-            log.info("Reserved Item: {}".format(item))
-            reserved = Reservation(item).get_details()
-            productId = reserved['productId']
-            userId = reserved['userId']
+    list_item = {}
+    response_items = common_table_ops.iter_list_query(table_name, list_id, attributes=LIST_ATTRIBUTES)
+    list_object = generate_list_object(response_items, list_item)
+    body = common_encoder.dumps(list_object)
 
-            if productId not in list['reserved']:
-                list['reserved'][productId] = {}
+    if list_object['list'] is not None:
+        shared_lists.put(list_id, {
+            'owner': list_object['list']['listOwner'],
+            'version': common_table_ops.get_item_version(list_item['item']),
+            'body': body
+        })
 
-            if userId not in list['reserved'][productId]:
-                list['reserved'][productId][userId] = []
+    return body
 
-            list['reserved'][productId][userId].append(reserved)
 
-    return list
+def generate_list_object(response_items, list_item=None):
+    return common_assembler.assemble_list(response_items, group_reserved=True, list_item=list_item)
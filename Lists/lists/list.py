@@ -1,12 +1,12 @@
-import json
 import os
-import boto3
-from lists import common, logger
+from lists import common, common_clients, common_invocation, common_request, common_table_ops, logger
 from lists.common_entities import User, List
 
 log = logger.setup_logger()
+common_clients.warm_up('dynamodb')
 
 
+@common_invocation.invocation_handler
 def handler(event, context):
     response = list_main(event)
     return response
@@ -14,53 +14,51 @@ def handler(event, context):
 
 def list_main(event):
     try:
+        request = common_request.get_request(event)
         table_name = common.get_env_variable(os.environ, 'TABLE_NAME')
         index_name = common.get_env_variable(os.environ, 'INDEX_NAME')
-        identity = common.get_identity(event, os.environ)
+        identity = request.identity(os.environ)
         usersLists = get_lists(table_name, index_name, identity)
     except Exception as e:
         log.error("Exception: {}".format(e))
-        response = common.create_response(500, json.dumps({'error': str(e)}))
+        response = common.create_response(500, {'error': str(e)})
         log.info("Returning response: {}".format(response))
         return response
 
-    response = common.create_response(200, json.dumps(usersLists))
+    response = common.create_response(200, usersLists)
     return response
 
 
 def get_lists(table_name, index_name, cognito_user_id):
-    dynamodb = boto3.client('dynamodb')
-
     response_data = {"user": None, "owned": [], "closed": []}
 
     log.info("Querying table")
 
     try:
-        response = dynamodb.query(
-            TableName=table_name,
+        items = list(common_table_ops.query_items(
+            table_name,
             IndexName=index_name,
+            attributes=User.ATTRIBUTES + List.ATTRIBUTES,
             KeyConditionExpression="userId = :userId",
             ExpressionAttributeValues={":userId":  {'S': cognito_user_id}}
-        )
-        log.info("All items in query response. ({})".format(response['Items']))
+        ))
+        log.info("Query returned {} items.".format(len(items)))
     except Exception as e:
         log.info("Exception: " + str(e))
         raise Exception("Unexpected error when getting lists from table.")
 
-    if len(response['Items']) > 0:
-        for item in response['Items']:
-            log.info("Checking response item: {}".format(item))
+    if len(items) > 0:
+        for item in items:
             if item['PK']['S'] == item['SK']['S']:
-                log.info("Adding user item to response data. ({})".format(item))
-                user = User(item)
-                response_data['user'] = user.get_basic_details()
+                logger.log_payload(log, "Adding user item to response data. ({})", item)
+                response_data['user'] = User.decode(item)
             elif item['SK']['S'] == 'USER#' + cognito_user_id and item['state']['S'] != 'closed':
-                log.info("Adding owner list item to response data. ({})".format(item))
-                list_details = List(item).get_details()
+                logger.log_payload(log, "Adding owner list item to response data. ({})", item)
+                list_details = List.decode(item)
                 response_data['owned'].append(list_details)
             elif item['SK']['S'] == 'USER#' + cognito_user_id and item['state']['S'] == 'closed':
-                log.info("Adding owner list item to response data. ({})".format(item))
-                list_details = List(item).get_details()
+                logger.log_payload(log, "Adding owner list item to response data. ({})", item)
+                list_details = List.decode(item)
                 response_data['closed'].append(list_details)
 
     else:
@@ -1,14 +1,14 @@
 import os
-import boto3
-import json
-from lists import common, logger
+from lists import common, common_clients, common_invocation, logger
 
 log = logger.setup_logger()
+common_clients.warm_up('cognito-idp')
 
 
+@common_invocation.invocation_handler
 def handler(event, context):
     try:
-        log.info("Auth Trigger event: " + json.dumps(event))
+        logger.log_payload(log, "Auth Trigger event: {}", event)
 
         user_pool_id = common.get_env_variable(os.environ, 'USERPOOL_ID')
         email = get_email(event)
@@ -47,7 +47,7 @@ def set_email_verified(user_pool_id, email):
     log.info("Updating email_verified for user: " + email)
 
     try:
-        client = boto3.client('cognito-idp')
+        client = common_clients.get_client('cognito-idp')
         client.admin_update_user_attributes(
             UserPoolId=user_pool_id,
             Username=email,
@@ -1,31 +1,41 @@
-import json
 import os
-import boto3
-from lists import common, common_table_ops, common_kpi, logger
+from botocore.exceptions import ClientError
+from lists import common, common_clients, common_invocation, common_outbox, common_table_ops, common_kpi, common_request, common_schema, logger
 
 log = logger.setup_logger()
+common_clients.warm_up('dynamodb')
 
-SENDER = "Ewelists <contact@ewelists.com>"
+SCHEMA = common_schema.compile_schema([
+    ('product', common_schema.obj('product', [
+        ('brand', common_schema.string(allow_empty=True)),
+        ('details', common_schema.string(allow_empty=True)),
+        ('productUrl', common_schema.string(allow_empty=True)),
+        ('imageUrl', common_schema.string(allow_empty=True))
+    ]))
+])
 
 
+@common_invocation.invocation_handler
 def handler(event, context):
-    log.info("Path Parameters: {}".format(json.dumps(event['pathParameters'])))
-    log.info("Body attributes: {}".format(json.dumps(event['body'])))
+    logger.log_payload(log, "Path Parameters: {}", event['pathParameters'])
+    logger.log_payload(log, "Body attributes: {}", event['body'])
     response = purchase_main(event)
     return response
 
 
 def purchase_main(event):
     try:
+        request = common_request.get_request(event)
         table_name = common.get_env_variable(os.environ, 'TABLE_NAME')
         resv_id_index = common.get_env_variable(os.environ, 'RESERVATIONID_INDEX')
         confirm_template = common.get_env_variable(os.environ, 'CONFIRM_TEMPLATE_NAME')
         update_template = common.get_env_variable(os.environ, 'UPDATE_TEMPLATE_NAME')
         domain_name = common.get_env_variable(os.environ, 'DOMAIN_NAME')
 
-        resv_id = common.get_path_parameter(event, 'reservationid')
-        email = common.get_path_parameter(event, 'email')
-        product = common.get_body_attribute(event, 'product')
+        resv_id = request.path_parameter('reservationid')
+        email = request.path_parameter('email')
+        common_schema.validate_body(request, SCHEMA)
+        product = request.body_attribute('product')
 
         # Get reservation to know how what the quantity reserved was. As well as the reservation id
         reservation = common_table_ops.get_reservation(table_name, resv_id_index, resv_id)
@@ -35,87 +45,66 @@ def purchase_main(event):
         # Get list owner details
         list_owner = common_table_ops.get_users_details(table_name, reservation['listOwnerId'])
 
-        # Get product to ensure we know the latest quantities.
-        product_item = common_table_ops.get_product_item(table_name, reservation['listId'], reservation['productId'])
-
-        # Calculate reserved and purchased quantities
-        product_reserved_q = new_reserved_quantity(product_item['reserved'], reservation['quantity'])
-        product_purchased_q = new_purchased_quantity(product_item['purchased'], reservation['quantity'])
-
-        # update table with transaction
-        product_key = common.create_product_key(reservation['listId'], reservation['productId'])
-        reservation_key = common.create_reservation_key(reservation)
-        update_product_and_reservation(table_name, product_key, product_reserved_q, product_purchased_q, reservation_key)
-
-        # Send confirmation
+        # Confirmation email to the purchaser and update email to the list owner.
         data = create_confirm_email_data(domain_name, reservation['name'], reservation['listId'], reservation['listTitle'], reservation['quantity'], product)
-        common.send_email(reservation['email'], confirm_template, data)
-
-        # Send update to list owner
         update_data = create_update_email_data(domain_name, list_owner['name'], reservation['listId'], reservation['listTitle'], reservation['quantity'], reservation['name'], product)
-        common.send_email(list_owner['email'], update_template, update_data)
+        email_jobs = [
+            common_outbox.create_email_job_put(table_name, reservation['email'], confirm_template, data),
+            common_outbox.create_email_job_put(table_name, list_owner['email'], update_template, update_data)
+        ]
+
+        # Move the reserved quantity to purchased on the product, update the reservation and queue the emails, in one transaction.
+        update_product_and_reservation(table_name, reservation, email_jobs)
 
+    except common_schema.ValidationError as e:
+        log.info("Request was not valid: {}".format(e))
+        return common.create_response(400, e.get_details())
     except Exception as e:
         log.error("Exception: {}".format(e))
-        response = common.create_response(500, json.dumps({'error': str(e)}))
+        response = common.create_response(500, {'error': str(e)})
         log.info("Returning response: {}".format(response))
         return response
 
     common_kpi.post(os.environ, event, 'Purchased')
 
     data = {'purchased': True}
-    response = common.create_response(200, json.dumps(data))
+    response = common.create_response(200, data)
     return response
 
 
-def new_reserved_quantity(product_reserved_quantity, user_reserved_quantity):
-    new_quantity = product_reserved_quantity - user_reserved_quantity
-    log.info("Product reserved quantity updating from {} to {}".format(product_reserved_quantity, new_quantity))
-
-    return new_quantity
-
-
-def new_purchased_quantity(product_purchased_quantity, user_reserved_quantity):
-    new_quantity = product_purchased_quantity + user_reserved_quantity
-    log.info("Product purchased quantity updating from {} to {}".format(product_purchased_quantity, new_quantity))
-
-    return new_quantity
-
-
-def update_product_and_reservation(table_name, product_key, product_reserved_q, product_purchased_q, reservation_key):
-    dynamodb = boto3.client('dynamodb')
+def update_product_and_reservation(table_name, reservation, email_jobs=()):
+    dynamodb = common_clients.get_client('dynamodb')
+    product_key = common.create_product_key(reservation['listId'], reservation['productId'])
+    reservation_key = common.create_reservation_key(reservation)
 
     try:
         response = dynamodb.transact_write_items(
             TransactItems=[
-                {
-                    'Update': {
-                        'TableName': table_name,
-                        'Key': product_key,
-                        'UpdateExpression': "set reserved = :r, purchased = :p",
-                        'ExpressionAttributeValues': {
-                            ':r': {'N': str(product_reserved_q)},
-                            ':p': {'N': str(product_purchased_q)}
-                        }
-                    }
-                },
+                common.create_product_quantity_update(table_name, product_key, -reservation['quantity'], purchased_change=reservation['quantity']),
                 {
                     'Update': {
                         'TableName': table_name,
                         'Key': reservation_key,
                         'UpdateExpression': "set #st = :s",
+                        'ConditionExpression': "#st = :reserved",
                         'ExpressionAttributeValues': {
                             ':s': {'S': 'purchased'},
+                            ':reserved': {'S': 'reserved'}
                         },
                         'ExpressionAttributeNames': {
                             '#st': 'state'
                         }
                     }
-                }
-            ]
+                },
+                common_table_ops.create_list_version_update(table_name, reservation['listId'], reservation['listOwnerId'])
+            ] + list(email_jobs)
         )
 
-        log.info("Attributes updated: " + json.dumps(response))
+        logger.log_payload(log, "Attributes updated: {}", response)
+    except ClientError as e:
+        log.info("Transaction write exception: " + str(e))
+        common.check_cancelled_reservation_transaction(e, table_name, reservation, -reservation['quantity'])
+        raise Exception("Unexpected error when confirming purchase of product.")
     except Exception as e:
         log.info("Transaction write exception: " + str(e))
         raise Exception("Unexpected error when confirming purchase of product.")
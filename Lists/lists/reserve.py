@@ -1,15 +1,30 @@
-import json
 import os
 import time
 import uuid
-import boto3
-from lists import common, common_table_ops, common_kpi, logger
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+from lists import common, common_clients, common_invocation, common_outbox, common_table_ops, common_kpi, common_request, common_schema, logger
 
 log = logger.setup_logger()
+common_clients.warm_up('dynamodb')
 
-SENDER = "Ewelists <contact@ewelists.com>"
+SCHEMA = common_schema.compile_schema([
+    ('quantity', common_schema.integer(minimum=1)),
+    ('title', common_schema.string()),
+    ('name', common_schema.string(), False),
+    ('product', common_schema.obj('product', [
+        ('type', common_schema.one_of('products', 'notfound')),
+        ('brand', common_schema.string(allow_empty=True)),
+        ('details', common_schema.string(allow_empty=True)),
+        ('productUrl', common_schema.string(allow_empty=True)),
+        ('imageUrl', common_schema.string(allow_empty=True))
+    ]))
+])
 
+MAX_ATTEMPTS = 3
 
+
+@common_invocation.invocation_handler
 def handler(event, context):
     response = reserve_main(event)
     return response
@@ -17,50 +32,83 @@ def handler(event, context):
 
 def reserve_main(event):
     try:
+        request = common_request.get_request(event)
         table_name = common.get_env_variable(os.environ, 'TABLE_NAME')
         index_name = common.get_env_variable(os.environ, 'INDEX_NAME')
         template = common.get_env_variable(os.environ, 'TEMPLATE_NAME')
         domain_name = common.get_env_variable(os.environ, 'DOMAIN_NAME')
-        list_id = common.get_path_parameter(event, 'id')
-        list_title = common.get_body_attribute(event, 'title')
-        product_id = common.get_path_parameter(event, 'productid')
-        product = common.get_body_attribute(event, 'product')
-        request_reserve_quantity = common.get_body_attribute(event, 'quantity')
+        list_id = request.path_parameter('id')
+        common_schema.validate_body(request, SCHEMA)
+        list_title = request.body_attribute('title')
+        product_id = request.path_parameter('productid')
+        product = request.body_attribute('product')
+        request_reserve_quantity = request.body_attribute('quantity')
 
-        # Step 1 - check if reserved item exists
-        user = common.get_user(event, os.environ, table_name, index_name)
-        common_table_ops.check_product_not_reserved_by_user(table_name, list_id, product_id, user['id'])
+        # Step 1 - Load the user, list, product and existing reservations, then check product not already reserved by user.
+        user, context = load_reservation_context(event, table_name, index_name, list_id, product_id)
+        check_product_not_reserved_by_user(context['reservations'], user['id'])
 
-        # Step 2 - get product item.
-        product_item = common_table_ops.get_product_item(table_name, list_id, product_id)
+        # Step 2 - check product item exists.
+        product_item = get_context_product(context)
 
-        # Step 3 - Calculate new reserved quantity of product.
-        new_product_reserved_quantity = common.calculate_new_reserved_quantity(product_item, request_reserve_quantity)
+        # Step 3 - Check the product has enough unreserved quantity.
+        common.calculate_new_reserved_quantity(product_item, request_reserve_quantity)
 
-        # Step 4 - Update, in one transaction, the product reserved quantity and create reserved item.
+        # Step 4 - Create the reserved item and the reserve confirmation email job.
         resv_id = str(uuid.uuid4())
-        product_key = common.create_product_key(list_id, product_id)
-        list_details = common.get_list_details(table_name, list_id)
-        reservation_item = create_reservation_item(list_id, list_details['listOwner'], list_title, product_id, product['type'], resv_id, user, request_reserve_quantity)
-        create_reservation(table_name, new_product_reserved_quantity, product_key, reservation_item)
-
-        # Step 5 - Send reserve confirmation email
+        reservation_item = create_reservation_item(list_id, context['list']['listOwner'], list_title, product_id, product['type'], resv_id, user, request_reserve_quantity)
         notes = get_notes(product_item)
         data = create_email_data(domain_name, user['name'], resv_id, list_id, list_title, request_reserve_quantity, notes, product)
-        common.send_email(user['email'], template, data)
+        email_job = common_outbox.create_email_job_put(table_name, user['email'], template, data)
+
+        # Step 5 - Add, in one transaction, to the product reserved quantity, create reserved item and queue the email.
+        create_reservation(table_name, list_id, product_id, product_item, request_reserve_quantity, reservation_item, email_job)
 
+    except common_schema.ValidationError as e:
+        log.info("Request was not valid: {}".format(e))
+        return common.create_response(400, e.get_details())
     except Exception as e:
         log.error("Exception: {}".format(e))
-        response = common.create_response(500, json.dumps({'error': str(e)}))
+        response = common.create_response(500, {'error': str(e)})
         log.info("Returning response: {}".format(response))
         return response
 
     common_kpi.post(os.environ, event, 'Reserved')
     data = {'reservation_id': resv_id}
-    response = common.create_response(200, json.dumps(data))
+    response = common.create_response(200, data)
     return response
 
 
+def load_reservation_context(event, table_name, index_name, list_id, product_id):
+    """The user lookup (email index query then user item) runs alongside the single query of the list partition."""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        user_future = executor.submit(common.get_user, event, os.environ, table_name, index_name)
+        context_future = executor.submit(common_table_ops.get_reservation_context, table_name, list_id, product_id)
+
+        user = user_future.result()
+        context = context_future.result()
+
+    return user, context
+
+
+def check_product_not_reserved_by_user(reservations, user_id):
+    log.info("Checking product not already reserved by user.")
+
+    for reservation in reservations:
+        if reservation['userId'] == user_id and reservation['state'] == 'reserved':
+            raise Exception("Product already reserved by user.")
+
+    return True
+
+
+def get_context_product(context):
+    if context['product'] is None:
+        log.info("No product was found in the reservation context.")
+        raise Exception("No product item exists with this ID.")
+
+    return context['product']
+
+
 def create_reservation_item(list_id, list_owner_id, list_title, product_id, product_type, resv_id, user, request_reserve_quantity):
     return {
         'PK': {'S': "LIST#{}".format(list_id)},
@@ -80,37 +128,41 @@ def create_reservation_item(list_id, list_owner_id, list_title, product_id, prod
     }
 
 
-def create_reservation(table_name, new_product_reserved_quantity, product_key, reservation_item):
-    dynamodb = boto3.client('dynamodb')
+def create_reservation(table_name, list_id, product_id, product_item, request_reserve_quantity, reservation_item, email_job=None):
+    dynamodb = common_clients.get_client('dynamodb')
+    product_key = common.create_product_key(list_id, product_id)
+    reservation = {'listId': list_id, 'productId': product_id}
 
-    try:
-        response = dynamodb.transact_write_items(
-            TransactItems=[
-                {
-                    'Update': {
-                        'TableName': table_name,
-                        'Key': product_key,
-                        'UpdateExpression': "set reserved = :r",
-                        'ExpressionAttributeValues': {
-                            ':r': {'N': str(new_product_reserved_quantity)},
-                        }
-                    }
-                },
-                {
-                    'Put': {
-                        'TableName': table_name,
-                        'Item': reservation_item
-                    }
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        transact_items = [
+            common.create_product_quantity_update(table_name, product_key, request_reserve_quantity, product_item=product_item),
+            {
+                'Put': {
+                    'TableName': table_name,
+                    'Item': reservation_item
                 }
-            ]
-        )
-
-        log.info("Attributes updated: " + json.dumps(response))
-    except Exception as e:
-        log.info("Transaction write exception: " + str(e))
-        raise Exception("Unexpected error when reserving product.")
-
-    return True
+            },
+            common_table_ops.create_list_version_update(table_name, list_id, reservation_item['listOwnerId']['S'])
+        ]
+        if email_job is not None:
+            transact_items.append(email_job)
+
+        try:
+            response = dynamodb.transact_write_items(TransactItems=transact_items)
+
+            logger.log_payload(log, "Attributes updated: {}", response)
+            return True
+        except ClientError as e:
+            log.info("Transaction write exception (attempt {}): {}".format(attempt, e))
+            # Raises the quantity error if the product changed such that the reservation no longer fits.
+            product_item = common.check_cancelled_reservation_transaction(e, table_name, reservation, request_reserve_quantity)
+            if product_item is None:
+                raise Exception("Unexpected error when reserving product.")
+        except Exception as e:
+            log.info("Transaction write exception: " + str(e))
+            raise Exception("Unexpected error when reserving product.")
+
+    raise Exception("Unexpected error when reserving product.")
 
 
 def get_notes(product_item):
@@ -0,0 +1,64 @@
+# Single entry point for every route of the Lists API, for deploying the API as one function with one warm pool rather
+# than a function per route. The per-route handlers are unchanged, and the router calls the same main functions.
+import importlib
+import os
+from lists import common, common_clients, common_context, common_invocation, logger
+
+log = logger.setup_logger()
+# Every route uses the table, so its connection is opened before the first route is called.
+common_clients.warm_up('dynamodb')
+
+# API resource and method, to the module and main function of the route, and the environment variables which differ
+# between the route functions. Everything else the routes need is set once on the router function.
+ROUTES = {
+    ('/lists', 'POST'): ('create', 'create_main', {'KPI_COLOUR': '#A68B03'}),
+    ('/lists', 'GET'): ('list', 'list_main', {'INDEX_NAME': 'userId-index'}),
+    ('/lists/{id}', 'GET'): ('get_list', 'get_list_main', {}),
+    ('/lists/{id}', 'PUT'): ('update', 'update_list_main', {}),
+    ('/lists/{id}', 'DELETE'): ('delete', 'delete_main', {}),
+    ('/lists/{id}/close', 'POST'): ('close', 'close_main', {}),
+    ('/lists/{id}/shared', 'GET'): ('get_shared_list', 'get_shared_list_main', {}),
+    ('/lists/{id}/product/{productid}', 'POST'): ('add_product', 'add_product_main', {'KPI_COLOUR': '#246B73'}),
+    ('/lists/{id}/product/{productid}', 'PUT'): ('update_product', 'update_product_main', {}),
+    ('/lists/{id}/product/{productid}', 'DELETE'): ('delete_product', 'delete_product_main', {}),
+    ('/lists/{id}/reserve/{productid}/email/{email}', 'POST'): ('reserve', 'reserve_main', {'INDEX_NAME': 'email-index', 'KPI_COLOUR': '#2A8C82'}),
+    ('/lists/reserve/{id}/email/{email}', 'PUT'): ('update_reservation', 'update_reserve_main', {}),
+    ('/lists/reserve/{id}/email/{email}', 'DELETE'): ('unreserve', 'unreserve_main', {}),
+    ('/lists/reservation/{id}', 'GET'): ('reservation', 'reservation_main', {}),
+    ('/lists/reservation/{id}', 'DELETE'): ('delete_reservation', 'delete_main', {}),
+    ('/lists/purchase/{reservationid}/email/{email}', 'PUT'): ('purchase', 'purchase_main', {'KPI_COLOUR': '#D9CB04'})
+}
+
+# Main functions of the routes that have been called, as route modules are imported when they are first called.
+_mains = {}
+
+
+@common_invocation.invocation_handler
+def handler(event, context):
+    response = route_main(event)
+    return response
+
+
+def route_main(event):
+    key = (event.get('resource'), event.get('httpMethod'))
+
+    if key not in ROUTES:
+        log.error("No route for {} {}.".format(key[1], key[0]))
+        return common.create_response(404, {'error': "No route for {} {}.".format(key[1], key[0])})
+
+    module_name, main_name, variables = ROUTES[key]
+    main = get_main(key)
+    os.environ.update(variables)
+    common_context.annotate(routedTo=module_name)
+
+    return main(event)
+
+
+def get_main(key):
+    if key not in _mains:
+        module_name, main_name, variables = ROUTES[key]
+        log.info("Importing {} for route {} {}.".format(module_name, key[1], key[0]))
+        module = importlib.import_module('lists.' + module_name)
+        _mains[key] = getattr(module, main_name)
+
+    return _mains[key]
@@ -0,0 +1,220 @@
+import itertools
+import os
+import time
+from botocore.exceptions import ClientError
+from lists import common, common_clients, common_context, common_invocation, common_outbox, common_table_ops, logger
+
+log = logger.setup_logger()
+common_clients.warm_up('dynamodb', 'ses')
+
+# SendBulkTemplatedEmail accepts at most 50 destinations, and BatchWriteItem at most 25 requests.
+MAX_DESTINATIONS = 50
+BATCH_SIZE = 25
+MAX_ATTEMPTS = 5
+# Time left, in milliseconds, below which the worker stops taking jobs so that it finishes before the lambda timeout.
+TIME_MARGIN = 5000
+
+
+@common_invocation.invocation_handler
+def handler(event, context):
+    result = send_emails_main(event, context)
+    return result
+
+
+def send_emails_main(event, context=None):
+    table_name = common.get_env_variable(os.environ, 'TABLE_NAME')
+    send_rate = float(os.environ.get('MAX_SEND_RATE', '10'))
+    max_jobs = int(os.environ.get('MAX_JOBS', '500'))
+
+    jobs = get_email_jobs(table_name, max_jobs)
+    limiter = RateLimiter(send_rate)
+    result = {'jobs': len(jobs), 'sent': 0, 'retried': 0, 'failed': 0, 'undeleted': 0}
+
+    for template, batch in group_jobs(jobs, min(MAX_DESTINATIONS, max(1, int(send_rate)))):
+        if not has_time(context):
+            log.info("Stopping with {} jobs sent, as the invocation is running out of time.".format(result['sent']))
+            break
+
+        limiter.acquire(len(batch))
+        sent, failures = send_batch(template, batch)
+
+        result['undeleted'] += delete_jobs(table_name, sent)
+        result['sent'] += len(sent)
+
+        for job, error in failures:
+            if record_failure(table_name, job, error):
+                result['retried'] += 1
+            else:
+                result['failed'] += 1
+
+    if result['undeleted']:
+        log.error("{} email jobs were sent but could not be deleted, so will be sent again by the next run.".format(result['undeleted']))
+
+    common_context.annotate(emailJobs=result['jobs'], emailsSent=result['sent'], emailsRetried=result['retried'], emailsFailed=result['failed'], emailsUndeleted=result['undeleted'])
+    return result
+
+
+def has_time(context):
+    if context is None:
+        return True
+
+    return context.get_remaining_time_in_millis() > TIME_MARGIN
+
+
+class RateLimiter:
+    """Token bucket of emails per second, the unit of the SES maximum send rate."""
+
+    def __init__(self, rate, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.tokens = rate
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+
+    def acquire(self, count=1):
+        now = self.clock()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens < count:
+            wait = (count - self.tokens) / self.rate
+            self.sleep(wait)
+            self.tokens = count
+            self.updated = now + wait
+
+        self.tokens -= count
+        return True
+
+
+def get_email_jobs(table_name, max_jobs):
+    items = common_table_ops.query_items(
+        table_name,
+        page_size=max_jobs,
+        KeyConditionExpression="PK = :PK",
+        ExpressionAttributeValues={":PK": {'S': common_outbox.OUTBOX_PK}}
+    )
+
+    try:
+        jobs = [common_outbox.get_job(item) for item in itertools.islice(items, max_jobs)]
+    except ClientError as e:
+        log.info(logger.lazy("Query of outbox error response: {}", e.response))
+        raise Exception("Unexpected error when getting email jobs.")
+
+    log.info("Found {} email jobs in the outbox.".format(len(jobs)))
+    return jobs
+
+
+def group_jobs(jobs, batch_size=MAX_DESTINATIONS):
+    """Batches of jobs which share a template, in the order each template was first seen."""
+    templates = {}
+    for job in jobs:
+        templates.setdefault(job['template'], []).append(job)
+
+    for template, template_jobs in templates.items():
+        for i in range(0, len(template_jobs), batch_size):
+            yield template, template_jobs[i:i + batch_size]
+
+
+def send_batch(template, jobs):
+    """Sends a batch of jobs with one SendBulkTemplatedEmail request. Returns the jobs sent and the jobs that failed with their error."""
+    ses = common_clients.get_client('ses')
+
+    try:
+        response = ses.send_bulk_templated_email(
+            Source=common.SENDER,
+            ReplyToAddresses=[common.SENDER],
+            Template=template,
+            DefaultTemplateData='{}',
+            Destinations=[
+                {
+                    'Destination': {'ToAddresses': [job['email']]},
+                    'ReplacementTemplateData': job['templateData']
+                } for job in jobs
+            ]
+        )
+    except ClientError as e:
+        log.info("Bulk email with template {} failed: {}".format(template, e))
+        return [], [(job, e.response['Error']['Message']) for job in jobs]
+
+    sent = []
+    failures = []
+    for job, status in zip(jobs, response['Status']):
+        if status['Status'] == 'Success':
+            sent.append(job)
+        else:
+            failures.append((job, status.get('Error', status['Status'])))
+
+    log.info("Bulk email with template {} sent {} of {} emails.".format(template, len(sent), len(jobs)))
+    return sent, failures
+
+
+def delete_jobs(table_name, jobs):
+    """Deletes sent jobs from the outbox, retrying unprocessed deletes with backoff. Returns the number of jobs that
+    could not be deleted, which the next run will send again.
+    """
+    dynamodb = common_clients.get_client('dynamodb')
+    undeleted = 0
+
+    for i in range(0, len(jobs), BATCH_SIZE):
+        request_items = {table_name: [{'DeleteRequest': {'Key': job['key']}} for job in jobs[i:i + BATCH_SIZE]]}
+
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                response = dynamodb.batch_write_item(RequestItems=request_items)
+            except ClientError as e:
+                log.error("Sent email jobs could not be deleted: {}".format(e))
+                break
+
+            request_items = response.get('UnprocessedItems', {})
+            if not request_items:
+                break
+
+            if attempt < MAX_ATTEMPTS:
+                time.sleep(common_table_ops.batch_backoff(attempt))
+
+        if request_items:
+            undeleted += len(request_items[table_name])
+
+    return undeleted
+
+
+def record_failure(table_name, job, error):
+    """Counts a failed attempt on the job, to be retried by the next run. Returns False if the job has used all of its
+    attempts, in which case it is moved out of the outbox to the failed partition.
+    """
+    dynamodb = common_clients.get_client('dynamodb')
+    attempts = job['attempts'] + 1
+    log.info("Email job {} attempt {} failed: {}".format(job['jobId'], attempts, error))
+
+    try:
+        if attempts < MAX_ATTEMPTS:
+            dynamodb.update_item(
+                TableName=table_name,
+                Key=job['key'],
+                UpdateExpression="set attempts = :attempts, lastError = :error",
+                ExpressionAttributeValues={':attempts': {'N': str(attempts)}, ':error': {'S': str(error)}}
+            )
+            return True
+
+        failed_item = {
+            'PK': {'S': common_outbox.FAILED_PK},
+            'SK': job['key']['SK'],
+            'jobId': {'S': job['jobId']},
+            common_outbox.TO_ADDRESS: {'S': job['email']},
+            'template': {'S': job['template']},
+            'templateData': {'S': job['templateData']},
+            'attempts': {'N': str(attempts)},
+            'lastError': {'S': str(error)}
+        }
+        dynamodb.transact_write_items(
+            TransactItems=[
+                {'Put': {'TableName': table_name, 'Item': failed_item}},
+                {'Delete': {'TableName': table_name, 'Key': job['key']}}
+            ]
+        )
+    except ClientError as e:
+        log.error("Failure of email job {} could not be recorded: {}".format(job['jobId'], e))
+        return attempts < MAX_ATTEMPTS
+
+    log.error("Email job {} failed after {} attempts: {}".format(job['jobId'], attempts, error))
+    return False
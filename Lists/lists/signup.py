@@ -1,19 +1,15 @@
 import os
-import boto3
-import json
 import random
 import string
-from lists import common, common_kpi, logger
+from lists import common, common_clients, common_invocation, common_kpi, common_outbox, logger
 
 log = logger.setup_logger()
-
-# Email configuration
-CHARSET = "UTF-8"
-SENDER = "Ewelists <contact@ewelists.com>"
+common_clients.warm_up('dynamodb', 'cognito-idp')
 
 
+@common_invocation.invocation_handler
 def handler(event, context):
-    log.info("SignUp Trigger event: " + json.dumps(event))
+    logger.log_payload(log, "SignUp Trigger event: {}", event)
 
     table_name = common.get_env_variable(os.environ, 'TABLE_NAME')
     user_pool_id = common.get_env_variable(os.environ, 'USERPOOL_ID')
@@ -33,11 +29,10 @@ def handler(event, context):
         raise Exception(new_user['type'] + " LinkedLogon")
     elif trigger == 'PreSignUp_AdminCreateUser':
         log.info("Admin Creating User Account, remember this could be as part of a social signup.")
-        create_user_in_lists_db(table_name, new_user['username'], new_user['email'], new_user['name'])
-
-        # Send welcome email
+        # Create the user with a welcome email job.
         data = create_email_data(domain_name, new_user['name'])
-        common.send_email(new_user['email'], template, data)
+        email_job = common_outbox.create_email_job_put(table_name, new_user['email'], template, data)
+        create_user_in_lists_db(table_name, new_user['username'], new_user['email'], new_user['name'], email_job)
     else:
         log.info("User does not have entry in userpool.")
 
@@ -57,11 +52,10 @@ def handler(event, context):
             raise Exception(new_user['type'] + " Signup")
         else:
             log.info("New User is using username and password..")
-            create_user_in_lists_db(table_name, new_user['username'], new_user['email'], new_user['name'])
-
-            # Send welcome email
+            # Create the user with a welcome email job.
             data = create_email_data(domain_name, new_user['name'])
-            common.send_email(new_user['email'], template, data)
+            email_job = common_outbox.create_email_job_put(table_name, new_user['email'], template, data)
+            create_user_in_lists_db(table_name, new_user['username'], new_user['email'], new_user['name'], email_job)
             common_kpi.post(os.environ, event, 'Users')
             log.info("Allowing signup process to complete for user.")
 
@@ -77,7 +71,7 @@ def create_email_data(domain_name, name):
 
 
 def set_random_password(user_pool_id, email):
-    client = boto3.client('cognito-idp')
+    client = common_clients.get_client('cognito-idp')
 
     log.info("Using admin_set_user_password to push user out of FORCE_CHANGED_PASSWORD state.")
     password = '!' + ''.join(random.SystemRandom().choice(string.ascii_uppercase + string.ascii_lowercase + string.digits) for _ in range(12))
@@ -105,7 +99,7 @@ def set_random_password(user_pool_id, email):
 
 
 def create_new_cognito_user(user_pool_id, email, name):
-    client = boto3.client('cognito-idp')
+    client = common_clients.get_client('cognito-idp')
 
     result = {}
 
@@ -123,8 +117,8 @@ def create_new_cognito_user(user_pool_id, email, name):
         log.error("Account could not be created: " + str(e))
         raise Exception('Account creation failed for ' + email + '.')
 
-    log.info("Link response: " + json.dumps(response['User']['Username']))
-    log.info("Link response: " + json.dumps(response['User']['Attributes']))
+    logger.log_payload(log, "Link response: {}", response['User']['Username'])
+    logger.log_payload(log, "Link response: {}", response['User']['Attributes'])
 
     result['created'] = True
     result['user_id'] = response['User']['Username']
@@ -133,7 +127,7 @@ def create_new_cognito_user(user_pool_id, email, name):
 
 
 def link_accounts(user_pool_id, email, existing_sub, new_type, new_id):
-    client = boto3.client('cognito-idp')
+    client = common_clients.get_client('cognito-idp')
     log.info("Linking accounts with email {}. {} account ID ({}). Existing user pool identity ({}).".format(email, new_type, new_id, existing_sub))
 
     try:
@@ -150,7 +144,7 @@ def link_accounts(user_pool_id, email, existing_sub, new_type, new_id):
                 'ProviderAttributeValue': new_id
             }
         )
-        log.info("Link response: " + json.dumps(response))
+        logger.log_payload(log, "Link response: {}", response)
     except Exception as e:
         log.error("Accounts could not be joined: " + str(e))
         raise Exception('Accounts could not be joined for ' + email + '.')
@@ -158,8 +152,9 @@ def link_accounts(user_pool_id, email, existing_sub, new_type, new_id):
     return True
 
 
-def create_user_in_lists_db(table_name, sub, email, name):
-    dynamodb = boto3.client('dynamodb')
+def create_user_in_lists_db(table_name, sub, email, name, email_job=None):
+    """Puts the user item, in one transaction with the welcome email job when there is one."""
+    dynamodb = common_clients.get_client('dynamodb')
 
     log.info("Creating entry in table {} for user with email {} (sub: {}).".format(table_name, email, sub))
 
@@ -174,8 +169,11 @@ def create_user_in_lists_db(table_name, sub, email, name):
         user_item['name'] = {'S': name}
 
     try:
-        log.info("Put user item in lists table: {}".format(user_item))
-        dynamodb.put_item(TableName=table_name, Item=user_item)
+        logger.log_payload(log, "Put user item in lists table: {}", user_item)
+        if email_job is None:
+            dynamodb.put_item(TableName=table_name, Item=user_item)
+        else:
+            dynamodb.transact_write_items(TransactItems=[{'Put': {'TableName': table_name, 'Item': user_item}}, email_job])
     except Exception as e:
         log.error("User entry could not be created: {}".format(e))
         raise Exception('User entry could not be created for ' + email + '.')
@@ -203,7 +201,7 @@ def get_user_from_event(event):
         user['type'] = "Cognito"
         user['username'] = event['userName']
 
-    log.info("User object being returned: {}.".format(json.dumps(user)))
+    logger.log_payload(log, "User object being returned: {}.", user)
 
     return user
 
@@ -239,7 +237,7 @@ def switch_google_domain(email):
 
 
 def get_user_client_call(user_pool_id, email):
-    client = boto3.client('cognito-idp')
+    client = common_clients.get_client('cognito-idp')
 
     response = client.list_users(
         UserPoolId=user_pool_id,
@@ -248,7 +246,7 @@ def get_user_client_call(user_pool_id, email):
         Filter='email ="' + email + '"'
     )
 
-    log.info("Users: {}.".format(response))
+    logger.log_payload(log, "Users: {}.", response)
 
     return response['Users']
 
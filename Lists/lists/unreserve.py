@@ -1,24 +1,26 @@
-import json
 import os
-import boto3
-from lists import common, common_table_ops, logger
+from botocore.exceptions import ClientError
+from lists import common, common_clients, common_invocation, common_request, common_table_ops, logger
 
 log = logger.setup_logger()
+common_clients.warm_up('dynamodb')
 
 
+@common_invocation.invocation_handler
 def handler(event, context):
-    log.info("Path Parameters: {}".format(json.dumps(event['pathParameters'])))
-    log.info("Body attributes: {}".format(json.dumps(event['body'])))
+    logger.log_payload(log, "Path Parameters: {}", event['pathParameters'])
+    logger.log_payload(log, "Body attributes: {}", event['body'])
     response = unreserve_main(event)
     return response
 
 
 def unreserve_main(event):
     try:
+        request = common_request.get_request(event)
         table_name = common.get_env_variable(os.environ, 'TABLE_NAME')
         email_index = common.get_env_variable(os.environ, 'EMAIL_INDEX')
         resv_id_index = common.get_env_variable(os.environ, 'RESERVATIONID_INDEX')
-        resv_id = common.get_path_parameter(event, 'id')
+        resv_id = request.path_parameter('id')
 
         # Step 1 - get identity (which could be from sign in, or email in path, or encrypted parameter)
         user = common.get_user(event, os.environ, table_name, email_index)
@@ -28,58 +30,53 @@ def unreserve_main(event):
         common.confirm_reservation_owner(reservation, user['id'])
         common.gift_is_reserved(reservation)
 
-        # Step 3 - Get product Item. Calculate new reserved quantity of product.
-        product_item = common_table_ops.get_product_item(table_name, reservation['listId'], reservation['productId'])
-        new_product_reserved_quantity = common.calculate_new_reserved_quantity(product_item, -reservation['quantity'])
-
-        # Step 4 - Delete reserved details item and update product reserved quantities
-        product_key = common.create_product_key(reservation['listId'], reservation['productId'])
-        reservation_key = common.create_reservation_key(reservation)
-        unreserve_product(table_name, product_key, reservation_key, new_product_reserved_quantity)
+        # Step 3 - Cancel reserved details item and subtract the reserved quantity from the product.
+        unreserve_product(table_name, reservation)
     except Exception as e:
         log.error("Exception: {}".format(e))
-        response = common.create_response(500, json.dumps({'error': str(e)}))
+        response = common.create_response(500, {'error': str(e)})
         log.info("Returning response: {}".format(response))
         return response
 
     data = {'unreserved': True}
 
-    response = common.create_response(200, json.dumps(data))
+    response = common.create_response(200, data)
     return response
 
 
-def unreserve_product(table_name, product_key, reservation_key, new_product_reserved_quantity):
-    dynamodb = boto3.client('dynamodb')
+def unreserve_product(table_name, reservation):
+    dynamodb = common_clients.get_client('dynamodb')
+    product_key = common.create_product_key(reservation['listId'], reservation['productId'])
+    reservation_key = common.create_reservation_key(reservation)
+
     try:
         response = dynamodb.transact_write_items(
             TransactItems=[
-                {
-                    'Update': {
-                        'TableName': table_name,
-                        'Key': product_key,
-                        'UpdateExpression': "set reserved = :r",
-                        'ExpressionAttributeValues': {
-                            ':r': {'N': str(new_product_reserved_quantity)},
-                        }
-                    }
-                },
+                common.create_product_quantity_update(table_name, product_key, -reservation['quantity']),
                 {
                     'Update': {
                         'TableName': table_name,
                         'Key': reservation_key,
                         'UpdateExpression': "set #st = :s",
+                        'ConditionExpression': "#st = :reserved",
                         'ExpressionAttributeValues': {
                             ':s': {'S': 'cancelled'},
+                            ':reserved': {'S': 'reserved'}
                         },
                         'ExpressionAttributeNames': {
                             '#st': 'state'
                         }
                     }
-                }
+                },
+                common_table_ops.create_list_version_update(table_name, reservation['listId'], reservation['listOwnerId'])
             ]
         )
 
-        log.info("Attributes updated: " + json.dumps(response))
+        logger.log_payload(log, "Attributes updated: {}", response)
+    except ClientError as e:
+        log.info("Transaction write exception: " + str(e))
+        common.check_cancelled_reservation_transaction(e, table_name, reservation, -reservation['quantity'])
+        raise Exception("Unexpected error when unreserving product.")
     except Exception as e:
         log.info("Transaction write exception: " + str(e))
         raise Exception("Unexpected error when unreserving product.")
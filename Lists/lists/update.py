@@ -1,11 +1,20 @@
-import json
 import os
-import boto3
-from lists import common, logger
+from lists import common, common_clients, common_invocation, common_request, common_schema, common_table_ops, logger
 
 log = logger.setup_logger()
+common_clients.warm_up('dynamodb')
 
+# An update replaces every attribute of the list, so all of them are required. An event date can be cleared.
+SCHEMA = common_schema.compile_schema([
+    ('title', common_schema.string()),
+    ('description', common_schema.string(allow_empty=True)),
+    ('eventDate', common_schema.nullable(common_schema.string(allow_empty=True))),
+    ('occasion', common_schema.string()),
+    ('imageUrl', common_schema.string())
+], additional=False)
 
+
+@common_invocation.invocation_handler
 def handler(event, context):
     response = update_list_main(event)
     return response
@@ -13,81 +22,66 @@ def handler(event, context):
 
 def update_list_main(event):
     try:
+        request = common_request.get_request(event)
         table_name = common.get_env_variable(os.environ, 'TABLE_NAME')
-        identity = common.get_identity(event, os.environ)
-        list_id = common.get_path_parameter(event, 'id')
+        identity = request.identity(os.environ)
+        list_id = request.path_parameter('id')
         attribute_details = get_attribute_details(event)
         common.confirm_owner(table_name, identity, list_id)
 
         items = get_items_to_update(table_name, list_id)
         updated_attributes = update_list(table_name, items, attribute_details)
+        common_table_ops.bump_list_version(table_name, list_id, identity)
+    except common_schema.ValidationError as e:
+        log.info("Request was not valid: {}".format(e))
+        return common.create_response(400, e.get_details())
     except Exception as e:
-        response = common.create_response(500, json.dumps({'error': str(e)}))
+        response = common.create_response(500, {'error': str(e)})
         return response
 
-    response = common.create_response(200, json.dumps(updated_attributes))
+    response = common.create_response(200, updated_attributes)
     return response
 
 
 def get_attribute_details(event):
-    if event['body'] == "null":
-        raise Exception('API Event Body was empty.')
-
-    try:
-        body = event['body']
-        log.info("Event body: " + json.dumps(body))
-    except Exception:
-        log.error("API Event was empty.")
-        raise Exception('API Event was empty.')
-
-    try:
-        update_attributes = json.loads(body)
-    except Exception:
-        log.error("API Event did not contain a valid body.")
-        raise Exception('API Event did not contain a valid body.')
-
-    expected_keys = ["title", "description", "eventDate", "occasion", "imageUrl"]
-
-    if list(update_attributes.keys()) != expected_keys:
-        log.error("Event body did not contain the expected keys " + str(expected_keys) + ".")
-        raise Exception("Event body did not contain the expected keys " + str(expected_keys) + ".")
-
-    return update_attributes
+    request = common_request.get_request(event)
+    return common_schema.validate_body(request, SCHEMA, 'API Event did not contain a valid body.')
 
 
 def get_items_to_update(table_name, list_id):
-    dynamodb = boto3.client('dynamodb')
     log.info("Querying table {} to find all items associated with list id {}".format(table_name, list_id))
 
+    query = common_table_ops.query_items(
+        table_name,
+        attributes=('PK', 'SK'),
+        KeyConditionExpression="PK = :PK",
+        ExpressionAttributeValues={":PK":  {'S': "LIST#{}".format(list_id)}}
+    )
+
+    count = 0
+    items = []
     try:
-        response = dynamodb.query(
-            TableName=table_name,
-            KeyConditionExpression="PK = :PK",
-            ExpressionAttributeValues={":PK":  {'S': "LIST#{}".format(list_id)}}
-        )
-        log.info("All items in query response. ({})".format(response['Items']))
+        for item in query:
+            count += 1
+            if item['SK']['S'].startswith("USER") or item['SK']['S'].startswith("SHARE") or item['SK']['S'].startswith("PENDING"):
+                log.info("Adding item to list of items to update: PK={}, SK={}".format(item['PK']['S'], item['SK']['S']))
+                items.append(item)
     except Exception as e:
         log.info("Exception: " + str(e))
         raise Exception("Unexpected error when getting lists from table.")
 
-    if len(response['Items']) == 0:
+    if count == 0:
         log.info("No items for the list {} were found.".format(list_id))
         raise Exception("No list exists with this ID.")
 
-    items = []
-    for item in response['Items']:
-        if item['SK']['S'].startswith("USER") or item['SK']['S'].startswith("SHARE") or item['SK']['S'].startswith("PENDING"):
-            log.info("Adding item to list of items to update: {}".format(item))
-            items.append(item)
-
     return items
 
 
 def update_list(table_name, items, new_attribute_values):
-    dynamodb = boto3.client('dynamodb')
+    dynamodb = common_clients.get_client('dynamodb')
     update_results = []
     for item in items:
-        log.info("Updating item with PK ({}), SK ({}) with attribute values: {}".format(item['PK']['S'], item['SK']['S'], json.dumps(new_attribute_values)))
+        logger.log_payload(log, "Updating item with PK ({}), SK ({}) with attribute values: {}", item['PK']['S'], item['SK']['S'], new_attribute_values)
 
         key = {
             'PK': {'S': item['PK']['S']},
@@ -118,7 +112,7 @@ def update_list(table_name, items, new_attribute_values):
             log.info("update item exception: " + str(e))
             raise Exception("Unexpected error when updating the list item.")
 
-        log.info("Attributes updated: " + json.dumps(response['Attributes']))
+        logger.log_payload(log, "Attributes updated: {}", response['Attributes'])
 
         updates = {}
         for attribute in response['Attributes']:
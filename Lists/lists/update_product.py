@@ -1,12 +1,17 @@
-import json
 import os
-import boto3
-from lists import common, logger
+from lists import common, common_clients, common_invocation, common_request, common_schema, common_table_ops, logger
 from botocore.exceptions import ClientError
 
 log = logger.setup_logger()
+common_clients.warm_up('dynamodb')
 
+SCHEMA = common_schema.compile_schema([
+    ('quantity', common_schema.integer(minimum=1)),
+    ('notes', common_schema.nullable(common_schema.string(allow_empty=True)), False)
+])
 
+
+@common_invocation.invocation_handler
 def handler(event, context):
     response = update_product_main(event)
     return response
@@ -14,22 +19,28 @@ def handler(event, context):
 
 def update_product_main(event):
     try:
+        request = common_request.get_request(event)
         table_name = common.get_env_variable(os.environ, 'TABLE_NAME')
-        identity = common.get_identity(event, os.environ)
-        list_id = common.get_path_parameter(event, 'id')
-        product_id = common.get_path_parameter(event, 'productid')
-        quantity = common.get_body_attribute(event, 'quantity')
-        notes = common.get_body_attribute_if_exists(event, 'notes')
+        identity = request.identity(os.environ)
+        list_id = request.path_parameter('id')
+        product_id = request.path_parameter('productid')
+        common_schema.validate_body(request, SCHEMA)
+        quantity = request.body_attribute('quantity')
+        notes = request.optional_body_attribute('notes')
         common.confirm_owner(table_name, identity, list_id)
 
         updates = update_product_item(table_name, list_id, product_id, quantity, notes)
+        common_table_ops.bump_list_version(table_name, list_id, identity)
+    except common_schema.ValidationError as e:
+        log.info("Request was not valid: {}".format(e))
+        return common.create_response(400, e.get_details())
     except Exception as e:
         log.error("Exception: {}".format(e))
-        response = common.create_response(500, json.dumps({'error': str(e)}))
+        response = common.create_response(500, {'error': str(e)})
         log.info("Returning response: {}".format(response))
         return response
 
-    response = common.create_response(200, json.dumps(updates))
+    response = common.create_response(200, updates)
     return response
 
 
@@ -54,7 +65,7 @@ def expression_attribute_values(quantity, notes):
 
 
 def update_product_item(table_name, list_id, product_id, quantity, notes):
-    dynamodb = boto3.client('dynamodb')
+    dynamodb = common_clients.get_client('dynamodb')
 
     key = {
         'PK': {'S': "LIST#{}".format(list_id)},
@@ -80,7 +91,7 @@ def update_product_item(table_name, list_id, product_id, quantity, notes):
         else:
             raise Exception('Unexpected error when updating product.')
 
-    log.info("Add response: {}".format(response))
+    logger.log_payload(log, "Add response: {}", response)
 
     updates = {}
     if 'quantity' in response['Attributes']:
@@ -1,54 +1,67 @@
-import json
 import os
-import boto3
-from lists import common, common_table_ops, logger
+from botocore.exceptions import ClientError
+from lists import common, common_clients, common_invocation, common_request, common_schema, common_table_ops, logger
 
 log = logger.setup_logger()
+common_clients.warm_up('dynamodb')
 
+MAX_ATTEMPTS = 3
 
+# The quantity is the new reserved quantity. Whether it can be reserved is checked against the reservation, not here.
+SCHEMA = common_schema.compile_schema([
+    ('quantity', common_schema.integer())
+])
+
+
+@common_invocation.invocation_handler
 def handler(event, context):
-    log.info("Path Parameters: {}".format(json.dumps(event['pathParameters'])))
-    log.info("Body attributes: {}".format(json.dumps(event['body'])))
+    logger.log_payload(log, "Path Parameters: {}", event['pathParameters'])
+    logger.log_payload(log, "Body attributes: {}", event['body'])
     response = update_reserve_main(event)
     return response
 
 
 def update_reserve_main(event):
     try:
+        request = common_request.get_request(event)
         table_name = common.get_env_variable(os.environ, 'TABLE_NAME')
         email_index = common.get_env_variable(os.environ, 'EMAIL_INDEX')
         resv_id_index = common.get_env_variable(os.environ, 'RESERVATIONID_INDEX')
-        resv_id = common.get_path_parameter(event, 'id')
-        request_reserve_quantity = common.get_body_attribute(event, 'quantity')
+        resv_id = request.path_parameter('id')
+        common_schema.validate_body(request, SCHEMA)
+        request_reserve_quantity = request.body_attribute('quantity')
 
         user = common.get_user(event, os.environ, table_name, email_index)
 
-        # Step 1 - get reserved item and product item.
+        # Step 1 - get reserved item.
         reservation_item = common_table_ops.get_reservation(table_name, resv_id_index, resv_id)
         common.confirm_reservation_owner(reservation_item, user['id'])
         common.gift_is_reserved(reservation_item)
 
         # Step 2 - Determine change to users reserved product quantity
         # (i.e. difference between requested quantity of user and current quantity reserved by user)
-        product_item = common_table_ops.get_product_item(table_name, reservation_item['listId'], reservation_item['productId'])
         quantity_change = calculate_difference_to_reserved_item_quantity(reservation_item, request_reserve_quantity)
 
-        # Step 3 - Calculate new reserved quantity of product
-        new_product_reserved_quantity = common.calculate_new_reserved_quantity(product_item, quantity_change)
+        # Step 3 - An increase must fit within the product quantity, so needs the product item. A decrease is guarded by the update.
+        product_item = None
+        if quantity_change > 0:
+            product_item = common_table_ops.get_product_item(table_name, reservation_item['listId'], reservation_item['productId'])
+            common.calculate_new_reserved_quantity(product_item, quantity_change)
 
-        # Step 4 - Update reserved details item and update product reserved quantities
-        product_key = common.create_product_key(reservation_item['listId'], reservation_item['productId'])
-        reservation_key = common.create_reservation_key(reservation_item)
-        update_product_and_reservation(table_name, product_key, reservation_key, new_product_reserved_quantity, request_reserve_quantity)
+        # Step 4 - Update reserved details item and add the change to the product reserved quantity
+        update_product_and_reservation(table_name, reservation_item, quantity_change, request_reserve_quantity, product_item)
 
+    except common_schema.ValidationError as e:
+        log.info("Request was not valid: {}".format(e))
+        return common.create_response(400, e.get_details())
     except Exception as e:
         log.error("Exception: {}".format(e))
-        response = common.create_response(500, json.dumps({'error': str(e)}))
+        response = common.create_response(500, {'error': str(e)})
         log.info("Returning response: {}".format(response))
         return response
 
     data = {'updated': True}
-    response = common.create_response(200, json.dumps(data))
+    response = common.create_response(200, data)
     return response
 
 
@@ -68,38 +81,46 @@ def calculate_difference_to_reserved_item_quantity(reserved_item, new_quantity):
     return difference
 
 
-def update_product_and_reservation(table_name, product_key, reservation_key, new_product_reserved_quantity, request_reserve_quantity):
-    dynamodb = boto3.client('dynamodb')
-
-    try:
-        response = dynamodb.transact_write_items(
-            TransactItems=[
-                {
-                    'Update': {
-                        'TableName': table_name,
-                        'Key': product_key,
-                        'UpdateExpression': "set reserved = :r",
-                        'ExpressionAttributeValues': {
-                            ':r': {'N': str(new_product_reserved_quantity)},
+def update_product_and_reservation(table_name, reservation_item, quantity_change, request_reserve_quantity, product_item=None):
+    dynamodb = common_clients.get_client('dynamodb')
+    product_key = common.create_product_key(reservation_item['listId'], reservation_item['productId'])
+    reservation_key = common.create_reservation_key(reservation_item)
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            response = dynamodb.transact_write_items(
+                TransactItems=[
+                    common.create_product_quantity_update(table_name, product_key, quantity_change, product_item=product_item),
+                    {
+                        'Update': {
+                            'TableName': table_name,
+                            'Key': reservation_key,
+                            'UpdateExpression': "set quantity = :q",
+                            'ConditionExpression': "#st = :reserved AND quantity = :current",
+                            'ExpressionAttributeValues': {
+                                ':q': {'N': str(request_reserve_quantity)},
+                                ':reserved': {'S': 'reserved'},
+                                ':current': {'N': str(reservation_item['quantity'])}
+                            },
+                            'ExpressionAttributeNames': {
+                                '#st': 'state'
+                            }
                         }
-                    }
-                },
-                {
-                    'Update': {
-                        'TableName': table_name,
-                        'Key': reservation_key,
-                        'UpdateExpression': "set quantity = :q",
-                        'ExpressionAttributeValues': {
-                            ':q': {'N': str(request_reserve_quantity)},
-                        }
-                    }
-                }
-            ]
-        )
-
-        log.info("Attributes updated: " + json.dumps(response))
-    except Exception as e:
-        log.info("Transaction write exception: " + str(e))
-        raise Exception("Unexpected error when unreserving product.")
-
-    return True
+                    },
+                    common_table_ops.create_list_version_update(table_name, reservation_item['listId'], reservation_item['listOwnerId'])
+                ]
+            )
+
+            logger.log_payload(log, "Attributes updated: {}", response)
+            return True
+        except ClientError as e:
+            log.info("Transaction write exception (attempt {}): {}".format(attempt, e))
+            product_item = common.check_cancelled_reservation_transaction(e, table_name, reservation_item, quantity_change)
+            # Only an increase was guarded against the product item that was read, so only it can be retried against the latest.
+            if product_item is None or quantity_change < 0 or common_table_ops.transaction_condition_failed(e, 1):
+                raise Exception("Unexpected error when unreserving product.")
+        except Exception as e:
+            log.info("Transaction write exception: " + str(e))
+            raise Exception("Unexpected error when unreserving product.")
+
+    raise Exception("Unexpected error when unreserving product.")
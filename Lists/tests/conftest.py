@@ -4,6 +4,18 @@ import pytest
 import boto3
 import uuid
 from moto import mock_dynamodb2, mock_cognitoidp
+from lists import common_clients, common_kpi, common_request, common_table_ops, logger
+
+
+@pytest.fixture(autouse=True)
+def reset_clients():
+    common_clients.reset()
+    common_table_ops.clear_memo()
+    common_kpi.reset()
+    common_request.reset()
+    yield
+    common_table_ops.clear_memo()
+    logger.sample_request(1)
 
 
 @pytest.fixture
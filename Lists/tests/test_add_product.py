@@ -3,7 +3,7 @@ import os
 import re
 import json
 import boto3
-from lists import add_product, logger
+from lists import add_product, common_table_ops, logger
 
 log = logger.setup_test_logger()
 
@@ -83,6 +83,8 @@ class TestCreateProductMain:
         response = add_product.add_product_main(api_add_product_event)
         body = json.loads(response['body'])
         assert body['message'], "Add product main response did not contain the correct status."
+        common_table_ops.clear_memo()
+        assert common_table_ops.get_list_version('lists-unittest', '12345678-list-0001-1234-abcdefghijkl', '12345678-user-0001-1234-abcdefghijkl') == 1, "List version was not updated."
 
     def test_add_product_with_notes(self, api_add_product_event, monkeypatch, dynamodb_mock):
         monkeypatch.setitem(os.environ, 'TABLE_NAME', 'lists-unittest')
@@ -101,15 +103,18 @@ class TestCreateProductMain:
         monkeypatch.setitem(os.environ, 'TABLE_NAME', 'lists-unittest')
         api_add_product_event['body'] = '{\n    \"quantity\": 1,\n    \"productType\": \"wrong\"\n}'
         response = add_product.add_product_main(api_add_product_event)
+        assert response['statusCode'] == 400, "Status code was not as expected."
         body = json.loads(response['body'])
-        assert body['error'] == "API Event did not contain a product type of products or notfound.", "Error not as expected."
+        assert body['error'] == "Request body was not valid.", "Error not as expected."
+        assert body['errors'] == [{'field': 'productType', 'error': 'must be one of products, notfound'}], "Field errors not as expected."
 
     def test_create_product_with_no_quantity(self, api_add_product_event, monkeypatch, dynamodb_mock):
         monkeypatch.setitem(os.environ, 'TABLE_NAME', 'lists-unittest')
         api_add_product_event['body'] = '{\n    \"productType\": \"products\"\n}'
         response = add_product.add_product_main(api_add_product_event)
+        assert response['statusCode'] == 400, "Status code was not as expected."
         body = json.loads(response['body'])
-        assert body['error'] == "API Event did not contain a quantity body attribute.", "Error not as expected."
+        assert body['errors'] == [{'field': 'quantity', 'error': 'is required'}], "Field errors not as expected."
 
     def test_create_product_with_not_owner(self, api_add_product_event, monkeypatch, dynamodb_mock):
         monkeypatch.setitem(os.environ, 'TABLE_NAME', 'lists-unittest')
@@ -145,4 +150,4 @@ def test_handler(api_add_product_event, monkeypatch, dynamodb_mock):
     response = add_product.handler(api_add_product_event, None)
     assert response['statusCode'] == 200, "Response statusCode was not as expected."
     assert response['headers'] == {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}, "Response headers were not as expected."
-    assert re.match('{"message": .*}', response['body']), "Response body was not as expected."
+    assert re.match('{"message": ?.*}', response['body']), "Response body was not as expected."
@@ -1,6 +1,6 @@
 import os
 import json
-from lists import close, logger
+from lists import close, common_table_ops, logger
 
 log = logger.setup_test_logger()
 
@@ -10,6 +10,7 @@ class TestUpdateList:
         user_id = '12345678-user-0001-1234-abcdefghijkl'
         list_id = '12345678-list-0001-1234-abcdefghijkl'
         assert close.update_list('lists-unittest', user_id, list_id)
+        assert common_table_ops.get_list_version('lists-unittest', list_id, user_id) == 1, "List version was not updated."
 
     def test_update_list_already_closed(self, dynamodb_mock):
         user_id = '12345678-user-0001-1234-abcdefghijkl'
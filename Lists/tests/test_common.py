@@ -1,8 +1,7 @@
+import json
 import pytest
 import os
 from lists import common, logger
-from moto import mock_ses
-import boto3
 
 log = logger.setup_test_logger()
 
@@ -38,6 +37,11 @@ def test_create_response():
     assert response == expected_response, "Create_response did not return the expected response value."
 
 
+def test_create_response_with_object():
+    response = common.create_response(200, {'message': 'Success message'})
+    assert json.loads(response['body']) == {'message': 'Success message'}, "Response body was not as expected."
+
+
 class TestGetEnvironmentVariable:
     def test_get_variable(self, monkeypatch):
         monkeypatch.setitem(os.environ, 'TABLE_NAME', 'lists-test')
@@ -150,6 +154,23 @@ class TestConfirmOwner:
         assert str(e.value) == "List 12345678-list-9999-1234-abcdefghijkl does not exist.", "Exception not thrown for list not being owned by user."
 
 
+class TestConfirmListOwner:
+    def test_confirm_list_owner(self):
+        list_details = {'listId': '12345678-list-0001-1234-abcdefghijkl', 'listOwner': '12345678-user-0001-1234-abcdefghijkl'}
+        assert common.confirm_list_owner(list_details, '12345678-user-0001-1234-abcdefghijkl', '12345678-list-0001-1234-abcdefghijkl')
+
+    def test_confirm_not_list_owner(self):
+        list_details = {'listId': '12345678-list-0001-1234-abcdefghijkl', 'listOwner': '12345678-user-0001-1234-abcdefghijkl'}
+        with pytest.raises(Exception) as e:
+            common.confirm_list_owner(list_details, '12345678-user-0002-1234-abcdefghijkl', '12345678-list-0001-1234-abcdefghijkl')
+        assert str(e.value) == "User 12345678-user-0002-1234-abcdefghijkl was not owner of List 12345678-list-0001-1234-abcdefghijkl.", "Exception not as expected."
+
+    def test_no_list_owner_item(self):
+        with pytest.raises(Exception) as e:
+            common.confirm_list_owner(None, '12345678-user-0002-1234-abcdefghijkl', '12345678-list-0001-1234-abcdefghijkl')
+        assert str(e.value) == "User 12345678-user-0002-1234-abcdefghijkl was not owner of List 12345678-list-0001-1234-abcdefghijkl.", "Exception not as expected."
+
+
 class TestConfirmReservationOwner:
     def test_confirm_reservation_owner(self, reservation_item):
         assert common.confirm_reservation_owner(reservation_item, '12345678-user-0001-1234-abcdefghijkl')
@@ -203,22 +224,23 @@ class TestCalculateNewReservedQuantity:
         assert str(e.value) == "Reserved quantity for product (1) could not be updated by 2 as exceeds required quantity (3).", "Exception message not correct."
 
 
-@mock_ses
-class TestSendEmail:
-    def test_send_email(self):
-        ses = boto3.client('ses', region_name='eu-west-1')
-        ses.verify_email_identity(EmailAddress="contact@ewelists.com")
+class TestCreateProductQuantityUpdate:
+    def test_reduce_reserved(self):
+        update = common.create_product_quantity_update('lists-unittest', {}, -2)['Update']
+        assert update['UpdateExpression'] == "ADD reserved :r", "Update expression was not as expected."
+        assert update['ConditionExpression'] == "attribute_exists(PK) AND reserved >= :min_reserved", "Condition was not as expected."
+        assert update['ExpressionAttributeValues'] == {':r': {'N': '-2'}, ':min_reserved': {'N': '2'}}, "Values were not as expected."
 
-        ses.create_template(
-            Template={
-                'TemplateName': 'reserve-template',
-                'SubjectPart': 'string',
-                'TextPart': 'string',
-                'HtmlPart': 'string'
-            }
-        )
+    def test_move_reserved_to_purchased(self):
+        update = common.create_product_quantity_update('lists-unittest', {}, -1, purchased_change=1)['Update']
+        assert update['UpdateExpression'] == "ADD reserved :r, purchased :p", "Update expression was not as expected."
+        assert update['ConditionExpression'] == "attribute_exists(PK) AND reserved >= :min_reserved", "Condition was not as expected."
 
-        assert common.send_email('eweuser8@gmail.com', 'Ewe User8', 'reserve-template')
+    def test_add_reserved(self):
+        product_item = {'productId': '12345678-prod-0001-1234-abcdefghijkl', 'quantity': 3, 'reserved': 1, 'purchased': 1, 'type': 'products'}
+        update = common.create_product_quantity_update('lists-unittest', {}, 1, product_item=product_item)['Update']
+        assert update['ConditionExpression'] == "attribute_exists(PK) AND quantity = :quantity AND purchased = :purchased AND reserved <= :max_reserved", "Condition was not as expected."
+        assert update['ExpressionAttributeValues'][':max_reserved'] == {'N': '1'}, "Maximum reserved quantity was not as expected."
 
 
 class TestGetUser:
@@ -0,0 +1,51 @@
+import pytest
+from lists import common_assembler, logger
+
+log = logger.setup_test_logger()
+
+
+def reservation_item(product, user, reservation, state):
+    return {
+        "PK": {"S": "LIST#12345678-list-0001-1234-abcdefghijkl"},
+        "SK": {"S": "RESERVATION#{}#{}#{}".format(product, user, reservation)},
+        "reservationId": {"S": reservation}, "listId": {"S": "12345678-list-0001-1234-abcdefghijkl"},
+        "listOwnerId": {"S": "12345678-user-0001-1234-abcdefghijkl"}, "listTitle": {"S": "Child User1 1st Birthday"},
+        "name": {"S": "Test User"}, "email": {"S": "test.user@gmail.com"}, "productId": {"S": product},
+        "productType": {"S": "products"}, "userId": {"S": user}, "quantity": {"N": "1"}, "state": {"S": state}
+    }
+
+
+@pytest.fixture()
+def list_items():
+    return [
+        {'PK': {'S': 'LIST#12345678-list-0001-1234-abcdefghijkl'}, 'SK': {'S': 'USER#12345678-user-0001-1234-abcdefghijkl'}, 'title': {'S': "Child User1 1st Birthday"}, 'occasion': {'S': 'Birthday'}, 'listId': {'S': '12345678-list-0001-1234-abcdefghijkl'}, 'description': {'S': 'A gift list for Child User1 birthday.'}, 'imageUrl': {'S': '/images/celebration-default.jpg'}, 'state': {'S': 'open'}, 'version': {'N': '2'}},
+        {'PK': {'S': 'LIST#12345678-list-0001-1234-abcdefghijkl'}, 'SK': {'S': 'SHARE#test.user2@gmail.com'}},
+        {"PK": {"S": "LIST#12345678-list-0001-1234-abcdefghijkl"}, "SK": {"S": "PRODUCT#prod1"}, "quantity": {"N": "3"}, "reserved": {"N": "2"}, "purchased": {"N": "0"}, "type": {"S": "products"}},
+        reservation_item('prod1', 'user2', 'resv1', 'reserved'),
+        reservation_item('prod1', 'user2', 'resv2', 'cancelled'),
+        reservation_item('prod1', 'user2', 'resv3', 'reserved'),
+        reservation_item('prod1', 'user3', 'resv4', 'purchased')
+    ]
+
+
+class TestAssembleList:
+    def test_assemble_list(self, list_items):
+        list_object = common_assembler.assemble_list(list_items)
+        assert list_object['list']['listOwner'] == '12345678-user-0001-1234-abcdefghijkl', "List was not as expected."
+        assert list(list_object['products'].keys()) == ['prod1'], "Products were not as expected."
+        assert [r['reservationId'] for r in list_object['reserved']] == ['resv1', 'resv3', 'resv4'], "Reserved items were not as expected."
+
+    def test_assemble_list_with_reserved_grouped(self, list_items):
+        reserved = common_assembler.assemble_list(list_items, group_reserved=True)['reserved']
+        assert list(reserved.keys()) == ['prod1'], "Reserved products were not as expected."
+        assert [r['reservationId'] for r in reserved['prod1']['user2']] == ['resv1', 'resv3'], "Reserved items were not as expected."
+        assert [r['reservationId'] for r in reserved['prod1']['user3']] == ['resv4'], "Reserved items were not as expected."
+
+    def test_list_item_is_kept(self, list_items):
+        list_item = {}
+        common_assembler.assemble_list(iter(list_items), list_item=list_item)
+        assert list_item['item']['version'] == {'N': '2'}, "List item was not kept."
+
+    def test_assemble_list_with_no_items(self):
+        assert common_assembler.assemble_list([]) == {"list": None, "products": {}, "reserved": []}, "List object was not as expected."
+        assert common_assembler.assemble_list([], group_reserved=True) == {"list": None, "products": {}, "reserved": {}}, "List object was not as expected."
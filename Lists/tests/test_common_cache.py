@@ -0,0 +1,40 @@
+import mock
+from lists import common_cache, logger
+
+log = logger.setup_test_logger()
+
+
+class TestLRUCache:
+    def test_get_and_put(self):
+        cache = common_cache.LRUCache(2, 60)
+        assert cache.get('a') is None, "Empty cache should not return a value."
+        cache.put('a', 1)
+        assert cache.get('a') == 1, "Value was not as expected."
+        assert cache.hits == 1 and cache.misses == 1, "Cache stats were not as expected."
+
+    def test_least_recently_used_is_evicted(self):
+        cache = common_cache.LRUCache(2, 60)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        assert len(cache) == 2, "Cache was not bounded."
+        assert cache.get('b') is None, "Least recently used entry was not evicted."
+        assert cache.get('a') == 1 and cache.get('c') == 3, "Recently used entries were evicted."
+
+    def test_entries_expire(self):
+        cache = common_cache.LRUCache(2, 60)
+        with mock.patch("lists.common_cache.time.monotonic", return_value=1000):
+            cache.put('a', 1)
+        with mock.patch("lists.common_cache.time.monotonic", return_value=1061):
+            assert cache.get('a') is None, "Expired entry was returned."
+        assert len(cache) == 0, "Expired entry was not removed."
+
+    def test_invalidate_and_clear(self):
+        cache = common_cache.LRUCache(2, 60)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.invalidate('a')
+        assert cache.get('a') is None, "Invalidated entry was returned."
+        cache.clear()
+        assert len(cache) == 0, "Cache was not cleared."
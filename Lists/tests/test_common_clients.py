@@ -0,0 +1,61 @@
+from lists import common_clients, logger
+
+log = logger.setup_test_logger()
+
+
+class TestGetClient:
+    def test_client_is_reused(self):
+        client = common_clients.get_client('dynamodb')
+        assert common_clients.get_client('dynamodb') is client, "Client was not reused."
+
+    def test_client_config(self):
+        client = common_clients.get_client('dynamodb')
+        assert client.meta.config.connect_timeout == 0.5
+        assert client.meta.config.read_timeout == 1
+        assert client.meta.config.retries['mode'] == 'standard'
+        assert client.meta.config.retries['total_max_attempts'] == 2
+
+    def test_ses_client_region(self):
+        client = common_clients.get_client('ses')
+        assert client.meta.region_name == 'eu-west-1', "SES client region was not as expected."
+
+
+class TestWarmUp:
+    def test_warm_up(self):
+        assert common_clients.warm_up('dynamodb', 'ses')
+        assert set(common_clients._clients.keys()) == {'dynamodb', 'ses'}
+
+    def test_warm_up_with_unknown_service(self):
+        assert common_clients.warm_up('not-a-service')
+        assert 'not-a-service' not in common_clients._clients
+
+
+class TestPrime:
+    def test_prime_outside_lambda(self):
+        common_clients.get_client('dynamodb')
+        assert common_clients.prime() == [], "Connections should only be primed in lambda."
+
+    def test_prime_created_clients(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(common_clients, 'IN_LAMBDA', True)
+        monkeypatch.setitem(common_clients.PRIMERS, 'dynamodb', lambda client: calls.append(client))
+        client = common_clients.get_client('dynamodb')
+        common_clients.get_client('cognito-idp')
+
+        assert common_clients.prime() == ['dynamodb'], "Primed services were not as expected."
+        assert calls == [client], "Client was not primed."
+
+    def test_prime_error_is_ignored(self, monkeypatch):
+        def fail(client):
+            raise Exception("User is not authorized to perform: dynamodb:DescribeLimits")
+
+        monkeypatch.setattr(common_clients, 'IN_LAMBDA', True)
+        monkeypatch.setitem(common_clients.PRIMERS, 'dynamodb', fail)
+        assert common_clients.warm_up('dynamodb'), "Warm up should not fail."
+        assert common_clients.prime('dynamodb') == ['dynamodb'], "Primed services were not as expected."
+
+
+def test_reset():
+    client = common_clients.get_client('dynamodb')
+    common_clients.reset()
+    assert common_clients.get_client('dynamodb') is not client, "Client was not recreated after reset."
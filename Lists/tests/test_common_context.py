@@ -0,0 +1,112 @@
+import json
+import pytest
+from lists import common_clients, common_context, logger
+
+log = logger.setup_test_logger()
+
+
+@pytest.fixture(autouse=True)
+def finish_context():
+    yield
+    common_context._current['context'] = None
+
+
+def summary_lines(out):
+    return [json.loads(line) for line in out.splitlines() if line.startswith('{"type": "invocation"')]
+
+
+class TestGetRoute:
+    def test_get_route_of_api_event(self, api_gateway_get_list_event):
+        assert common_context.get_route(api_gateway_get_list_event) == "GET /lists/{id}", "Route was not as expected."
+
+    def test_get_route_of_cognito_trigger(self, signup_social_event):
+        assert common_context.get_route(signup_social_event) == "PreSignUp_ExternalProvider", "Route was not as expected."
+
+    def test_get_route_of_other_event(self):
+        assert common_context.get_route({}) is None, "Route was not as expected."
+        assert common_context.get_route(None) is None, "Route was not as expected."
+
+
+class TestGetIdentityType:
+    def test_get_identity_type_of_cognito_user(self, api_gateway_get_list_event):
+        assert common_context.get_identity_type(api_gateway_get_list_event) == 'cognito', "Identity type was not as expected."
+
+    def test_get_identity_type_of_postman_user(self, api_postman_event):
+        assert common_context.get_identity_type(api_postman_event) == 'postman', "Identity type was not as expected."
+
+    def test_get_identity_type_of_unauthenticated_user(self, api_get_shared_list_unauthed_event):
+        assert common_context.get_identity_type(api_get_shared_list_unauthed_event) == 'unauthenticated', "Identity type was not as expected."
+
+    def test_get_identity_type_of_cognito_trigger(self, signup_social_event):
+        assert common_context.get_identity_type(signup_social_event) is None, "Identity type was not as expected."
+
+
+class TestContext:
+    def test_nothing_is_recorded_outside_of_an_invocation(self):
+        assert not common_context.record_call('dynamodb', 'Query', 0.01), "Call should not have been recorded."
+        assert not common_context.count('memoHits'), "Count should not have been recorded."
+        assert not common_context.annotate(listCache='hit'), "Annotation should not have been recorded."
+        assert common_context.finish() is None, "Summary should not have been returned."
+
+    def test_summary_of_successful_invocation(self, api_gateway_get_list_event):
+        common_context.start('lists.get_list', api_gateway_get_list_event)
+        common_context.record_call('dynamodb', 'Query', 0.012, items=14)
+        common_context.count('memoHits')
+        common_context.count('memoHits', 2)
+        common_context.annotate(listCache='miss')
+
+        summary = common_context.current().summary({'statusCode': 200, 'body': '{}'})
+        assert summary['function'] == 'lists.get_list', "Function was not as expected."
+        assert summary['route'] == "GET /lists/{id}", "Route was not as expected."
+        assert summary['identityType'] == 'cognito', "Identity type was not as expected."
+        assert summary['calls'] == [{'service': 'dynamodb', 'operation': 'Query', 'durationMs': 12.0, 'items': 14}], "Calls were not as expected."
+        assert summary['awsMs'] == 12.0, "AWS duration was not as expected."
+        assert summary['counts'] == {'memoHits': 3}, "Counts were not as expected."
+        assert summary['listCache'] == 'miss', "Annotation was not as expected."
+        assert summary['statusCode'] == 200, "Status code was not as expected."
+        assert summary['outcome'] == 'success', "Outcome was not as expected."
+
+    def test_summary_of_error_response(self, api_gateway_get_list_event):
+        common_context.start('lists.get_list', api_gateway_get_list_event)
+        summary = common_context.current().summary({'statusCode': 404, 'body': '{"error": "List does not exist."}'})
+        assert summary['outcome'] == 'error', "Outcome was not as expected."
+        assert summary['error'] == "List does not exist.", "Error was not as expected."
+
+    def test_summary_of_exception(self, api_gateway_get_list_event):
+        common_context.start('lists.get_list', api_gateway_get_list_event)
+        summary = common_context.current().summary(error=Exception("Handler failed."))
+        assert summary['outcome'] == 'exception', "Outcome was not as expected."
+        assert summary['error'] == "Handler failed.", "Error was not as expected."
+
+    def test_finish_writes_one_summary_line(self, api_gateway_get_list_event, capsys):
+        common_context.start('lists.get_list', api_gateway_get_list_event)
+        summary = common_context.finish({'statusCode': 200, 'body': '{}'})
+
+        assert summary_lines(capsys.readouterr().out) == [summary], "Summary line was not as expected."
+        assert common_context.current() is None, "Context was not ended."
+
+
+class TestInstrument:
+    def test_calls_are_recorded(self, dynamodb_mock, api_gateway_get_list_event):
+        client = common_clients.get_client('dynamodb')
+        common_context.start('lists.get_list', api_gateway_get_list_event)
+        client.query(
+            TableName='lists-unittest',
+            KeyConditionExpression="PK = :PK",
+            ExpressionAttributeValues={":PK": {'S': "LIST#12345678-list-0001-1234-abcdefghijkl"}}
+        )
+        client.get_item(
+            TableName='lists-unittest',
+            Key={'PK': {'S': "USER#12345678-user-0001-1234-abcdefghijkl"}, 'SK': {'S': "USER#12345678-user-0001-1234-abcdefghijkl"}}
+        )
+
+        calls = common_context.current().calls
+        assert [(call['service'], call['operation']) for call in calls] == [('dynamodb', 'Query'), ('dynamodb', 'GetItem')], "Calls were not as expected."
+        assert calls[0]['items'] > 1, "Query item count was not recorded."
+        assert calls[1]['items'] == 1, "GetItem item count was not recorded."
+
+    def test_count_items(self):
+        assert common_context.count_items({'Count': 3, 'Items': []}) == 3, "Item count was not as expected."
+        assert common_context.count_items({'Items': [{}, {}]}) == 2, "Item count was not as expected."
+        assert common_context.count_items({'Item': {}}) == 1, "Item count was not as expected."
+        assert common_context.count_items({}) is None, "Item count was not as expected."
@@ -0,0 +1,42 @@
+import json
+import os
+import pytest
+from lists import common_encoder, logger
+
+log = logger.setup_test_logger()
+
+
+@pytest.fixture(autouse=True)
+def restore_encoder():
+    encoder = common_encoder.encoder
+    yield
+    common_encoder.encoder = encoder
+
+
+@pytest.mark.parametrize("name", sorted(common_encoder.ENCODERS))
+def test_encoders_agree(name):
+    obj = {'list': {'title': 'Child User1 1st Birthday', 'brand': 'BABYBJÖRN'}, 'products': {'prod1': {'quantity': 3}}, 'reserved': [], 'closed': None}
+    assert json.loads(common_encoder.get_encoder(name)(obj)) == obj, "Decoded object was not as expected."
+
+
+def test_object_with_non_string_keys():
+    assert json.loads(common_encoder.dumps({1: 'a'})) == {'1': 'a'}, "Decoded object was not as expected."
+
+
+def test_default_encoder():
+    expected = 'orjson' if common_encoder.orjson is not None else 'json'
+    assert common_encoder.get_encoder() is common_encoder.ENCODERS[expected], "Default encoder was not as expected."
+
+
+def test_encoder_from_environment(monkeypatch):
+    monkeypatch.setitem(os.environ, 'JSON_ENCODER', 'json')
+    assert common_encoder.get_encoder() is common_encoder.encode_json, "Encoder was not as expected."
+
+
+def test_unknown_encoder():
+    assert common_encoder.get_encoder('not-an-encoder') is common_encoder.encode_json, "Encoder was not as expected."
+
+
+def test_set_encoder():
+    common_encoder.set_encoder('json')
+    assert common_encoder.dumps({'a': 1}) == '{"a": 1}', "Encoded object was not as expected."
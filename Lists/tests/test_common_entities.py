@@ -1,4 +1,5 @@
-from lists.common_entities import User, List, Product, Reservation
+import pytest
+from lists.common_entities import User, List, Product, Reservation, compile_plan, decode_item, STRING
 from lists import logger
 
 log = logger.setup_test_logger()
@@ -21,6 +22,13 @@ class TestUser:
         assert user['email'] == 'test.user2@gmail.com', "User email was not test.user2@gmail.com."
         assert user['userId'] == '12345678-user-0002-1234-abcdefghijkl', "User ID was not correct."
 
+    def test_get_basic_details_from_projected_item(self):
+        user_item = {'PK': {'S': 'USER#12345678-user-0001-1234-abcdefghijkl'}, 'SK': {'S': 'USER#12345678-user-0001-1234-abcdefghijkl'}, 'email': {'S': 'test.user1@gmail.com'}, 'name': {'S': 'Test User1'}, 'userId': {'S': '12345678-user-0001-1234-abcdefghijkl'}}
+        assert set(user_item.keys()) == set(User.ATTRIBUTES), "Item did not have the user attributes."
+
+        user = User(user_item).get_basic_details()
+        assert user['userId'] == '12345678-user-0001-1234-abcdefghijkl', "User ID was not correct."
+
 
 class TestList:
     def test_get_details(self):
@@ -78,6 +86,14 @@ class TestProduct:
         assert product['type'] == 'products', "Product reserved type was not correct."
         assert product['notes'] == 'I would like size small', "Product notes were not correct."
 
+    def test_decode_is_same_as_details(self):
+        product_item = {"PK": {"S": "LIST#12345678-list-0001-1234-abcdefghijkl"}, "SK": {"S": "PRODUCT#12345678-prod-0001-1234-abcdefghijkl"}, "quantity": {"N": "2"}, "reserved": {"N": "1"}, "purchased": {"N": "0"}, "type": {"S": "products"}}
+        assert Product.decode(product_item) == Product(product_item).get_details(), "Decoded product was not as expected."
+
+    def test_product_has_no_dict(self):
+        product_item = {"PK": {"S": "LIST#12345678-list-0001-1234-abcdefghijkl"}, "SK": {"S": "PRODUCT#12345678-prod-0001-1234-abcdefghijkl"}, "quantity": {"N": "2"}, "reserved": {"N": "1"}, "purchased": {"N": "0"}, "type": {"S": "products"}}
+        assert not hasattr(Product(product_item), '__dict__'), "Product should only have slots."
+
 
 class TestReservation:
     def test_get_details(self):
@@ -109,3 +125,22 @@ class TestReservation:
         assert reservation['state'] == 'reserved', "Attribute was not correct."
         assert reservation['listTitle'] == 'Child User1 1st Birthday', "Attribute was not correct."
         assert reservation['productType'] == 'products', "Attribute was not correct."
+
+
+class TestDecoder:
+    def test_compile_plan(self):
+        plan = compile_plan((('title', 'title', STRING), ('notes', 'notes', STRING, False)))
+        assert plan == (('title', 'title', STRING, True), ('notes', 'notes', STRING, False)), "Plan was not as expected."
+
+    def test_decode_item_with_missing_optional_attribute(self):
+        plan = compile_plan((('title', 'title', STRING), ('notes', 'notes', STRING, False)))
+        assert decode_item(plan, {'title': {'S': 'A title'}}) == {'title': 'A title'}, "Details were not as expected."
+
+    def test_decode_item_with_missing_required_attribute(self):
+        plan = compile_plan((('title', 'title', STRING),))
+        with pytest.raises(Exception) as e:
+            decode_item(plan, {})
+        assert str(e.value) == "Item did not have a title attribute.", "Exception message not correct."
+
+    def test_entity_attributes(self):
+        assert List.ATTRIBUTES == ('PK', 'SK', 'listId', 'title', 'description', 'occasion', 'imageUrl', 'state', 'eventDate'), "Attributes were not as expected."
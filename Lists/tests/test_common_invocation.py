@@ -0,0 +1,72 @@
+import json
+import pytest
+from lists import common_clients, common_invocation, common_kpi, common_table_ops, logger
+
+log = logger.setup_test_logger()
+
+
+@common_invocation.invocation_handler
+def handler(event, context):
+    common_table_ops.memo_put(('item', 'lists-unittest', 'LIST#1', 'USER#1', '{}'), {'Item': {}})
+    if event.get('fail'):
+        raise Exception("Handler failed.")
+
+    return {'statusCode': 200}
+
+
+class TestInvocationHandler:
+    def test_memo_is_cleared(self):
+        assert handler({}, None) == {'statusCode': 200}, "Handler response was not returned."
+        assert common_table_ops._memo == {}, "Memo was not cleared."
+
+    def test_memo_is_cleared_when_handler_raises(self):
+        with pytest.raises(Exception) as e:
+            handler({'fail': True}, None)
+        assert str(e.value) == "Handler failed.", "Exception not as expected."
+        assert common_table_ops._memo == {}, "Memo was not cleared."
+
+    def test_handler_name_is_kept(self):
+        assert handler.__name__ == 'handler', "Handler name was not as expected."
+
+    def test_request_is_sampled(self, monkeypatch):
+        monkeypatch.setattr(logger, 'PAYLOAD_SAMPLE_RATE', 0)
+        handler({}, None)
+        assert not logger.is_sampled(), "Request should not have been sampled."
+
+    def test_one_summary_line_is_written(self, capsys):
+        handler({}, None)
+        lines = [line for line in capsys.readouterr().out.splitlines() if line.startswith('{"type": "invocation"')]
+        assert len(lines) == 1, "One summary line was not written."
+        assert json.loads(lines[0])['outcome'] == 'success', "Outcome was not as expected."
+
+    def test_summary_line_is_written_when_handler_raises(self, capsys):
+        with pytest.raises(Exception):
+            handler({'fail': True}, None)
+        lines = [line for line in capsys.readouterr().out.splitlines() if line.startswith('{"type": "invocation"')]
+        assert json.loads(lines[0])['outcome'] == 'exception', "Outcome was not as expected."
+
+    def test_summary_line_has_kpi_buffer_stats(self, capsys, requests_mock):
+        requests_mock.post('https://app.cyfe.com/api/push/12345', status_code=500)
+        common_kpi.enqueue('https://app.cyfe.com/api/push/12345', 'Reserved', '20200506', '#2A8C82', 'area')
+        handler({}, None)
+        lines = [line for line in capsys.readouterr().out.splitlines() if line.startswith('{"type": "invocation"')]
+        summary = json.loads(lines[0])
+        assert summary['kpiBuffered'] == 1 and summary['kpiDropped'] == 0, "KPI buffer stats were not as expected."
+
+
+class TestWarmUp:
+    def test_warm_up_event_is_not_handled(self, capsys):
+        response = handler({'source': 'ewelists.warmup', 'fail': True}, None)
+        assert response == {'warmedUp': True, 'primed': []}, "Warm-up response was not as expected."
+        assert '{"type": "invocation"' not in capsys.readouterr().out, "Warm-up should not write a summary line."
+
+    def test_warm_up_primes_clients(self, monkeypatch):
+        monkeypatch.setattr(common_clients, 'IN_LAMBDA', True)
+        monkeypatch.setitem(common_clients.PRIMERS, 'dynamodb', lambda client: None)
+        common_clients.get_client('dynamodb')
+        assert handler({'source': 'ewelists.warmup'}, None)['primed'] == ['dynamodb'], "Clients were not primed."
+
+    def test_is_warm_up(self):
+        assert common_invocation.is_warm_up({'source': 'ewelists.warmup'}), "Warm-up event was not recognised."
+        assert not common_invocation.is_warm_up({'source': 'aws.events'}), "Scheduled event was a warm-up event."
+        assert not common_invocation.is_warm_up([]), "List was a warm-up event."
@@ -1,5 +1,5 @@
 import os
-from lists import common_kpi, logger
+from lists import common_invocation, common_kpi, logger
 
 log = logger.setup_test_logger()
 
@@ -12,15 +12,19 @@ class TestPost:
     def test_successful_post(self, monkeypatch, api_create_event, requests_mock):
         requests_mock.post('https://app.cyfe.com/api/push/5eb26ce43ea308704280926221234', text='{"status": "ok", "message": "Data pushed"}')
         monkeypatch.setitem(os.environ, 'KPI_URL', 'https://app.cyfe.com/api/push/5eb26ce43ea308704280926221234')
-        assert common_kpi.post(os.environ, api_create_event, 'New Lists'), "Post to cyfe failed."
+        assert common_kpi.post(os.environ, api_create_event, 'New Lists'), "KPI event was not buffered."
+        assert common_kpi.flush() == 1, "Post to cyfe failed."
 
     def test_no_url(self, monkeypatch, api_create_event):
         monkeypatch.setitem(os.environ, 'TEST', 'blah')
         assert not common_kpi.post(os.environ, api_create_event, 'New Lists'), "No post was made."
 
-    def test_bad_url(self, monkeypatch, api_create_event):
+    def test_bad_url(self, monkeypatch, api_create_event, requests_mock):
+        requests_mock.post('https://app.cyfe.com/api/push/12345', status_code=404, text='Not Found')
         monkeypatch.setitem(os.environ, 'KPI_URL', 'https://app.cyfe.com/api/push/12345')
-        assert not common_kpi.post(os.environ, api_create_event, 'New Lists'), "Post to cyfe failed."
+        assert common_kpi.post(os.environ, api_create_event, 'New Lists'), "KPI event was not buffered."
+        assert common_kpi.flush() == 0, "Post to cyfe should have failed."
+        assert common_kpi.get_stats()['buffered'] == 1, "Failed event was not put back in the buffer."
 
     def test_as_postman(self, monkeypatch, api_postman_event):
         monkeypatch.setitem(os.environ, 'KPI_URL', 'https://app.cyfe.com/api/push/5eb26ce43ea308704280926221234')
@@ -32,7 +36,104 @@ class TestPost:
 
     def test_with_non_api_event(self, monkeypatch, signup_with_u_and_p_event):
         monkeypatch.setitem(os.environ, 'KPI_URL', 'https://app.cyfe.com/api/push/5eb26ce43ea308704280926221234')
-        assert not common_kpi.post(os.environ, signup_with_u_and_p_event, 'New Lists'), "Post to cyfe failed."
+        assert common_kpi.post(os.environ, signup_with_u_and_p_event, 'Users'), "KPI event of signup trigger was not buffered."
+
+
+class TestBuffer:
+    url = 'https://app.cyfe.com/api/push/5eb26ce43ea308704280926221234'
+
+    def test_events_are_counted_per_metric_and_day(self, requests_mock):
+        requests_mock.post(self.url, text='{"status": "ok", "message": "Data pushed"}')
+        for _ in range(3):
+            common_kpi.enqueue(self.url, 'Reserved', '20200506', '#2A8C82', 'area')
+        common_kpi.enqueue(self.url, 'Reserved', '20200507', '#2A8C82', 'area')
+
+        assert common_kpi.flush() == 4, "Events sent were not as expected."
+        assert [r.json()['data'] for r in requests_mock.request_history] == [[{"Date": "20200506", "Reserved": "3"}], [{"Date": "20200507", "Reserved": "1"}]], "Posts were not as expected."
+        assert common_kpi.get_stats() == {'enqueued': 4, 'dropped': 0, 'sent': 4, 'failed': 0, 'buffered': 0}, "Stats were not as expected."
+
+    def test_events_are_dropped_when_buffer_is_full(self, monkeypatch):
+        monkeypatch.setattr(common_kpi, 'BUFFER_SIZE', 1)
+        assert common_kpi.enqueue(self.url, 'Reserved', '20200506', '#2A8C82', 'area'), "Event was not buffered."
+        assert common_kpi.enqueue(self.url, 'Reserved', '20200506', '#2A8C82', 'area'), "Event of a buffered metric was not counted."
+        assert not common_kpi.enqueue(self.url, 'Purchased', '20200506', '#D9CB04', 'area'), "Event should have been dropped."
+        assert common_kpi.get_stats()['dropped'] == 1, "Dropped events were not counted."
+        assert common_kpi.get_stats()['buffered'] == 2, "Buffered events were not counted."
+
+    def test_buffered_events_are_posted_before_the_invocation_returns(self, monkeypatch, api_create_event, requests_mock):
+        requests_mock.post(self.url, text='{"status": "ok", "message": "Data pushed"}')
+        monkeypatch.setitem(os.environ, 'KPI_URL', self.url)
+
+        @common_invocation.invocation_handler
+        def handler(event, context):
+            common_kpi.post(os.environ, event, 'New Lists')
+            assert requests_mock.call_count == 0, "Event should not be posted by the handler."
+            return {'statusCode': 200}
+
+        handler(api_create_event, None)
+        assert requests_mock.call_count == 1, "Event was not posted when the invocation ended."
+        assert common_kpi.get_stats()['sent'] == 1 and common_kpi.get_stats()['buffered'] == 0, "Event was not sent."
+
+    def test_failed_events_are_posted_by_the_next_invocation(self, monkeypatch, api_create_event, requests_mock):
+        requests_mock.post(self.url, [{'status_code': 500}, {'text': '{"status": "ok", "message": "Data pushed"}'}])
+        monkeypatch.setitem(os.environ, 'KPI_URL', self.url)
+
+        @common_invocation.invocation_handler
+        def handler(event, context):
+            common_kpi.post(os.environ, event, 'New Lists')
+            return {'statusCode': 200}
+
+        handler(api_create_event, None)
+        assert common_kpi.get_stats()['failed'] == 1 and common_kpi.get_stats()['buffered'] == 1, "Failed event was not kept."
+        handler(api_create_event, None)
+        assert requests_mock.request_history[-1].json()['data'] == [{"Date": common_kpi.get_date(), "New Lists": "2"}], "Events were not posted together."
+        assert common_kpi.get_stats()['buffered'] == 0, "Events were not sent."
+
+    def test_empty_buffer_makes_no_post(self, requests_mock):
+        assert common_kpi.flush() == 0, "No events should have been sent."
+        assert requests_mock.call_count == 0, "No post should have been made."
+
+    def test_invocation_without_events_makes_no_post(self, requests_mock):
+        requests_mock.post(self.url, status_code=500)
+        common_kpi.enqueue(self.url, 'Reserved', '20200506', '#2A8C82', 'area')
+
+        @common_invocation.invocation_handler
+        def handler(event, context):
+            return {'statusCode': 200}
+
+        handler({}, None)
+        assert requests_mock.call_count == 0, "Invocation which counted no events should not post."
+        assert common_kpi.get_stats()['buffered'] == 1, "Buffered event was not kept."
+
+    def test_flush_stops_at_the_deadline(self, monkeypatch):
+        timeouts = []
+
+        def slow_post(url, data, timeout):
+            timeouts.append(timeout)
+            common_kpi.time.sleep(0.06)
+            return False
+
+        monkeypatch.setattr(common_kpi, 'post_request', slow_post)
+        for name in ['Reserved', 'Purchased', 'New Lists', 'Users']:
+            common_kpi.enqueue(self.url, name, '20200506', '#2A8C82', 'area')
+
+        start = common_kpi.time.monotonic()
+        assert common_kpi.flush(0.1) == 0, "No events should have been sent."
+        assert common_kpi.time.monotonic() - start < 0.2, "Flush did not stop at the deadline."
+        assert len(timeouts) == 2 and all(max(timeout) <= 0.1 for timeout in timeouts), "Posts were not limited to the time left."
+        assert common_kpi.get_stats()['buffered'] == 4, "Metrics which were not sent were not kept."
+
+    def test_metric_is_dropped_after_max_attempts(self, monkeypatch, requests_mock):
+        requests_mock.post(self.url, status_code=500)
+        monkeypatch.setattr(common_kpi, 'MAX_ATTEMPTS', 2)
+        common_kpi.enqueue(self.url, 'Reserved', '20200506', '#2A8C82', 'area')
+
+        common_kpi.flush()
+        assert common_kpi.get_stats()['buffered'] == 1, "Failed event was not kept."
+        common_kpi.flush()
+        assert common_kpi.get_stats() == {'enqueued': 1, 'dropped': 1, 'sent': 0, 'failed': 2, 'buffered': 0}, "Stats were not as expected."
+        common_kpi.flush()
+        assert requests_mock.call_count == 2, "Dropped event should not have been posted again."
 
 
 class TestPostRequest:
@@ -149,6 +250,10 @@ class TestCreateJsonData:
 
         assert data == expected_data, "Data json was not as expected."
 
+    def test_create_data_with_count(self):
+        data = common_kpi.create_json_data('New Lists', '20200506', '#52ff7f', 'line', 3)
+        assert data['data'] == [{"Date": "20200506", "New Lists": "3"}], "Data json was not as expected."
+
     def test_create_data_for_gifts_added(self):
         data = common_kpi.create_json_data('Gifts Added', '20200506', '#4287f5', 'line')
 
@@ -0,0 +1,92 @@
+import pytest
+import json
+import mock
+import os
+from lists import common_request, logger
+
+log = logger.setup_test_logger()
+
+
+class TestGetRequest:
+    def test_request_is_reused_for_the_same_event(self, api_reserve_event):
+        request = common_request.get_request(api_reserve_event)
+        assert common_request.get_request(api_reserve_event) is request, "Request was not reused."
+
+    def test_request_is_replaced_when_body_changes(self, api_reserve_event):
+        request = common_request.get_request(api_reserve_event)
+        api_reserve_event['body'] = json.dumps({"quantity": 2})
+        assert common_request.get_request(api_reserve_event) is not request, "Request was not replaced."
+        assert common_request.get_request(api_reserve_event).body_attribute('quantity') == 2, "Body was not decoded again."
+
+    def test_request_is_replaced_for_another_event(self, api_reserve_event, api_purchase_event):
+        request = common_request.get_request(api_reserve_event)
+        assert common_request.get_request(api_purchase_event) is not request, "Request was not replaced."
+
+
+class TestBody:
+    def test_body_is_decoded_once(self, api_reserve_event):
+        request = common_request.get_request(api_reserve_event)
+        with mock.patch("lists.common_request.json.loads", wraps=json.loads) as loads:
+            assert request.body_attribute('quantity') == 1, "Quantity was not as expected."
+            assert request.body_attribute('title') == "Child User1 1st Birthday", "Title was not as expected."
+            assert request.body_attribute('product')['brand'] == "Mamas and Papas", "Product was not as expected."
+        assert loads.call_count == 1, "Body should have been decoded once."
+
+    def test_missing_body_attribute(self, api_reserve_event):
+        with pytest.raises(Exception) as e:
+            common_request.get_request(api_reserve_event).body_attribute('notes')
+        assert str(e.value) == "API Event did not contain a notes body attribute.", "Exception not as expected."
+
+    def test_optional_body_attribute(self, api_reserve_event):
+        assert common_request.get_request(api_reserve_event).optional_body_attribute('notes') is None, "Notes should not exist."
+
+    @pytest.mark.parametrize("body", ['["notes"]', '"notes"', '2'])
+    def test_body_which_is_not_an_object(self, api_reserve_event, body):
+        api_reserve_event['body'] = body
+        for get_attribute in ('body_attribute', 'optional_body_attribute'):
+            with pytest.raises(Exception) as e:
+                getattr(common_request.get_request(api_reserve_event), get_attribute)('notes')
+            assert str(e.value) == "API Event did not contain a notes body attribute.", "Exception not as expected."
+            common_request.reset()
+
+    def test_no_body(self, api_reserve_event):
+        api_reserve_event['body'] = None
+        with pytest.raises(Exception) as e:
+            common_request.get_request(api_reserve_event).body()
+        assert str(e.value) == "Body was missing required attributes.", "Exception not as expected."
+
+    def test_body_contains(self, api_cypress_event, api_reserve_event):
+        assert common_request.get_request(api_cypress_event).body_contains('Cypress'), "Body should contain text."
+        assert not common_request.get_request(api_reserve_event).body_contains('Cypress'), "Body should not contain text."
+
+
+class TestPathParameter:
+    def test_path_parameter(self, api_reserve_event):
+        api_reserve_event['pathParameters']['email'] = "test.user3%40gmail.com"
+        assert common_request.get_request(api_reserve_event).path_parameter('email') == "test.user3@gmail.com", "Email was not as expected."
+
+    def test_missing_path_parameter(self, api_reserve_event):
+        with pytest.raises(Exception) as e:
+            common_request.get_request(api_reserve_event).path_parameter('reservationid')
+        assert str(e.value) == "Path did not contain a reservationid parameter.", "Exception not as expected."
+
+    def test_null_path_parameter(self, api_reserve_event):
+        api_reserve_event['pathParameters']['id'] = "null"
+        with pytest.raises(Exception) as e:
+            common_request.get_request(api_reserve_event).path_parameter('id')
+        assert str(e.value) == "Path contained a null id parameter.", "Exception not as expected."
+
+
+class TestIdentity:
+    def test_identity_of_cognito_user(self, api_gateway_get_list_event):
+        assert common_request.get_request(api_gateway_get_list_event).identity(os.environ) == '12345678-user-0001-1234-abcdefghijkl', "Identity was not as expected."
+
+    def test_identity_of_postman_user(self, monkeypatch, api_postman_event):
+        monkeypatch.setitem(os.environ, 'POSTMAN_USERPOOL_SUB', '12345678-user-api1-1234-abcdefghijkl')
+        assert common_request.get_request(api_postman_event).identity(os.environ) == '12345678-user-api1-1234-abcdefghijkl', "Identity was not as expected."
+
+    def test_no_identity(self, api_reserve_event):
+        del api_reserve_event['requestContext']['identity']['userArn']
+        with pytest.raises(Exception) as e:
+            common_request.get_request(api_reserve_event).identity(os.environ)
+        assert str(e.value) == "There was no identity in the API event.", "Exception not as expected."
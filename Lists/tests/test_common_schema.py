@@ -0,0 +1,93 @@
+import pytest
+import json
+from lists import common_schema, common_request, logger
+
+log = logger.setup_test_logger()
+
+SCHEMA = common_schema.compile_schema([
+    ('quantity', common_schema.integer(minimum=1)),
+    ('title', common_schema.string(max_length=10)),
+    ('notes', common_schema.nullable(common_schema.string(allow_empty=True)), False),
+    ('product', common_schema.obj('product', [
+        ('type', common_schema.one_of('products', 'notfound'))
+    ]), False)
+])
+
+
+class TestChecks:
+    def test_string(self):
+        check = common_schema.string(max_length=3)
+        assert check("abc") is None, "Valid string was not accepted."
+        assert check(1) == "must be a string", "Error was not as expected."
+        assert check(" ") == "must not be empty", "Error was not as expected."
+        assert check("abcd") == "must be at most 3 characters", "Error was not as expected."
+
+    def test_empty_string_can_be_allowed(self):
+        assert common_schema.string(allow_empty=True)("") is None, "Empty string was not accepted."
+
+    def test_integer(self):
+        check = common_schema.integer(minimum=1)
+        assert check(2) is None, "Valid integer was not accepted."
+        assert check("2") == "must be an integer", "Error was not as expected."
+        assert check(0) == "must be at least 1", "Error was not as expected."
+
+    def test_boolean_is_not_an_integer(self):
+        assert common_schema.integer()(True) == "must be an integer", "Boolean was accepted as an integer."
+
+    def test_boolean(self):
+        assert common_schema.boolean()(False) is None, "Valid boolean was not accepted."
+        assert common_schema.boolean()("false") == "must be true or false", "Error was not as expected."
+
+    def test_nullable(self):
+        check = common_schema.nullable(common_schema.integer())
+        assert check(None) is None, "Null was not accepted."
+        assert check("a") == "must be an integer", "Error was not as expected."
+
+
+class TestCompileSchema:
+    def test_valid_body_is_returned(self):
+        body = {'quantity': 1, 'title': 'My List', 'notes': None, 'other': 'value'}
+        assert SCHEMA(body) is body, "Body was not returned."
+
+    def test_all_errors_are_collected(self):
+        with pytest.raises(common_schema.ValidationError) as e:
+            SCHEMA({'quantity': '1', 'product': {'type': 'wrong'}})
+
+        assert str(e.value) == "Request body was not valid.", "Exception not as expected."
+        assert e.value.errors == [
+            {'field': 'quantity', 'error': 'must be an integer'},
+            {'field': 'title', 'error': 'is required'},
+            {'field': 'product.type', 'error': 'must be one of products, notfound'}
+        ], "Errors were not as expected."
+
+    def test_body_must_be_an_object(self):
+        with pytest.raises(common_schema.ValidationError) as e:
+            SCHEMA([1])
+        assert e.value.errors == [{'field': None, 'error': 'must be an object'}], "Errors were not as expected."
+
+    def test_additional_fields_can_be_rejected(self):
+        validator = common_schema.compile_schema([('title', common_schema.string())], additional=False)
+        with pytest.raises(common_schema.ValidationError) as e:
+            validator({'title': 'My List', 'other': 'value'})
+        assert e.value.errors == [{'field': 'other', 'error': 'is not allowed'}], "Errors were not as expected."
+
+
+class TestValidateBody:
+    def test_validate_body(self, api_reserve_event):
+        api_reserve_event['body'] = json.dumps({'quantity': 2, 'title': 'My List'})
+        request = common_request.get_request(api_reserve_event)
+        assert common_schema.validate_body(request, SCHEMA) == {'quantity': 2, 'title': 'My List'}, "Body was not as expected."
+
+    def test_missing_body_keeps_message(self, api_reserve_event):
+        api_reserve_event['body'] = None
+        request = common_request.get_request(api_reserve_event)
+        with pytest.raises(common_schema.ValidationError) as e:
+            common_schema.validate_body(request, SCHEMA)
+        assert e.value.get_details() == {'error': 'Body was missing required attributes.'}, "Details were not as expected."
+
+    def test_body_not_json(self, api_reserve_event):
+        api_reserve_event['body'] = "some text"
+        request = common_request.get_request(api_reserve_event)
+        with pytest.raises(common_schema.ValidationError) as e:
+            common_schema.validate_body(request, SCHEMA, 'API Event did not contain a valid body.')
+        assert str(e.value) == 'API Event did not contain a valid body.', "Exception not as expected."
@@ -1,6 +1,7 @@
 import boto3
 import pytest
 import mock
+from botocore.exceptions import ClientError
 from lists import common_table_ops, logger
 
 log = logger.setup_test_logger()
@@ -27,6 +28,44 @@ class TestGetListQuery:
         assert str(e.value) == "List 12345678-list-0009-1234-abcdefghijkl does not exist.", "Exception not as expected."
 
 
+class TestQueryPages:
+    def test_query_pages_follows_last_evaluated_key(self, dynamodb_mock):
+        pages = list(common_table_ops.query_pages(
+            'lists-unittest',
+            page_size=5,
+            KeyConditionExpression="PK = :PK",
+            ExpressionAttributeValues={":PK":  {'S': "LIST#12345678-list-0001-1234-abcdefghijkl"}}
+        ))
+
+        assert [len(page) for page in pages] == [5, 5, 4], "Pages returned were not as expected."
+
+    def test_query_items(self, dynamodb_mock):
+        items = common_table_ops.query_items(
+            'lists-unittest',
+            page_size=3,
+            KeyConditionExpression="PK = :PK",
+            ExpressionAttributeValues={":PK":  {'S': "LIST#12345678-list-0001-1234-abcdefghijkl"}}
+        )
+
+        assert not isinstance(items, list), "Items should be streamed from a generator."
+        assert len(list(items)) == 14, "Number of items was not as expected."
+
+
+class TestIterListQuery:
+    def test_iter_list_query_with_page_size(self, dynamodb_mock):
+        list_id = "12345678-list-0001-1234-abcdefghijkl"
+        items = list(common_table_ops.iter_list_query('lists-unittest', list_id, page_size=2))
+        assert len(items) == 14, "Number of items was not as expected."
+        assert len(set(item['SK']['S'] for item in items)) == 14, "Items were duplicated across pages."
+
+    def test_iter_list_query_for_item_that_does_not_exist(self, dynamodb_mock):
+        list_id = "12345678-list-0009-1234-abcdefghijkl"
+
+        with pytest.raises(Exception) as e:
+            list(common_table_ops.iter_list_query('lists-unittest', list_id))
+        assert str(e.value) == "List 12345678-list-0009-1234-abcdefghijkl does not exist.", "Exception not as expected."
+
+
 class TestGetList:
     def test_get_list(self, dynamodb_mock):
         user_id = '12345678-user-0001-1234-abcdefghijkl'
@@ -94,6 +133,34 @@ class TestGetProductItem:
         assert product_item == expected_item, "Product item was not correct."
 
 
+class TestGetReservationContext:
+    def test_get_reservation_context(self, dynamodb_mock):
+        list_id = '12345678-list-0001-1234-abcdefghijkl'
+        product_id = '12345678-prod-0001-1234-abcdefghijkl'
+        context = common_table_ops.get_reservation_context('lists-unittest', list_id, product_id)
+
+        assert context['list']['listId'] == list_id, "List was not correct."
+        assert context['product'] == {'productId': product_id, 'quantity': 3, 'reserved': 2, 'purchased': 0, 'type': 'products'}, "Product item was not correct."
+        assert len(context['reservations']) == 3, "Number of reservations was not correct."
+        for reservation in context['reservations']:
+            assert reservation['productId'] == product_id, "Reservation was for a different product."
+
+    def test_product_not_in_list(self, dynamodb_mock):
+        context = common_table_ops.get_reservation_context('lists-unittest', '12345678-list-0001-1234-abcdefghijkl', '12345678-prod-0010-1234-abcdefghijkl')
+        assert context['product'] is None, "Product item should not have been found."
+        assert len(context['reservations']) == 0, "Number of reservations was not correct."
+
+    def test_list_does_not_exist(self, dynamodb_mock):
+        with pytest.raises(Exception) as e:
+            common_table_ops.get_reservation_context('lists-unittest', '12345678-list-0009-1234-abcdefghijkl', '12345678-prod-0001-1234-abcdefghijkl')
+        assert str(e.value) == "List 12345678-list-0009-1234-abcdefghijkl does not exist.", "Exception not as expected."
+
+    def test_with_wrong_table(self, dynamodb_mock):
+        with pytest.raises(Exception) as e:
+            common_table_ops.get_reservation_context('lists-unittes', '12345678-list-0001-1234-abcdefghijkl', '12345678-prod-0001-1234-abcdefghijkl')
+        assert str(e.value) == "Unexpected error when getting list item from table.", "Exception not as expected."
+
+
 @pytest.mark.skip(reason="Query with begins_with is not implemented for moto")
 class TestGetReservationItems:
     def test_get_reservation_items(self, dynamodb_mock):
@@ -398,3 +465,143 @@ class TestGetReservation:
         with pytest.raises(Exception) as e:
             common_table_ops.get_reservation('lists-unittest', 'reservationId-index', '12345678-resv-0001-1234-abcdefghijkl')
         assert str(e.value) == "Multiple items were found with same reservation id.", "Exception not as expected."
+
+
+class TestGetReservationState:
+    def test_get_reservation_state(self, dynamodb_mock):
+        key = {
+            'PK': {'S': "LIST#12345678-list-0001-1234-abcdefghijkl"},
+            'SK': {'S': "RESERVATION#12345678-prod-0004-1234-abcdefghijkl#12345678-user-0002-1234-abcdefghijkl#12345678-resv-0006-1234-abcdefghijkl"}
+        }
+        assert common_table_ops.get_reservation_state('lists-unittest', key) == {'state': 'purchased'}, "State was not as expected."
+
+    def test_reservation_does_not_exist(self, dynamodb_mock):
+        key = {'PK': {'S': "LIST#12345678-list-0001-1234-abcdefghijkl"}, 'SK': {'S': "RESERVATION#none"}}
+        with pytest.raises(Exception) as e:
+            common_table_ops.get_reservation_state('lists-unittest', key)
+        assert str(e.value) == "Reservation ID does not exist.", "Exception not as expected."
+
+
+def transaction_error(message, reasons=None):
+    response = {'Error': {'Code': 'TransactionCanceledException', 'Message': message}}
+    if reasons is not None:
+        response['CancellationReasons'] = reasons
+    return ClientError(response, 'TransactWriteItems')
+
+
+class TestTransactionConditionFailed:
+    def test_reasons_from_response(self):
+        error = transaction_error("Transaction cancelled", [{'Code': 'None'}, {'Code': 'ConditionalCheckFailed'}])
+        assert not common_table_ops.transaction_condition_failed(error, 0)
+        assert common_table_ops.transaction_condition_failed(error, 1)
+
+    def test_reasons_from_message(self):
+        error = transaction_error("Transaction cancelled, please refer cancellation reasons for specific reasons [ConditionalCheckFailed, None]")
+        assert common_table_ops.get_transaction_cancellation_reasons(error) == ['ConditionalCheckFailed', 'None'], "Reasons were not as expected."
+        assert common_table_ops.transaction_condition_failed(error, 0)
+        assert not common_table_ops.transaction_condition_failed(error, 1)
+        assert not common_table_ops.transaction_condition_failed(error, 2)
+
+    def test_other_errors(self):
+        error = ClientError({'Error': {'Code': 'ValidationException', 'Message': 'Invalid [ConditionalCheckFailed]'}}, 'TransactWriteItems')
+        assert not common_table_ops.transaction_condition_failed(error, 0)
+        assert not common_table_ops.transaction_condition_failed(Exception("Error"), 0)
+
+
+class TestProjection:
+    def test_projection(self):
+        assert common_table_ops.projection(('PK', 'SK'), ('SK', 'state')) == {
+            'ProjectionExpression': "#p0, #p1, #p2",
+            'ExpressionAttributeNames': {'#p0': 'PK', '#p1': 'SK', '#p2': 'state'}
+        }, "Projection was not as expected."
+
+    def test_add_projection_keeps_existing_names(self):
+        args = common_table_ops.add_projection({'ExpressionAttributeNames': {'#st': 'state'}}, ('name',))
+        assert args['ProjectionExpression'] == "#p0", "Projection expression was not as expected."
+        assert args['ExpressionAttributeNames'] == {'#st': 'state', '#p0': 'name'}, "Attribute names were not as expected."
+
+    def test_add_projection_with_no_attributes(self):
+        assert common_table_ops.add_projection({}, None) == {}, "Args should not have been changed."
+
+    def test_get_item_with_attributes(self, dynamodb_mock):
+        key = {'PK': {'S': "USER#12345678-user-0001-1234-abcdefghijkl"}, 'SK': {'S': "USER#12345678-user-0001-1234-abcdefghijkl"}}
+        item = common_table_ops.get_item('lists-unittest', key, attributes=('name',))['Item']
+        assert item == {'name': {'S': 'Test User1'}}, "Item should only have had the projected attributes."
+
+    def test_query_with_attributes(self, dynamodb_mock):
+        items = common_table_ops.get_list_query('lists-unittest', "12345678-list-0001-1234-abcdefghijkl", attributes=('PK', 'SK'))
+        assert len(items) > 0, "Query returned no items."
+        assert all(set(item.keys()) == {'PK', 'SK'} for item in items), "Items should only have had the projected attributes."
+
+
+class TestReadMemo:
+    def test_get_item_is_memoized(self, dynamodb_mock):
+        with mock.patch("lists.common_clients.get_client", wraps=common_table_ops.common_clients.get_client) as get_client:
+            common_table_ops.get_users_details('lists-unittest', '12345678-user-0001-1234-abcdefghijkl')
+            common_table_ops.get_users_details('lists-unittest', '12345678-user-0001-1234-abcdefghijkl')
+        assert get_client.call_count == 1, "Item should only have been read from the table once."
+        assert common_table_ops._memo_stats == {'hits': 1, 'misses': 1}, "Memo stats were not as expected."
+
+    def test_query_is_memoized(self, dynamodb_mock):
+        list_id = "12345678-list-0001-1234-abcdefghijkl"
+        items = common_table_ops.get_list_query('lists-unittest', list_id)
+        with mock.patch("lists.common_clients.get_client") as get_client:
+            assert common_table_ops.get_list_query('lists-unittest', list_id) == items, "Items were not as expected."
+        assert not get_client.called, "Query should not have been sent to the table."
+
+    def test_items_from_query_are_mapped_by_key(self, dynamodb_mock):
+        common_table_ops.get_list_query('lists-unittest', "12345678-list-0001-1234-abcdefghijkl")
+        with mock.patch("lists.common_clients.get_client") as get_client:
+            product_item = common_table_ops.get_product_item('lists-unittest', "12345678-list-0001-1234-abcdefghijkl", "12345678-prod-0001-1234-abcdefghijkl")
+        assert not get_client.called, "Product should not have been read from the table."
+        assert product_item['quantity'] == 3, "Product item was not as expected."
+
+    def test_projected_query_items_are_mapped_with_their_attributes(self, dynamodb_mock):
+        list_id = "12345678-list-0001-1234-abcdefghijkl"
+        common_table_ops.get_list_query('lists-unittest', list_id, attributes=('PK', 'SK', 'quantity', 'reserved', 'purchased', 'type'))
+        with mock.patch("lists.common_clients.get_client") as get_client:
+            item = common_table_ops.get_item('lists-unittest', {'PK': {'S': "LIST#" + list_id}, 'SK': {'S': "PRODUCT#12345678-prod-0001-1234-abcdefghijkl"}}, attributes=('quantity', 'reserved'))
+        assert not get_client.called, "Product should not have been read from the table."
+        assert item['Item']['quantity']['N'] == '3', "Product item was not as expected."
+
+    def test_projected_query_items_without_attribute_are_read_again(self, dynamodb_mock):
+        list_id = "12345678-list-0001-1234-abcdefghijkl"
+        common_table_ops.get_list_query('lists-unittest', list_id, attributes=('PK', 'SK'))
+        product_item = common_table_ops.get_product_item('lists-unittest', list_id, "12345678-prod-0001-1234-abcdefghijkl")
+        assert product_item['quantity'] == 3, "Product item was not as expected."
+        assert common_table_ops._memo_stats == {'hits': 0, 'misses': 2}, "Memo stats were not as expected."
+
+    def test_partially_read_query_is_not_memoized(self, dynamodb_mock):
+        pages = common_table_ops.query_pages(
+            'lists-unittest',
+            page_size=5,
+            KeyConditionExpression="PK = :PK",
+            ExpressionAttributeValues={":PK":  {'S': "LIST#12345678-list-0001-1234-abcdefghijkl"}}
+        )
+        next(pages)
+        pages.close()
+        assert not [key for key in common_table_ops._memo if key[0] == 'query'], "Partial query should not have been memoized."
+
+    def test_clear_memo(self, dynamodb_mock):
+        common_table_ops.get_users_details('lists-unittest', '12345678-user-0001-1234-abcdefghijkl')
+        assert common_table_ops.clear_memo()
+        assert common_table_ops._memo == {}, "Memo was not cleared."
+        assert common_table_ops._memo_stats == {'hits': 0, 'misses': 0}, "Memo stats were not reset."
+
+
+class TestListVersion:
+    def test_get_list_version_when_not_set(self, dynamodb_mock):
+        assert common_table_ops.get_list_version('lists-unittest', '12345678-list-0001-1234-abcdefghijkl', '12345678-user-0001-1234-abcdefghijkl') == 0, "Version was not as expected."
+
+    def test_bump_list_version(self, dynamodb_mock):
+        list_id = '12345678-list-0001-1234-abcdefghijkl'
+        user_id = '12345678-user-0001-1234-abcdefghijkl'
+        assert common_table_ops.bump_list_version('lists-unittest', list_id, user_id)
+        assert common_table_ops.bump_list_version('lists-unittest', list_id, user_id)
+        assert common_table_ops.get_list_version('lists-unittest', list_id, user_id) == 2, "Version was not as expected."
+
+    def test_bump_version_of_list_that_does_not_exist(self, dynamodb_mock):
+        list_id = '12345678-list-0009-1234-abcdefghijkl'
+        user_id = '12345678-user-0001-1234-abcdefghijkl'
+        assert not common_table_ops.bump_list_version('lists-unittest', list_id, user_id)
+        assert common_table_ops.get_list_version('lists-unittest', list_id, user_id) is None, "List item should not have been created."
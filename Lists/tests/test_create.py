@@ -107,10 +107,24 @@ class TestCreateMain:
         body = json.loads(response['body'])
         assert body['error'] == 'API Event did not contain a valid body.', "Create main response did not contain the correct error message."
 
+    def test_create_main_with_invalid_body(self, monkeypatch, api_create_event):
+        monkeypatch.setitem(os.environ, 'TABLE_NAME', 'lists-unittest')
+        monkeypatch.setattr(create.common_table_ops, 'get_users_details', lambda *args: pytest.fail("Table should not have been called."))
+        api_create_event['body'] = json.dumps({"title": "", "description": "A gift wish list.", "occasion": 1})
+
+        response = create.create_main(api_create_event)
+        assert response['statusCode'] == 400, "Status code was not as expected."
+        body = json.loads(response['body'])
+        assert body['errors'] == [
+            {'field': 'title', 'error': 'must not be empty'},
+            {'field': 'occasion', 'error': 'must be a string'},
+            {'field': 'imageUrl', 'error': 'is required'}
+        ], "Field errors were not as expected."
+
 
 def test_handler(api_create_event, monkeypatch, dynamodb_mock):
     monkeypatch.setitem(os.environ, 'TABLE_NAME', 'lists-unittest')
     response = create.handler(api_create_event, None)
     assert response['statusCode'] == 200
     assert response['headers'] == {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
-    assert re.match('{"listId": .*}', response['body'])
+    assert re.match('{"listId": ?.*}', response['body'])
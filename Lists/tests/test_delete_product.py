@@ -76,4 +76,4 @@ def test_handler(api_delete_product_event, monkeypatch, dynamodb_mock):
     response = delete_product.handler(api_delete_product_event, None)
     assert response['statusCode'] == 200, "Response statusCode was not as expected."
     assert response['headers'] == {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}, "Response headers were not as expected."
-    assert re.match('{"message": .*}', response['body']), "Response body was not as expected."
+    assert re.match('{"message": ?.*}', response['body']), "Response body was not as expected."
@@ -0,0 +1,80 @@
+import logging
+import os
+import pytest
+from lists import logger
+
+log = logger.setup_test_logger()
+
+
+class Formatted:
+    """Log argument that counts how many times it is formatted."""
+    def __init__(self):
+        self.count = 0
+
+    def __str__(self):
+        self.count += 1
+        return "formatted"
+
+
+@pytest.fixture(autouse=True)
+def sampled():
+    logger.sample_request(1)
+    yield
+    logger.sample_request(1)
+
+
+class TestTruncate:
+    def test_short_value(self):
+        assert logger.truncate({'a': 1}) == '{"a": 1}', "Value was not as expected."
+
+    def test_long_value(self):
+        assert logger.truncate('x' * 30, 10) == 'xxxxxxxxxx... (20 characters truncated)', "Value was not truncated."
+
+    def test_default_max_length(self, monkeypatch):
+        monkeypatch.setattr(logger, 'PAYLOAD_MAX_LENGTH', 5)
+        assert logger.truncate([1, 2, 3]) == '[1, 2... (truncated)', "Value was not truncated."
+
+    def test_large_payload_is_encoded_only_to_max_length(self):
+        items = [Formatted() for _ in range(1000)]
+        assert logger.truncate(items, 50).endswith("... (truncated)"), "Value was not truncated."
+        assert sum(item.count for item in items) < 10, "Whole payload should not have been encoded."
+
+
+class TestCopies:
+    def test_logger_is_the_same_in_every_service(self):
+        root = os.path.join(os.path.dirname(__file__), '../..')
+        with open(os.path.join(root, 'Lists/lists/logger.py'), 'r') as f:
+            source = f.read()
+
+        for path in ('Products/products/logger.py', 'NotFound/notfound/logger.py', 'Contact/contact/logger.py'):
+            with open(os.path.join(root, path), 'r') as f:
+                assert f.read() == source, "{} was not the same as the Lists logger.".format(path)
+
+
+class TestLazy:
+    def test_lazy_message(self):
+        assert str(logger.lazy("Items: {}, {}", [1], 'a')) == 'Items: [1], a', "Message was not as expected."
+
+    def test_lazy_message_is_not_formatted_when_level_is_disabled(self):
+        argument = Formatted()
+        log.debug(logger.lazy("Argument: {}", argument))
+        assert argument.count == 0, "Argument should not have been formatted."
+
+
+class TestLogPayload:
+    def test_payload_is_logged_when_sampled(self, caplog):
+        with caplog.at_level(logging.INFO):
+            logger.log_payload(log, "Response: {}", {'Item': {'PK': {'S': 'LIST#1'}}})
+        assert 'Response: {"Item": {"PK": {"S": "LIST#1"}}}' in caplog.messages, "Payload was not logged."
+
+    def test_payload_is_not_formatted_when_not_sampled(self, caplog):
+        argument = Formatted()
+        logger.sample_request(0)
+        with caplog.at_level(logging.INFO):
+            logger.log_payload(log, "Response: {}", argument)
+        assert argument.count == 0, "Argument should not have been formatted."
+        assert caplog.messages == [], "Payload should not have been logged."
+
+    def test_sample_request(self):
+        assert logger.sample_request(1) and logger.is_sampled(), "Request should have been sampled."
+        assert not logger.sample_request(0) and not logger.is_sampled(), "Request should not have been sampled."
@@ -2,7 +2,8 @@ import pytest
 import os
 import mock
 import json
-from lists import purchase, logger
+import boto3
+from lists import purchase, common_outbox, logger
 
 log = logger.setup_test_logger()
 
@@ -18,16 +19,52 @@ def env_vars(monkeypatch):
     return monkeypatch
 
 
-class TestNewReservedQuantity:
-    def test_new_reserved_quantity(self):
-        assert purchase.new_reserved_quantity(1, 1) == 0, "New quantity not as expected."
-        assert purchase.new_reserved_quantity(2, 1) == 1, "New quantity not as expected."
-
-
-class TestNewPurchasedQuantity:
-    def test_new_purchased_quantity(self):
-        assert purchase.new_purchased_quantity(0, 1) == 1, "New quantity not as expected."
-        assert purchase.new_purchased_quantity(2, 1) == 3, "New quantity not as expected."
+@pytest.fixture
+def reservation():
+    return {
+        'reservationId': '12345678-resv-0001-1234-abcdefghijkl',
+        'productId': '12345678-prod-0001-1234-abcdefghijkl',
+        'userId': '12345678-user-0002-1234-abcdefghijkl',
+        'listId': '12345678-list-0001-1234-abcdefghijkl',
+        'listOwnerId': '12345678-user-0001-1234-abcdefghijkl',
+        'quantity': 1,
+        'state': 'reserved'
+    }
+
+
+class TestUpdateProductAndReservation:
+    def test_update_product_and_reservation(self, dynamodb_mock, reservation):
+        assert purchase.update_product_and_reservation('lists-unittest', reservation)
+
+        dynamodb = boto3.client('dynamodb', region_name='eu-west-1')
+        product_item = dynamodb.get_item(
+            TableName='lists-unittest',
+            Key={'PK': {'S': "LIST#12345678-list-0001-1234-abcdefghijkl"}, 'SK': {'S': "PRODUCT#12345678-prod-0001-1234-abcdefghijkl"}}
+        )['Item']
+        assert product_item['reserved']['N'] == '1', "Product reserved quantity was not updated."
+        assert product_item['purchased']['N'] == '1', "Product purchased quantity was not updated."
+
+    def test_update_product_and_reservation_with_email_jobs(self, dynamodb_mock, reservation):
+        email_jobs = [
+            common_outbox.create_email_job_put('lists-unittest', 'test.user2@gmail.com', 'Email-Template', {'name': 'Test User2'}),
+            common_outbox.create_email_job_put('lists-unittest', 'test.user1@gmail.com', 'Update-Email-Template', {'name': 'Test User1'})
+        ]
+        assert purchase.update_product_and_reservation('lists-unittest', reservation, email_jobs)
+
+        dynamodb = boto3.client('dynamodb', region_name='eu-west-1')
+        jobs = dynamodb.query(
+            TableName='lists-unittest',
+            KeyConditionExpression="PK = :PK",
+            ExpressionAttributeValues={":PK": {'S': common_outbox.OUTBOX_PK}}
+        )['Items']
+        assert sorted(job['template']['S'] for job in jobs) == ['Email-Template', 'Update-Email-Template'], "Email jobs were not added to the outbox."
+
+    def test_purchase_twice(self, dynamodb_mock, reservation):
+        assert purchase.update_product_and_reservation('lists-unittest', reservation)
+
+        with pytest.raises(Exception) as e:
+            purchase.update_product_and_reservation('lists-unittest', reservation)
+        assert str(e.value) == "Product was not reserved. State = purchased.", "Exception not as expected."
 
 
 class TestCreateEmailData:
@@ -128,7 +165,6 @@ class TestPurchaseMain:
         assert body['error'] == 'Path contained a null email parameter.', "Error for missing environment variable was not as expected."
 
     @mock.patch("lists.purchase.update_product_and_reservation", mock.MagicMock(return_value=[True]))
-    @mock.patch("lists.common.send_email", mock.MagicMock(return_value=[True]))
     def test_confirm_purchase(self, env_vars, api_purchase_event, dynamodb_mock):
         response = purchase.purchase_main(api_purchase_event)
         body = json.loads(response['body'])
@@ -162,7 +198,6 @@ class TestPurchaseMain:
 
 
 @mock.patch("lists.purchase.update_product_and_reservation", mock.MagicMock(return_value=[True]))
-@mock.patch("lists.common.send_email", mock.MagicMock(return_value=[True]))
 def test_handler_with_existing_user(api_purchase_event, env_vars, dynamodb_mock):
     response = purchase.handler(api_purchase_event, None)
     body = json.loads(response['body'])
@@ -173,7 +208,6 @@ def test_handler_with_existing_user(api_purchase_event, env_vars, dynamodb_mock)
 
 
 @mock.patch("lists.purchase.update_product_and_reservation", mock.MagicMock(return_value=[True]))
-@mock.patch("lists.common.send_email", mock.MagicMock(return_value=[True]))
 def test_handler_with_no_account_user(api_purchase_event, env_vars, dynamodb_mock):
     api_purchase_event['pathParameters'] = {"reservationid": "12345678-resv-0003-1234-abcdefghijkl", "email": "test.user99@gmail.com"}
     response = purchase.handler(api_purchase_event, None)
@@ -2,7 +2,8 @@ import pytest
 import os
 import json
 import mock
-from lists import reserve, logger
+import boto3
+from lists import reserve, common_outbox, common_table_ops, logger
 
 log = logger.setup_test_logger()
 
@@ -17,33 +18,90 @@ def env_vars(monkeypatch):
     return monkeypatch
 
 
-@pytest.mark.skip(reason="transact_write_items is not implemented for moto")
+@pytest.fixture
+def reservation_item():
+    return {
+        'PK': {'S': "LIST#12345678-list-0001-1234-abcdefghijkl"},
+        'SK': {'S': "RESERVATION#12345678-prod-0002-1234-abcdefghijkl#12345678-user-0001-1234-abcdefghijkl#12345678-resv-0099-1234-abcdefghijkl"},
+        'reservationId': {'S': '12345678-resv-0099-1234-abcdefghijkl'},
+        'productId': {'S': '12345678-prod-0002-1234-abcdefghijkl'},
+        'userId': {'S': '12345678-user-0001-1234-abcdefghijkl'},
+        'listId': {'S': '12345678-list-0001-1234-abcdefghijkl'},
+        'listOwnerId': {'S': '12345678-user-0001-1234-abcdefghijkl'},
+        'name': {'S': 'Test User'},
+        'email': {'S': 'test.user1@gmail.com'},
+        'quantity': {'N': '1'},
+        'state': {'S': 'reserved'},
+        'reservedAt': {'N': '1111111111111'},
+        'listTitle': {'S': 'Test List Title'},
+        'productType': {'S': 'products'}
+    }
+
+
+def get_product(list_id, product_id):
+    dynamodb = boto3.client('dynamodb', region_name='eu-west-1')
+    return dynamodb.get_item(
+        TableName='lists-unittest',
+        Key={'PK': {'S': "LIST#" + list_id}, 'SK': {'S': "PRODUCT#" + product_id}}
+    )['Item']
+
+
+def get_outbox():
+    dynamodb = boto3.client('dynamodb', region_name='eu-west-1')
+    return dynamodb.query(
+        TableName='lists-unittest',
+        KeyConditionExpression="PK = :PK",
+        ExpressionAttributeValues={":PK": {'S': common_outbox.OUTBOX_PK}}
+    )['Items']
+
+
 class TestCreateReservation:
-    def test_create_reservation(self, dynamodb_mock):
-        new_product_reserved_quantity = 1
-        product_key = {
-            'PK': {'S': "LIST#12345678-list-0001-1234-abcdefghijkl"},
-            'SK': {'S': "PRODUCT#12345678-prod-0002-1234-abcdefghijkl"}
-        }
+    def test_create_reservation(self, dynamodb_mock, reservation_item):
+        list_id = '12345678-list-0001-1234-abcdefghijkl'
+        product_id = '12345678-prod-0002-1234-abcdefghijkl'
+        product_item = {'productId': product_id, 'quantity': 1, 'reserved': 0, 'purchased': 0, 'type': 'products'}
 
-        reservation_item = {
-            'PK': {'S': "LIST#12345678-list-0001-1234-abcdefghijkl"},
-            'SK': {'S': "RESERVATION#12345678-prod-0002-1234-abcdefghijkl#12345678-user-0001-1234-abcdefghijkl#12345678-resv-0001-1234-abcdefghijkl"},
-            'reservationId': {'S': '12345678-resv-0001-1234-abcdefghijkl'},
-            'productId': {'S': '12345678-prod-0001-1234-abcdefghijkl'},
-            'userId': {'S': '12345678-user-0001-1234-abcdefghijkl'},
-            'listId': {'S': '12345678-list-0001-1234-abcdefghijkl'},
-            'listOwnerId': {'S': '12345678-user-0001-1234-abcdefghijkl'},
-            'name': {'S': 'Test User'},
-            'email': {'S': 'test.user1@gmail.com'},
-            'quantity': {'N': '1'},
-            'state': {'S': 'reserved'},
-            'reservedAt': {'N': '1111111111111'},
-            'listTitle': {'S': 'Test List Title'},
-            'productType': {'S': 'products'}
-        }
+        assert reserve.create_reservation('lists-unittest', list_id, product_id, product_item, 1, reservation_item)
+        assert get_product(list_id, product_id)['reserved']['N'] == '1', "Product reserved quantity was not updated."
+        assert common_table_ops.get_list_version('lists-unittest', list_id, '12345678-user-0001-1234-abcdefghijkl') == 1, "List version was not updated."
+
+    def test_create_reservation_with_email_job(self, dynamodb_mock, reservation_item):
+        list_id = '12345678-list-0001-1234-abcdefghijkl'
+        product_id = '12345678-prod-0002-1234-abcdefghijkl'
+        product_item = {'productId': product_id, 'quantity': 1, 'reserved': 0, 'purchased': 0, 'type': 'products'}
+        email_job = common_outbox.create_email_job_put('lists-unittest', 'test.user1@gmail.com', 'Email-Template', {'name': 'Test User1'})
+
+        assert reserve.create_reservation('lists-unittest', list_id, product_id, product_item, 1, reservation_item, email_job)
+        jobs = get_outbox()
+        assert [job['toAddress']['S'] for job in jobs] == ['test.user1@gmail.com'], "Email job was not added to the outbox."
+        assert jobs[0]['template']['S'] == 'Email-Template', "Email job template was not as expected."
+
+    def test_create_reservation_when_product_reserved_by_another_request(self, dynamodb_mock, reservation_item):
+        list_id = '12345678-list-0001-1234-abcdefghijkl'
+        product_id = '12345678-prod-0003-1234-abcdefghijkl'
+        product_item = {'productId': product_id, 'quantity': 1, 'reserved': 0, 'purchased': 0, 'type': 'products'}
+
+        with pytest.raises(Exception) as e:
+            reserve.create_reservation('lists-unittest', list_id, product_id, product_item, 1, reservation_item)
+        assert str(e.value) == "Reserved quantity for product (1) could not be updated by 1 as exceeds required quantity (1).", "Exception not as expected."
+        assert get_product(list_id, product_id)['reserved']['N'] == '1', "Product reserved quantity should not have been updated."
+
+    def test_create_reservation_retries_when_product_changed(self, dynamodb_mock, reservation_item):
+        list_id = '12345678-list-0001-1234-abcdefghijkl'
+        product_id = '12345678-prod-0001-1234-abcdefghijkl'
+        product_item = {'productId': product_id, 'quantity': 3, 'reserved': 1, 'purchased': 1, 'type': 'products'}
+
+        assert reserve.create_reservation('lists-unittest', list_id, product_id, product_item, 1, reservation_item)
+        assert get_product(list_id, product_id)['reserved']['N'] == '3', "Product reserved quantity was not updated."
+
+    def test_create_reservation_for_product_that_was_deleted(self, dynamodb_mock, reservation_item):
+        list_id = '12345678-list-0001-1234-abcdefghijkl'
+        product_id = '12345678-prod-0010-1234-abcdefghijkl'
+        product_item = {'productId': product_id, 'quantity': 1, 'reserved': 0, 'purchased': 0, 'type': 'products'}
 
-        assert reserve.create_reservation('lists-unittest', new_product_reserved_quantity, product_key, reservation_item)
+        with pytest.raises(Exception) as e:
+            reserve.create_reservation('lists-unittest', list_id, product_id, product_item, 1, reservation_item)
+        assert str(e.value) == "No product item exists with this ID.", "Exception not as expected."
 
 
 class TestCreateEmailData:
@@ -185,6 +243,38 @@ class TestCreateReservationItem:
         assert object['productType']['S'] == "products", "Object was not as expected."
 
 
+class TestLoadReservationContext:
+    def test_load_reservation_context(self, env_vars, api_reserve_event, dynamodb_mock):
+        user, context = reserve.load_reservation_context(api_reserve_event, 'lists-unittest', 'email-index', '12345678-list-0001-1234-abcdefghijkl', '12345678-prod-0001-1234-abcdefghijkl')
+        assert user['id'] == '12345678-user-0003-1234-abcdefghijkl', "User was not as expected."
+        assert context['list']['listOwner'] == '12345678-user-0001-1234-abcdefghijkl', "List owner was not as expected."
+        assert context['product']['productId'] == '12345678-prod-0001-1234-abcdefghijkl', "Product was not as expected."
+        assert len(context['reservations']) == 3, "Number of reservations was not as expected."
+
+    def test_user_errors_are_raised_before_list_errors(self, env_vars, api_reserve_event, dynamodb_mock):
+        api_reserve_event['body'] = json.dumps({"quantity": 1})
+        api_reserve_event['pathParameters']['email'] = "test.user99@gmail.com"
+        with pytest.raises(Exception) as e:
+            reserve.load_reservation_context(api_reserve_event, 'lists-unittest', 'email-index', '12345678-list-0009-1234-abcdefghijkl', '12345678-prod-0001-1234-abcdefghijkl')
+        assert str(e.value) == "API Event did not contain a name body attribute.", "Exception not as expected."
+
+
+class TestCheckProductNotReservedByUser:
+    def test_not_reserved(self):
+        reservations = [{'userId': '12345678-user-0002-1234-abcdefghijkl', 'state': 'reserved'}]
+        assert reserve.check_product_not_reserved_by_user(reservations, '12345678-user-0003-1234-abcdefghijkl')
+
+    def test_cancelled_reservation_is_ignored(self):
+        reservations = [{'userId': '12345678-user-0003-1234-abcdefghijkl', 'state': 'cancelled'}]
+        assert reserve.check_product_not_reserved_by_user(reservations, '12345678-user-0003-1234-abcdefghijkl')
+
+    def test_already_reserved(self):
+        reservations = [{'userId': '12345678-user-0003-1234-abcdefghijkl', 'state': 'reserved'}]
+        with pytest.raises(Exception) as e:
+            reserve.check_product_not_reserved_by_user(reservations, '12345678-user-0003-1234-abcdefghijkl')
+        assert str(e.value) == "Product already reserved by user.", "Exception not as expected."
+
+
 class TestReserveMain:
     def test_no_list_id_path_parameter(self, env_vars, api_reserve_event):
         api_reserve_event['pathParameters'] = {"productid": "12345678-prod-0001-1234-abcdefghijkl", "id": "null", "email": "test.user99@gmail.com"}
@@ -230,21 +320,27 @@ class TestReserveMain:
         body = json.loads(response['body'])
         assert body['error'] == 'Body was missing required attributes.', "Reserve error was not as expected."
 
+    def test_reserve_with_quantity_not_a_number(self, env_vars, api_reserve_event):
+        api_reserve_event['pathParameters'] = {"productid": "12345678-prod-0001-1234-abcdefghijkl", "id": "12345678-list-0001-1234-abcdefghijkl", "email": "test.user99@gmail.com"}
+        api_reserve_event['body'] = json.dumps({"quantity": "1", "title": "Child User1 1st Birthday", "product": {"type": "products"}})
+
+        response = reserve.reserve_main(api_reserve_event)
+        assert response['statusCode'] == 400, "Status code was not as expected."
+        body = json.loads(response['body'])
+        assert [error['field'] for error in body['errors']] == ['quantity', 'product.brand', 'product.details', 'product.productUrl', 'product.imageUrl'], "Field errors were not as expected."
+
     # TODO - If transact_write_items is implemented for moto (https://github.com/spulec/moto/issues/2424), we can rely solely on dynamodb_mock.
     # We could also query table to test objects are created correctly. This is covered by integration testing though.
-    @mock.patch("lists.common_table_ops.get_reservation_items_query", mock.MagicMock(return_value=[]))
     @mock.patch("lists.reserve.create_reservation", mock.MagicMock(return_value=True))
-    @mock.patch("lists.common.send_email", mock.MagicMock(return_value=True))
     def test_reserve_product_not_yet_reserved(self, env_vars, api_reserve_event, dynamodb_mock):
         api_reserve_event['pathParameters'] = {"productid": "12345678-prod-0002-1234-abcdefghijkl", "id": "12345678-list-0001-1234-abcdefghijkl", "email": "test.user2@gmail.com"}
         response = reserve.reserve_main(api_reserve_event)
         body = json.loads(response['body'])
         assert len(body['reservation_id']) == 36, "Reservation ID was not returned."
 
-    @mock.patch("lists.common_table_ops.get_reservation_items_query", mock.MagicMock(return_value=[]))
     @mock.patch("lists.reserve.create_reservation", mock.MagicMock(return_value=True))
-    @mock.patch("lists.common.send_email", mock.MagicMock(return_value=True))
     def test_reserve_product_with_some_reserved(self, env_vars, api_reserve_event, dynamodb_mock):
+        api_reserve_event['pathParameters']['email'] = "test.user1@gmail.com"
         response = reserve.reserve_main(api_reserve_event)
         body = json.loads(response['body'])
         assert len(body['reservation_id']) == 36, "Reservation ID was not returned."
@@ -274,29 +370,21 @@ class TestReserveMain:
         body = json.loads(response['body'])
         assert body['error'] == 'No product item exists with this ID.', "Reserve error was not as expected."
 
-    @mock.patch("lists.common_table_ops.get_reservation_items_query", mock.MagicMock(return_value=[
-        {
-            "quantity": {"N": "1"},
-            "reservedAt": {"N": "1584982686"},
-            "userId": {"S": "12345678-user-0003-1234-abcdefghijkl"},
-            "reservationId": {"S": "12345678-resv-0002-1234-abcdefghijkl"},
-            "SK": {"S": "RESERVED#12345678-prod-0001-1234-abcdefghijkl#12345678-user-0003-1234-abcdefghijkl#12345678-resv-0002-1234-abcdefghijkl"},
-            "PK": {"S": "LIST#12345678-list-0001-1234-abcdefghijkl"},
-            "name": {"S": "Test User2"},
-            "productId": {"S": "12345678-prod-0001-1234-abcdefghijkl"},
-            "state": {"S": "reserved"}
-        }
-    ]))
     def test_reserve_product_already_reserved_by_user(self, env_vars, api_reserve_event, dynamodb_mock):
         response = reserve.reserve_main(api_reserve_event)
         body = json.loads(response['body'])
         assert body['error'] == 'Product already reserved by user.', "Reserve error was not as expected."
 
+    def test_reserve_product_on_list_that_does_not_exist(self, env_vars, api_reserve_event, dynamodb_mock):
+        api_reserve_event['pathParameters']['id'] = "12345678-list-0009-1234-abcdefghijkl"
+        response = reserve.reserve_main(api_reserve_event)
+        body = json.loads(response['body'])
+        assert body['error'] == 'List 12345678-list-0009-1234-abcdefghijkl does not exist.', "Reserve error was not as expected."
+
 
-@mock.patch("lists.common_table_ops.get_reservation_items_query", mock.MagicMock(return_value=[]))
 @mock.patch("lists.reserve.create_reservation", mock.MagicMock(return_value=True))
-@mock.patch("lists.common.send_email", mock.MagicMock(return_value=True))
 def test_handler(api_reserve_event, env_vars, dynamodb_mock):
+    api_reserve_event['pathParameters']['email'] = "test.user1@gmail.com"
     response = reserve.handler(api_reserve_event, None)
     body = json.loads(response['body'])
 
@@ -0,0 +1,78 @@
+import pytest
+import os
+import re
+import json
+import importlib
+from lists import router, logger
+
+log = logger.setup_test_logger()
+
+
+@pytest.fixture
+def env_vars(monkeypatch):
+    monkeypatch.setitem(os.environ, 'TABLE_NAME', 'lists-unittest')
+    # The routes set these, so they are restored once each test has run.
+    monkeypatch.setitem(os.environ, 'INDEX_NAME', '')
+    monkeypatch.setitem(os.environ, 'KPI_COLOUR', '')
+
+    return monkeypatch
+
+
+def get_template_routes():
+    """API paths and methods of the template, which are each integrated with a function."""
+    filename = os.path.join(os.path.dirname(__file__), '../template.yaml')
+    routes = set()
+    path = None
+    method = None
+    with open(filename, 'r') as f:
+        for line in f:
+            match = re.match(r'^          "(/[^"]*)":', line)
+            if match:
+                path = match.group(1)
+            match = re.match(r'^            (get|post|put|delete):', line)
+            if match:
+                method = match.group(1).upper()
+            if re.search(r'uri: .*Function\.Arn', line):
+                routes.add((path, method))
+
+    return routes
+
+
+class TestRoutes:
+    def test_every_api_route_is_routed(self):
+        assert set(router.ROUTES.keys()) == get_template_routes(), "Routes were not the same as the API routes of the template."
+
+    def test_every_route_has_a_main_function(self):
+        for module_name, main_name, variables in router.ROUTES.values():
+            module = importlib.import_module('lists.' + module_name)
+            assert callable(getattr(module, main_name)), "Route main function {}.{} was not found.".format(module_name, main_name)
+
+
+class TestRouteMain:
+    def test_route_to_main(self, env_vars, api_base_event, dynamodb_mock):
+        response = router.route_main(api_base_event)
+        assert response['statusCode'] == 200, "Response statusCode was not as expected."
+        body = json.loads(response['body'])
+        assert body['user']['userId'] == '12345678-user-0001-1234-abcdefghijkl', "User was not as expected."
+        assert os.environ['INDEX_NAME'] == 'userId-index', "Environment of route was not set."
+
+    def test_route_environment_is_replaced(self, env_vars, api_reserve_event):
+        api_reserve_event['pathParameters']['id'] = "null"
+        router.route_main(api_reserve_event)
+        assert os.environ['INDEX_NAME'] == 'email-index', "Environment of route was not set."
+        assert os.environ['KPI_COLOUR'] == '#2A8C82', "Environment of route was not set."
+
+    def test_main_is_imported_once(self, env_vars, api_base_event, dynamodb_mock):
+        router.route_main(api_base_event)
+        assert router.get_main(('/lists', 'GET')) is router.get_main(('/lists', 'GET')), "Main function was not reused."
+
+    def test_route_not_found(self, api_base_event):
+        api_base_event['resource'] = "/lists/{id}/unknown"
+        response = router.route_main(api_base_event)
+        assert response['statusCode'] == 404, "Response statusCode was not as expected."
+        assert json.loads(response['body'])['error'] == "No route for GET /lists/{id}/unknown.", "Error was not as expected."
+
+
+def test_handler(env_vars, api_base_event, dynamodb_mock):
+    response = router.handler(api_base_event, None)
+    assert response['statusCode'] == 200, "Response statusCode was not as expected."
@@ -0,0 +1,185 @@
+import pytest
+import os
+import json
+import boto3
+from botocore.exceptions import ClientError
+from lists import send_emails, common_clients, common_outbox, common_table_ops, logger
+
+log = logger.setup_test_logger()
+
+
+@pytest.fixture
+def env_vars(monkeypatch):
+    monkeypatch.setitem(os.environ, 'TABLE_NAME', 'lists-unittest')
+    monkeypatch.setitem(os.environ, 'MAX_SEND_RATE', '100')
+
+    return monkeypatch
+
+
+@pytest.fixture
+def add_jobs(dynamodb_mock):
+    dynamodb = boto3.client('dynamodb', region_name='eu-west-1')
+
+    def add(*jobs):
+        for email, template in jobs:
+            dynamodb.put_item(TableName='lists-unittest', Item=common_outbox.create_email_job(email, template, {'name': email}))
+
+    return add
+
+
+@pytest.fixture
+def bulk_requests(monkeypatch):
+    """SendBulkTemplatedEmail is not implemented by moto, so the ses client records requests and fails any address with 'fail' in it."""
+    requests = []
+
+    def send_bulk_templated_email(**kwargs):
+        requests.append(kwargs)
+        statuses = []
+        for destination in kwargs['Destinations']:
+            if 'fail' in destination['Destination']['ToAddresses'][0]:
+                statuses.append({'Status': 'MessageRejected', 'Error': 'Email address is not verified.'})
+            else:
+                statuses.append({'Status': 'Success', 'MessageId': 'message-id'})
+        return {'Status': statuses}
+
+    monkeypatch.setattr(common_clients.get_client('ses'), 'send_bulk_templated_email', send_bulk_templated_email)
+    return requests
+
+
+def get_partition(pk):
+    dynamodb = boto3.client('dynamodb', region_name='eu-west-1')
+    return dynamodb.query(
+        TableName='lists-unittest',
+        KeyConditionExpression="PK = :PK",
+        ExpressionAttributeValues={":PK": {'S': pk}}
+    )['Items']
+
+
+class TestGroupJobs:
+    def test_jobs_are_grouped_by_template(self):
+        jobs = [{'template': 'reserve'}, {'template': 'welcome'}, {'template': 'reserve'}]
+        groups = list(send_emails.group_jobs(jobs))
+        assert [(template, len(batch)) for template, batch in groups] == [('reserve', 2), ('welcome', 1)], "Groups were not as expected."
+
+    def test_groups_are_split_into_batches(self):
+        jobs = [{'template': 'reserve'}] * 5
+        groups = list(send_emails.group_jobs(jobs, 2))
+        assert [len(batch) for template, batch in groups] == [2, 2, 1], "Batches were not as expected."
+
+
+class TestRateLimiter:
+    def test_acquire_within_rate_does_not_wait(self):
+        waits = []
+        limiter = send_emails.RateLimiter(10, clock=lambda: 0, sleep=waits.append)
+        limiter.acquire(10)
+        assert waits == [], "Limiter should not have waited."
+
+    def test_acquire_over_rate_waits(self):
+        waits = []
+        limiter = send_emails.RateLimiter(10, clock=lambda: 0, sleep=waits.append)
+        limiter.acquire(10)
+        limiter.acquire(5)
+        assert waits == [0.5], "Limiter did not wait as expected."
+
+
+class TestSendBatch:
+    def test_send_batch(self, bulk_requests):
+        jobs = [
+            {'email': 'test.user1@gmail.com', 'templateData': '{"name": "Test User1"}'},
+            {'email': 'test.fail@gmail.com', 'templateData': '{"name": "Test Fail"}'}
+        ]
+        sent, failures = send_emails.send_batch('reserve', jobs)
+
+        assert sent == [jobs[0]], "Sent jobs were not as expected."
+        assert failures == [(jobs[1], 'Email address is not verified.')], "Failed jobs were not as expected."
+        assert len(bulk_requests) == 1, "One bulk request should have been sent."
+        assert bulk_requests[0]['Template'] == 'reserve', "Template was not as expected."
+        assert bulk_requests[0]['Destinations'][0]['ReplacementTemplateData'] == '{"name": "Test User1"}', "Template data was not as expected."
+
+    def test_send_batch_when_request_fails(self, monkeypatch):
+        def send_bulk_templated_email(**kwargs):
+            raise ClientError({'Error': {'Code': 'Throttling', 'Message': 'Maximum sending rate exceeded.'}}, 'SendBulkTemplatedEmail')
+
+        monkeypatch.setattr(common_clients.get_client('ses'), 'send_bulk_templated_email', send_bulk_templated_email)
+        jobs = [{'email': 'test.user1@gmail.com', 'templateData': '{}'}]
+        sent, failures = send_emails.send_batch('reserve', jobs)
+        assert sent == [], "No jobs should have been sent."
+        assert failures == [(jobs[0], 'Maximum sending rate exceeded.')], "Failed jobs were not as expected."
+
+
+class TestSendEmailsMain:
+    def test_jobs_are_sent_and_deleted(self, env_vars, add_jobs, bulk_requests):
+        add_jobs(('test.user1@gmail.com', 'reserve'), ('test.user2@gmail.com', 'welcome'), ('test.user3@gmail.com', 'reserve'))
+
+        result = send_emails.send_emails_main({})
+        assert result == {'jobs': 3, 'sent': 3, 'retried': 0, 'failed': 0, 'undeleted': 0}, "Result was not as expected."
+        assert [request['Template'] for request in bulk_requests] == ['reserve', 'welcome'], "Bulk requests were not grouped by template."
+        assert get_partition(common_outbox.OUTBOX_PK) == [], "Sent jobs were not deleted."
+
+    def test_failed_job_is_retried(self, env_vars, add_jobs, bulk_requests):
+        add_jobs(('test.user1@gmail.com', 'reserve'), ('test.fail@gmail.com', 'reserve'))
+
+        result = send_emails.send_emails_main({})
+        assert result == {'jobs': 2, 'sent': 1, 'retried': 1, 'failed': 0, 'undeleted': 0}, "Result was not as expected."
+
+        jobs = get_partition(common_outbox.OUTBOX_PK)
+        assert [job['toAddress']['S'] for job in jobs] == ['test.fail@gmail.com'], "Failed job should have stayed in the outbox."
+        assert jobs[0]['attempts']['N'] == '1', "Attempt was not counted."
+        assert jobs[0]['lastError']['S'] == 'Email address is not verified.', "Error was not recorded."
+
+    def test_job_is_moved_when_attempts_are_used(self, env_vars, add_jobs, bulk_requests):
+        add_jobs(('test.fail@gmail.com', 'reserve'))
+
+        # Each run is a separate invocation, which starts with an empty memo of table reads.
+        for _ in range(send_emails.MAX_ATTEMPTS):
+            common_table_ops.clear_memo()
+            result = send_emails.send_emails_main({})
+        assert result == {'jobs': 1, 'sent': 0, 'retried': 0, 'failed': 1, 'undeleted': 0}, "Result was not as expected."
+
+        assert get_partition(common_outbox.OUTBOX_PK) == [], "Failed job should have been removed from the outbox."
+        failed = get_partition(common_outbox.FAILED_PK)
+        assert failed[0]['attempts']['N'] == str(send_emails.MAX_ATTEMPTS), "Failed job was not as expected."
+        assert json.loads(failed[0]['templateData']['S']) == {'name': 'test.fail@gmail.com'}, "Failed job data was not kept."
+
+    def test_no_jobs(self, env_vars, dynamodb_mock, bulk_requests):
+        assert send_emails.send_emails_main({}) == {'jobs': 0, 'sent': 0, 'retried': 0, 'failed': 0, 'undeleted': 0}, "Result was not as expected."
+        assert bulk_requests == [], "No bulk requests should have been sent."
+
+
+class TestEmailJob:
+    def test_recipient_is_not_stored_as_email(self):
+        job = common_outbox.create_email_job('test.user1@gmail.com', 'reserve', {})
+        assert 'email' not in job, "Job should not have the key attribute of the email-index."
+        assert common_outbox.get_job(job)['email'] == 'test.user1@gmail.com', "Recipient was not as expected."
+
+    def test_job_with_recipient_stored_as_email(self):
+        job = common_outbox.create_email_job('test.user1@gmail.com', 'reserve', {})
+        job['email'] = job.pop('toAddress')
+        assert common_outbox.get_job(job)['email'] == 'test.user1@gmail.com', "Recipient was not as expected."
+
+
+class TestGetEmailJobs:
+    def test_jobs_are_limited_to_max_jobs(self, add_jobs):
+        add_jobs(('test.user1@gmail.com', 'reserve'), ('test.user2@gmail.com', 'reserve'), ('test.user3@gmail.com', 'reserve'))
+        assert len(send_emails.get_email_jobs('lists-unittest', 2)) == 2, "Number of jobs was not as expected."
+
+
+class TestDeleteJobs:
+    def test_unprocessed_deletes_are_retried_with_backoff(self, monkeypatch):
+        job = {'key': {'PK': {'S': common_outbox.OUTBOX_PK}, 'SK': {'S': 'JOB#1'}}}
+        unprocessed = {'UnprocessedItems': {'lists-unittest': [{'DeleteRequest': {'Key': job['key']}}]}}
+        responses = [unprocessed, {'UnprocessedItems': {}}]
+        sleeps = []
+        monkeypatch.setattr(common_clients.get_client('dynamodb'), 'batch_write_item', lambda **kwargs: responses.pop(0))
+        monkeypatch.setattr(send_emails.time, 'sleep', sleeps.append)
+
+        assert send_emails.delete_jobs('lists-unittest', [job]) == 0, "All jobs should have been deleted."
+        assert sleeps == [common_table_ops.batch_backoff(1)], "Retry did not back off."
+
+    def test_undeleted_jobs_are_counted(self, monkeypatch):
+        job = {'key': {'PK': {'S': common_outbox.OUTBOX_PK}, 'SK': {'S': 'JOB#1'}}}
+        unprocessed = {'UnprocessedItems': {'lists-unittest': [{'DeleteRequest': {'Key': job['key']}}]}}
+        monkeypatch.setattr(common_clients.get_client('dynamodb'), 'batch_write_item', lambda **kwargs: unprocessed)
+        monkeypatch.setattr(send_emails.time, 'sleep', lambda seconds: None)
+
+        assert send_emails.delete_jobs('lists-unittest', [job, job]) == 1, "Undeleted jobs were not counted."
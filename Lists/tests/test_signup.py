@@ -4,7 +4,7 @@ import os
 import mock
 import boto3
 from moto import mock_cognitoidp
-from lists import signup, logger
+from lists import signup, common_outbox, logger
 
 log = logger.setup_test_logger()
 
@@ -164,6 +164,18 @@ class TestCreateUserInListsDB:
 
         assert response['Item'] == expected_item
 
+    def test_create_new_user_with_email_job(self, dynamodb_mock):
+        email_job = common_outbox.create_email_job_put('lists-unittest', 'test.user10@gmail.com', 'Welcome-Unittest', {'name': 'Test User10'})
+        assert signup.create_user_in_lists_db('lists-unittest', '12345678-user-0010-1234-abcdefghijkl', 'test.user10@gmail.com', 'Test User10', email_job), "User was not created in table."
+
+        dynamodb = boto3.client('dynamodb', region_name='eu-west-1')
+        jobs = dynamodb.query(
+            TableName='lists-unittest',
+            KeyConditionExpression="PK = :PK",
+            ExpressionAttributeValues={":PK": {'S': common_outbox.OUTBOX_PK}}
+        )['Items']
+        assert [job['toAddress']['S'] for job in jobs] == ['test.user10@gmail.com'], "Email job was not added to the outbox."
+
     def test_create_user_with_bad_table_name(self, dynamodb_mock):
         email = 'test.user@gmail.com'
         name = 'Test User'
@@ -219,7 +231,6 @@ class TestCreateEmailData:
 
 
 @mock_cognitoidp
-@mock.patch("lists.common.send_email", mock.MagicMock(return_value=[True]))
 @mock.patch("lists.signup.link_accounts", mock.MagicMock(return_value=[True]))
 @mock.patch("lists.signup.set_random_password", mock.MagicMock(return_value=[True]))
 class TestHandler:
@@ -17,15 +17,43 @@ def env_vars(monkeypatch):
     return monkeypatch
 
 
-@pytest.mark.skip(reason="transact_write_items is not implemented for moto")
+@pytest.fixture
+def reservation():
+    return {
+        'reservationId': '12345678-resv-0001-1234-abcdefghijkl',
+        'productId': '12345678-prod-0001-1234-abcdefghijkl',
+        'userId': '12345678-user-0002-1234-abcdefghijkl',
+        'listId': '12345678-list-0001-1234-abcdefghijkl',
+        'listOwnerId': '12345678-user-0001-1234-abcdefghijkl',
+        'quantity': 1,
+        'state': 'reserved'
+    }
+
+
+def get_item(sk):
+    dynamodb = boto3.client('dynamodb', region_name='eu-west-1')
+    return dynamodb.get_item(
+        TableName='lists-unittest',
+        Key={'PK': {'S': "LIST#12345678-list-0001-1234-abcdefghijkl"}, 'SK': {'S': sk}}
+    )['Item']
+
+
 class TestUnreserveProduct:
-    def test_unreserve_product(self, dynamodb_mock):
-        product_key = {}
-        reservation_key = {}
-        new_product_reserved_quantity = 1
-        assert unreserve.unreserve_product('lists-unittest', product_key, reservation_key, new_product_reserved_quantity)
+    def test_unreserve_product(self, dynamodb_mock, reservation):
+        assert unreserve.unreserve_product('lists-unittest', reservation)
+
+        assert get_item("PRODUCT#12345678-prod-0001-1234-abcdefghijkl")['reserved']['N'] == '1', "Product reserved quantity was not updated."
+        reservation_item = get_item("RESERVATION#12345678-prod-0001-1234-abcdefghijkl#12345678-user-0002-1234-abcdefghijkl#12345678-resv-0001-1234-abcdefghijkl")
+        assert reservation_item['state']['S'] == 'cancelled', "Reservation state was not updated."
+        assert get_item("USER#12345678-user-0001-1234-abcdefghijkl")['version']['N'] == '1', "List version was not updated."
+
+    def test_unreserve_product_twice(self, dynamodb_mock, reservation):
+        assert unreserve.unreserve_product('lists-unittest', reservation)
 
-    # TODO - add tests for failure exceptions
+        with pytest.raises(Exception) as e:
+            unreserve.unreserve_product('lists-unittest', reservation)
+        assert str(e.value) == "Product was not reserved. State = cancelled.", "Exception not as expected."
+        assert get_item("PRODUCT#12345678-prod-0001-1234-abcdefghijkl")['reserved']['N'] == '1', "Product reserved quantity should only be updated once."
 
 
 class TestUnreserveMain:
@@ -22,7 +22,8 @@ class TestGetAttributeDetails:
 
         with pytest.raises(Exception) as e:
             update.get_attribute_details(api_update_event)
-        assert str(e.value) == "Event body did not contain the expected keys ['title', 'description', 'eventDate', 'occasion', 'imageUrl'].", "Exception not as expected."
+        assert str(e.value) == "Request body was not valid.", "Exception not as expected."
+        assert [error['field'] for error in e.value.errors] == ['description', 'eventDate', 'occasion', 'imageUrl'], "Missing attributes not as expected."
 
     def test_get_attribute_details_with_empty_body(self, api_update_event):
         api_update_event['body'] = None
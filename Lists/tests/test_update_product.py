@@ -124,4 +124,4 @@ def test_handler(api_update_product_event, monkeypatch, dynamodb_mock):
     response = update_product.handler(api_update_product_event, None)
     assert response['statusCode'] == 200, "Response statusCode was not as expected."
     assert response['headers'] == {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}, "Response headers were not as expected."
-    assert re.match('{"quantity": .*}', response['body']), "Response body was not as expected."
+    assert re.match('{"quantity": ?.*}', response['body']), "Response body was not as expected."
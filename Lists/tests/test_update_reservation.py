@@ -2,6 +2,7 @@ import pytest
 import mock
 import os
 import json
+import boto3
 from lists import update_reservation, logger
 
 log = logger.setup_test_logger()
@@ -23,6 +24,7 @@ def reservation_item():
         'productId': '12345678-prod-0001-1234-abcdefghijkl',
         'userId': '12345678-user-0002-1234-abcdefghijkl',
         'listId': '12345678-list-0001-1234-abcdefghijkl',
+        'listOwnerId': '12345678-user-0001-1234-abcdefghijkl',
         'name': 'Test User2',
         'email': 'test.user2@gmail.com',
         'quantity': 1,
@@ -57,6 +59,39 @@ class TestCalculateDifferenceToReservedItemQuantity:
         assert str(e.value) == "There was no difference in update request to reserved item.", "Exception message not correct."
 
 
+def get_product_reserved_quantity():
+    dynamodb = boto3.client('dynamodb', region_name='eu-west-1')
+    return dynamodb.get_item(
+        TableName='lists-unittest',
+        Key={'PK': {'S': "LIST#12345678-list-0001-1234-abcdefghijkl"}, 'SK': {'S': "PRODUCT#12345678-prod-0001-1234-abcdefghijkl"}}
+    )['Item']['reserved']['N']
+
+
+class TestUpdateProductAndReservation:
+    def test_increase_quantity(self, dynamodb_mock, reservation_item):
+        product_item = {'productId': '12345678-prod-0001-1234-abcdefghijkl', 'quantity': 3, 'reserved': 2, 'purchased': 0, 'type': 'products'}
+        assert update_reservation.update_product_and_reservation('lists-unittest', reservation_item, 1, 2, product_item)
+        assert get_product_reserved_quantity() == '3', "Product reserved quantity was not updated."
+
+    def test_increase_quantity_retries_when_product_changed(self, dynamodb_mock, reservation_item):
+        product_item = {'productId': '12345678-prod-0001-1234-abcdefghijkl', 'quantity': 3, 'reserved': 1, 'purchased': 1, 'type': 'products'}
+        assert update_reservation.update_product_and_reservation('lists-unittest', reservation_item, 1, 2, product_item)
+        assert get_product_reserved_quantity() == '3', "Product reserved quantity was not updated."
+
+    def test_increase_quantity_by_too_many_after_product_changed(self, dynamodb_mock, reservation_item):
+        product_item = {'productId': '12345678-prod-0001-1234-abcdefghijkl', 'quantity': 3, 'reserved': 0, 'purchased': 0, 'type': 'products'}
+        with pytest.raises(Exception) as e:
+            update_reservation.update_product_and_reservation('lists-unittest', reservation_item, 2, 3, product_item)
+        assert str(e.value) == "Reserved quantity for product (2) could not be updated by 2 as exceeds required quantity (3).", "Exception not as expected."
+
+    def test_decrease_quantity_does_not_need_product(self, dynamodb_mock, reservation_item):
+        reservation_item['quantity'] = 2
+        with pytest.raises(Exception) as e:
+            update_reservation.update_product_and_reservation('lists-unittest', reservation_item, -1, 1)
+        assert str(e.value) == "Unexpected error when unreserving product.", "Exception not as expected."
+        assert get_product_reserved_quantity() == '2', "Product reserved quantity should not have been updated."
+
+
 class TestUpdateReserveMain:
     @mock.patch("lists.update_reservation.update_product_and_reservation", mock.MagicMock(return_value=[True]))
     def test_update_reserve_main(self, env_vars, dynamodb_mock, api_update_reservation_event):
@@ -1,16 +1,20 @@
 # A collection of methods that are common across all modules.
 import re
-import logging
+from notfound import encoder, logger, request
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-if logger.handlers:
-    handler = logger.handlers[0]
-    handler.setFormatter(logging.Formatter("[%(levelname)s]\t%(asctime)s.%(msecs)dZ\t%(aws_request_id)s\t%(module)s:%(funcName)s\t%(message)s\n", "%Y-%m-%dT%H:%M:%S"))
+log = logger.setup_logger()
+
+# Requests generated by postman, which doesn't authenticate via cognito.
+POSTMAN_USER = re.compile("^arn:aws:iam::[0-9]{12}:user/ApiTestUser$")
+POSTMAN_USER2 = re.compile("^arn:aws:iam::[0-9]{12}:user/ApiTestUser2$")
 
 
 def create_response(code, body):
-    logger.info("Creating response with status code ({}) and body ({})".format(code, body))
+    """Response for API Gateway. The body is encoded as JSON, unless it is a string that has already been serialized."""
+    if not isinstance(body, str):
+        body = encoder.dumps(body)
+
+    log.info("Creating response with status code ({}) and body length ({})".format(code, len(body)))
     response = {'statusCode': code,
                 'body': body,
                 'headers': {
@@ -23,9 +27,9 @@ def create_response(code, body):
 def get_table_name(osenv):
     try:
         table_name = osenv['TABLE_NAME']
-        logger.info("TABLE_NAME environment variable value: " + table_name)
+        log.info("TABLE_NAME environment variable value: " + table_name)
     except KeyError:
-        logger.error('TABLE_NAME environment variable not set correctly.')
+        log.error('TABLE_NAME environment variable not set correctly.')
         raise Exception('TABLE_NAME environment variable not set correctly.')
 
     return table_name
@@ -37,24 +41,22 @@ def get_identity(event, osenv):
         cognito_user_id = event['requestContext']['identity']['cognitoIdentityId']
         cognito_authentication_provider = event['requestContext']['identity']['cognitoAuthenticationProvider']
     except KeyError:
-        logger.error("There was no identity context in API event.")
+        log.error("There was no identity context in API event.")
         raise Exception("There was no identity context in API event.")
 
     # Check to see if request was generated by postman, which doesn't authenticate via cognito.
-    pattern = re.compile("^arn:aws:iam::[0-9]{12}:user/ApiTestUser$")
-    pattern2 = re.compile("^arn:aws:iam::[0-9]{12}:user/ApiTestUser2$")
-    if pattern.match(userArn):
-        logger.info('Request was from postman, using API test identity.')
+    if POSTMAN_USER.match(userArn):
+        log.info('Request was from postman, using API test identity.')
         identity = get_postman_identity(osenv, 1)
-    elif pattern2.match(userArn):
-        logger.info('Request was from postman, using API test identity.')
+    elif POSTMAN_USER2.match(userArn):
+        log.info('Request was from postman, using API test identity.')
         identity = get_postman_identity(osenv, 2)
     else:
         if cognito_user_id is None:
             raise Exception("There was no cognitoIdentityId in the API event.")
 
         identity = cognito_authentication_provider.split(':')[-1]
-        logger.info('cognitoIdentityId was retrieved from event.')
+        log.info('cognitoIdentityId was retrieved from event.')
 
     return identity
 
@@ -76,10 +78,10 @@ def get_postman_identity(osenv, id):
 
 def get_product_id(event):
     try:
-        product_id = event['pathParameters']['id']
-        logger.info("Product ID: " + product_id)
+        product_id = request.get_request(event).path_parameter('id')
+        log.info("Product ID: " + product_id)
     except Exception:
-        logger.error("API Event did not contain a Product ID in the path parameters.")
+        log.error("API Event did not contain a Product ID in the path parameters.")
         raise Exception('API Event did not contain a Product ID in the path parameters.')
 
     return product_id
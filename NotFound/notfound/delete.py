@@ -1,18 +1,17 @@
-import json
 import os
-import boto3
-import logging
-from notfound import common
+from notfound import clients, common, logger, warmup
 from botocore.exceptions import ClientError
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-if logger.handlers:
-    handler = logger.handlers[0]
-    handler.setFormatter(logging.Formatter("[%(levelname)s]\t%(asctime)s.%(msecs)dZ\t%(aws_request_id)s\t%(module)s:%(funcName)s\t%(message)s\n", "%Y-%m-%dT%H:%M:%S"))
+log = logger.setup_logger()
+
+clients.warm_up('dynamodb')
 
 
 def handler(event, context):
+    if warmup.is_warm_up(event):
+        return warmup.response(clients.prime())
+
+    logger.sample_request()
     response = delete_main(event)
     return response
 
@@ -24,20 +23,20 @@ def delete_main(event):
         product_id = common.get_product_id(event)
         delete_product(table_name, identity, product_id)
     except Exception as e:
-        logger.error("Exception: {}".format(e))
-        response = common.create_response(500, json.dumps({'error': str(e)}))
-        logger.info("Returning response: {}".format(response))
+        log.error("Exception: {}".format(e))
+        response = common.create_response(500, {'error': str(e)})
+        log.info("Returning response: {}".format(response))
         return response
 
     data = {'deleted': True}
-    response = common.create_response(200, json.dumps(data))
+    response = common.create_response(200, data)
     return response
 
 
 def delete_product(table_name, cognito_user_id, product_id):
-    dynamodb = boto3.client('dynamodb')
+    dynamodb = clients.get_client('dynamodb')
     
-    logger.info("Deleting Product ID: {} for user: {}.".format(product_id, cognito_user_id))
+    log.info("Deleting Product ID: {} for user: {}.".format(product_id, cognito_user_id))
 
     key = {
         'productId': {'S': product_id},
@@ -50,10 +49,10 @@ def delete_product(table_name, cognito_user_id, product_id):
             ConditionExpression="createdBy = :C",
             ExpressionAttributeValues={":C":  {'S': cognito_user_id}}
         )
-        logger.info("Delete response: {}".format(response))
+        logger.log_payload(log, "Delete response: {}", response)
     except ClientError as e:
         if e.response['Error']['Code'] == "ConditionalCheckFailedException":
-            logger.info("Delete request failed for product_id: {} and user {} due to condition check on createdBy user id.".format(product_id, cognito_user_id))
+            log.info("Delete request failed for product_id: {} and user {} due to condition check on createdBy user id.".format(product_id, cognito_user_id))
             raise Exception("Product can not be deleted.")
         else:
             raise
@@ -1,19 +1,18 @@
-import json
 import os
-import boto3
-import logging
-from notfound import common
+from notfound import clients, common, logger, warmup
 from notfound.entities import Product
 from botocore.exceptions import ClientError
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-if logger.handlers:
-    handler = logger.handlers[0]
-    handler.setFormatter(logging.Formatter("[%(levelname)s]\t%(asctime)s.%(msecs)dZ\t%(aws_request_id)s\t%(module)s:%(funcName)s\t%(message)s\n", "%Y-%m-%dT%H:%M:%S"))
+log = logger.setup_logger()
+
+clients.warm_up('dynamodb')
 
 
 def handler(event, context):
+    if warmup.is_warm_up(event):
+        return warmup.response(clients.prime())
+
+    logger.sample_request()
     response = get_main(event)
     return response
 
@@ -24,17 +23,17 @@ def get_main(event):
         product_id = common.get_product_id(event)
         product_object = get_product(table_name, product_id)
     except Exception as e:
-        logger.error("Exception: {}".format(e))
-        response = common.create_response(500, json.dumps({'error': str(e)}))
-        logger.info("Returning response: {}".format(response))
+        log.error("Exception: {}".format(e))
+        response = common.create_response(500, {'error': str(e)})
+        log.info("Returning response: {}".format(response))
         return response
 
-    response = common.create_response(200, json.dumps(product_object))
+    response = common.create_response(200, product_object)
     return response
 
 
 def get_product(table_name, product_id):
-    dynamodb = boto3.client('dynamodb')
+    dynamodb = clients.get_client('dynamodb')
     
     key = {'productId': {'S': product_id}}
 
@@ -44,15 +43,13 @@ def get_product(table_name, product_id):
             Key=key
         )
     except ClientError as e:
-        logger.error("Exception: {}.".format(e))
+        log.error("Exception: {}.".format(e))
         raise Exception("Unexpected problem getting product from table.")
 
-    logger.info("Get product item response: {}".format(response))
+    logger.log_payload(log, "Get product item response: {}", response)
 
     if 'Item' not in response:
-        logger.info("No product returned for the id {}.".format(product_id))
+        log.info("No product returned for the id {}.".format(product_id))
         raise Exception("No product exists with this ID.")
 
-    product = Product(response['Item'])
-
-    return product.get_details()
+    return Product.decode(response['Item'])
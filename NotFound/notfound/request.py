@@ -0,0 +1,47 @@
+# API events decoded once per invocation. The body is parsed, and path parameters unquoted, on first use and then shared
+# by every accessor, rather than each helper decoding the event again.
+import json
+from urllib.parse import unquote
+
+_current = {'request': None}
+
+
+class Request:
+    """Accessors for an API event. Callers raise their own errors for bodies and parameters that are missing."""
+    __slots__ = ('event', 'raw_body', 'path', '_body', '_path_parameters')
+
+    def __init__(self, event):
+        self.event = event
+        self.raw_body = event.get('body')
+        self.path = event.get('pathParameters')
+        self._body = None
+        self._path_parameters = {}
+
+    def is_for(self, event):
+        """Whether this is still the request of the event, which tests and callers may have changed since."""
+        return self.event is event and self.raw_body is event.get('body') and self.path is event.get('pathParameters')
+
+    def body(self):
+        if self._body is None:
+            self._body = json.loads(self.raw_body)
+
+        return self._body
+
+    def path_parameter(self, name):
+        return self.path[name]
+
+    def unquoted_path_parameter(self, name):
+        if name not in self._path_parameters:
+            self._path_parameters[name] = unquote(self.path[name])
+
+        return self._path_parameters[name]
+
+
+def get_request(event):
+    """The request for an event, which is decoded once and reused for as long as the event is unchanged."""
+    request = _current['request']
+    if request is None or not request.is_for(event):
+        request = Request(event)
+        _current['request'] = request
+
+    return request
@@ -0,0 +1,11 @@
+# Warm-up events, which handlers answer without running their business path, e.g. from a scheduled rule with the
+# input {"source": "ewelists.warmup"}. This module imports nothing, so a handler without clients can check for them.
+WARM_UP_SOURCE = 'ewelists.warmup'
+
+
+def is_warm_up(event):
+    return isinstance(event, dict) and event.get('source') == WARM_UP_SOURCE
+
+
+def response(primed=()):
+    return {'warmedUp': True, 'primed': list(primed)}
@@ -2,6 +2,14 @@ import pytest
 import boto3
 import json
 from moto import mock_dynamodb2
+from notfound import clients, logger
+
+
+@pytest.fixture(autouse=True)
+def reset_clients():
+    clients.reset()
+    yield
+    logger.sample_request(1)
 
 
 @pytest.fixture
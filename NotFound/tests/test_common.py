@@ -1,3 +1,4 @@
+import json
 import pytest
 import os
 from notfound import common
@@ -22,6 +23,11 @@ def test_create_response():
     assert response == expected_response, "Create_response did not return the expected response value."
 
 
+def test_create_response_with_object():
+    response = common.create_response(200, {'message': 'Success message'})
+    assert json.loads(response['body']) == {'message': 'Success message'}, "Response body was not as expected."
+
+
 class TestGetPostmanIdentity:
     def test_get_postman_identity(self, monkeypatch):
         monkeypatch.setitem(os.environ, 'POSTMAN_USERPOOL_SUB', '12345678-user-api1-1234-abcdefghijkl')
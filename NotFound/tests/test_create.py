@@ -80,10 +80,23 @@ class TestCreateMain:
         body = json.loads(response['body'])
         assert body['error'] == 'API Event did not contain a valid body.', "Create main response did not contain the correct error message."
 
+    def test_with_invalid_body(self, monkeypatch, api_gateway_create_event, table):
+        monkeypatch.setitem(os.environ, 'TABLE_NAME', 'notfound-unittest')
+        api_gateway_create_event['body'] = json.dumps({"brand": "John Lewis", "details": "", "price": 10})
+
+        response = create.create_main(api_gateway_create_event)
+        assert response['statusCode'] == 400, "Status code was not as expected."
+        body = json.loads(response['body'])
+        assert body['errors'] == [
+            {'field': 'details', 'error': 'must not be empty'},
+            {'field': 'url', 'error': 'is required'},
+            {'field': 'price', 'error': 'must be a string'}
+        ], "Field errors were not as expected."
+
 
 def test_handler(api_gateway_create_event, monkeypatch, table):
     monkeypatch.setitem(os.environ, 'TABLE_NAME', 'notfound-unittest')
     response = create.handler(api_gateway_create_event, None)
     assert response['statusCode'] == 200
     assert response['headers'] == {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
-    assert re.match('{"productId": .*}', response['body'])
+    assert re.match('{"productId": ?.*}', response['body'])
@@ -48,3 +48,12 @@ class TestProduct:
             'imageUrl': 'https://whitecompany.scene7.com/is/image/whitecompany/Halden-Champagne-Flutes---Set-of-4/GWHSC_2_MAIN?$D_PDP_412x412$',
             'price': '40.00'
         }, "Object was not as expected."
+
+    def test_decode(self, response_item_all):
+        assert Product.decode(response_item_all) == Product(response_item_all).get_details(), "Decoded product was not as expected."
+
+    def test_decode_with_missing_attribute(self, response_item_all):
+        del response_item_all['brand']
+        with pytest.raises(Exception) as e:
+            Product.decode(response_item_all)
+        assert str(e.value) == "Item did not have a brand attribute.", "Exception message not correct."
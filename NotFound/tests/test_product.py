@@ -69,4 +69,10 @@ def test_handler(api_gateway_get_product_event, monkeypatch, table):
     response = product.handler(api_gateway_get_product_event, None)
     assert response['statusCode'] == 200
     assert response['headers'] == {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
-    assert re.match('{"productId": .*}', response['body'])
+    assert re.match('{"productId": ?.*}', response['body'])
+
+
+def test_handler_warm_up(monkeypatch):
+    monkeypatch.setattr(product.clients, 'prime', lambda: ['dynamodb'])
+    response = product.handler({'source': 'ewelists.warmup'}, None)
+    assert response == {'warmedUp': True, 'primed': ['dynamodb']}, "Warm-up response was not as expected."
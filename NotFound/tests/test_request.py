@@ -0,0 +1,26 @@
+import json
+import mock
+from notfound import request
+
+
+class TestGetRequest:
+    def test_request_is_reused_for_the_same_event(self, api_gateway_create_event):
+        assert request.get_request(api_gateway_create_event) is request.get_request(api_gateway_create_event), "Request was not reused."
+
+    def test_request_is_replaced_when_body_changes(self, api_gateway_create_event):
+        event_request = request.get_request(api_gateway_create_event)
+        api_gateway_create_event['body'] = json.dumps({"brand": "John Lewis"})
+        assert request.get_request(api_gateway_create_event) is not event_request, "Request was not replaced."
+        assert request.get_request(api_gateway_create_event).body() == {"brand": "John Lewis"}, "Body was not decoded again."
+
+
+class TestRequest:
+    def test_body_is_decoded_once(self, api_gateway_create_event):
+        event_request = request.get_request(api_gateway_create_event)
+        with mock.patch("notfound.request.json.loads", wraps=json.loads) as loads:
+            assert event_request.body()['brand'] == "BABYBJÖRN", "Brand was not as expected."
+            assert event_request.body()['url'] == "https://www.amazon.co.uk/dp/B01H24LM58", "Url was not as expected."
+        assert loads.call_count == 1, "Body should have been decoded once."
+
+    def test_path_parameter(self, api_gateway_delete_event):
+        assert request.get_request(api_gateway_delete_event).path_parameter('id') == api_gateway_delete_event['pathParameters']['id'], "Product ID was not as expected."
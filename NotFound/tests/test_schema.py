@@ -0,0 +1,27 @@
+import pytest
+from notfound import schema
+
+SCHEMA = schema.compile_schema([
+    ('brand', schema.string()),
+    ('price', schema.string(), False)
+])
+
+
+class TestCompileSchema:
+    def test_valid_body_is_returned(self):
+        body = {'brand': 'John Lewis', 'price': '10.00'}
+        assert SCHEMA(body) is body, "Body was not returned."
+
+    def test_all_errors_are_collected(self):
+        with pytest.raises(schema.ValidationError) as e:
+            SCHEMA({'price': 10})
+
+        assert e.value.get_details() == {
+            'error': 'Request body was not valid.',
+            'errors': [{'field': 'brand', 'error': 'is required'}, {'field': 'price', 'error': 'must be a string'}]
+        }, "Details were not as expected."
+
+    def test_body_must_be_an_object(self):
+        with pytest.raises(schema.ValidationError) as e:
+            SCHEMA("brand")
+        assert e.value.errors == [{'field': None, 'error': 'must be an object'}], "Errors were not as expected."
@@ -0,0 +1,292 @@
+"""Time, memory and accuracy of url_metadata over a corpus of product pages, served offline.
+
+The pages in benchmarks/corpus are synthetic: each is built from the metadata of a retailer page in the unit test
+fixtures, padded with generated styles, scripts and body markup to the size of a real page. They are not captures of
+the live pages, so their times and accuracy say how the engines compare, not how they do on the retailers' current
+markup. Real heads can be added to the corpus with --capture, which saves the head of a live page and the fields
+extracted from it to golden.json, where they must be checked by hand before they are committed:
+
+    python benchmarks/bench_metadata.py --capture https://www.kidly.co.uk/... captured_kidly.html
+
+The pages are served gzipped by a local http server so that each page goes through the same fetch as a real url. For
+each page and metadata engine, the head is fetched and then parsed repeatedly, and the fields extracted by query and
+parse_data are compared with the expected fields of the page in benchmarks/corpus/golden.json. Run from the Products
+directory:
+
+    python benchmarks/bench_metadata.py [--engine tokenizer] [--repeat 20]
+
+Results can be appended to a history file, one JSON line per run, and checked against the last entry, so that a
+change which extracts fewer fields correctly fails the check. Times are only compared with --check-times, and only
+against a baseline recorded on the same host and Python version, as they are not comparable across machines:
+
+    python benchmarks/bench_metadata.py --record benchmarks/metadata_times.jsonl
+    python benchmarks/bench_metadata.py --check benchmarks/metadata_times.jsonl [--check-times] [--tolerance 0.25]
+"""
+import argparse
+import datetime
+import functools
+import gc
+import gzip
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_DIR = os.path.join(SERVICE_DIR, 'benchmarks', 'corpus')
+
+sys.path.insert(0, SERVICE_DIR)
+os.environ.setdefault('AWS_DEFAULT_REGION', 'eu-west-1')
+# Requests to the local server must not go through a proxy of the environment.
+os.environ['NO_PROXY'] = '127.0.0.1,localhost'
+
+from products import fetcher, url_metadata  # noqa: E402
+
+
+class CorpusHandler(SimpleHTTPRequestHandler):
+    """Serves the corpus pages as html, gzipped when the client accepts it, as retailers do."""
+
+    def do_GET(self):
+        path = self.translate_path(self.path)
+        if not path.endswith('.html') or not os.path.isfile(path):
+            self.send_error(404)
+            return
+
+        with open(path, 'rb') as f:
+            content = f.read()
+
+        gzipped = 'gzip' in self.headers.get('Accept-Encoding', '')
+        if gzipped:
+            content = gzip.compress(content)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    """Serves the corpus from a free local port, returning the server and the base url of the pages."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(CorpusHandler, directory=CORPUS_DIR))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, "http://127.0.0.1:{}/".format(server.server_address[1])
+
+
+def get_pages():
+    with open(os.path.join(CORPUS_DIR, 'golden.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def capture(url, name):
+    """Saves the head of a live page to the corpus, with the fields the tokenizer extracts from it as its expected
+    fields. Returns the fields.
+    """
+    html = fetcher.fetch_head(url)
+    with open(os.path.join(CORPUS_DIR, name), 'w', encoding='utf-8') as f:
+        f.write(html)
+
+    pages = get_pages()
+    pages[name] = url_metadata.parse_data(url_metadata.tokenize(html))
+    with open(os.path.join(CORPUS_DIR, 'golden.json'), 'w', encoding='utf-8') as f:
+        f.write(json.dumps(pages, indent=2, sort_keys=True, ensure_ascii=False) + "\n")
+
+    return pages[name]
+
+
+def extract(url, html, engine):
+    if engine == 'tokenizer':
+        return url_metadata.parse_data(url_metadata.tokenize(html))
+
+    return url_metadata.parse_data(url_metadata.parse(url, html))
+
+
+def score(data, expected):
+    """Fields of the data that are the same as the expected fields, and the number of fields of either."""
+    fields = set(data) | set(expected)
+    return sum(1 for field in fields if data.get(field) == expected.get(field)), len(fields)
+
+
+def measure(url, expected, engine, repeat):
+    """Fetch and parse times of the page, the peak memory allocated while parsing it and the fields it had right."""
+    data = url_metadata.fetch(url, engine)
+    correct, fields = score(data, expected)
+
+    fetch_seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        html = fetcher.fetch_head(url)
+        fetch_seconds.append(time.perf_counter() - start)
+
+    # As with timeit, garbage collection is off while parsing, so that a collection does not land in one of the runs.
+    parse_seconds = []
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            extract(url, html, engine)
+            parse_seconds.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    extract(url, html, engine)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'fetch_ms': round(statistics.median(fetch_seconds) * 1000, 2),
+        'parse_ms': round(statistics.median(parse_seconds) * 1000, 2),
+        'parse_best_ms': round(min(parse_seconds) * 1000, 2),
+        'peak_kib': round(peak / 1024, 1),
+        'head_bytes': len(html.encode('utf-8')),
+        'correct': correct,
+        'fields': fields,
+        'wrong': sorted(field for field in set(data) | set(expected) if data.get(field) != expected.get(field))
+    }
+
+
+def profile(base_url, pages, engines, repeat):
+    results = {}
+    for engine in engines:
+        results[engine] = {name: measure(base_url + name, expected, engine, repeat) for name, expected in pages.items()}
+
+    return results
+
+
+def summarise(pages):
+    parse_ms = sum(page['parse_ms'] for page in pages.values())
+    return {
+        'parse_ms': round(parse_ms, 2),
+        'pages_per_second': round(len(pages) * 1000 / parse_ms, 1) if parse_ms else None,
+        'accuracy': round(sum(page['correct'] for page in pages.values()) / max(sum(page['fields'] for page in pages.values()), 1), 3)
+    }
+
+
+def get_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def get_last_entry(history_file):
+    last = None
+    if os.path.exists(history_file):
+        with open(history_file, 'r') as f:
+            for line in f:
+                if line.strip():
+                    last = json.loads(line)
+
+    return last
+
+
+def get_host():
+    return "{} {}".format(platform.node(), platform.machine())
+
+
+def is_same_environment(baseline):
+    return baseline.get('host') == get_host() and baseline.get('python') == platform.python_version()
+
+
+def check(results, baseline, tolerance=None):
+    """Pages which have fewer fields right than the baseline and, if a tolerance is given, of which the best parse time
+    is slower than the baseline by more than the tolerance. Pages parse in around a millisecond, so the best time is
+    compared as the median is too noisy.
+    """
+    regressions = []
+    for engine, pages in results.items():
+        for name, result in pages.items():
+            before = baseline['engines'].get(engine, {}).get(name)
+            if before is None:
+                continue
+            if tolerance is not None and result['parse_best_ms'] > before['parse_best_ms'] * (1 + tolerance):
+                regressions.append("{} {}: parsed in {:.2f} ms, baseline {:.2f} ms".format(engine, name, result['parse_best_ms'], before['parse_best_ms']))
+            if result['correct'] < before['correct']:
+                regressions.append("{} {}: {} fields right, baseline {}".format(engine, name, result['correct'], before['correct']))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument('--engine', choices=url_metadata.ENGINES, action='append', help="Engine to measure, by default all of them.")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--record', help="History file to append the results to.")
+    parser.add_argument('--check', help="History file with the baseline to check the results against.")
+    parser.add_argument('--check-times', action='store_true', help="Also check parse times, if the baseline is of this host and Python.")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slow down of the best time, e.g. 0.25 is 25%%.")
+    parser.add_argument('--capture', nargs=2, metavar=('URL', 'NAME'), help="Add the head of a live page to the corpus.")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    if args.capture:
+        url, name = args.capture
+        print("Captured {} as {}, check its expected fields in golden.json: {}".format(url, name, capture(url, name)))
+        return
+
+    server, base_url = start_server()
+    try:
+        results = profile(base_url, get_pages(), args.engine or url_metadata.ENGINES, args.repeat)
+    finally:
+        server.shutdown()
+
+    print("{:<16} {:<30} {:>9} {:>9} {:>9} {:>7}  {}".format('engine', 'page', 'fetch ms', 'parse ms', 'peak KiB', 'fields', 'wrong'))
+    for engine, pages in results.items():
+        for name, result in pages.items():
+            print("{:<16} {:<30} {:>9.2f} {:>9.2f} {:>9.1f} {:>7}  {}".format(
+                engine, name, result['fetch_ms'], result['parse_ms'], result['peak_kib'],
+                "{}/{}".format(result['correct'], result['fields']), ", ".join(result['wrong'])
+            ))
+
+    for engine, pages in results.items():
+        summary = summarise(pages)
+        print("{}: {:.2f} ms to parse the corpus, {} pages per second, {:.1%} of fields right.".format(
+            engine, summary['parse_ms'], summary['pages_per_second'], summary['accuracy']
+        ))
+
+    if args.check:
+        baseline = get_last_entry(args.check)
+        if baseline is None:
+            print("No baseline in {}.".format(args.check))
+        else:
+            tolerance = None
+            if args.check_times and is_same_environment(baseline):
+                tolerance = args.tolerance
+            elif args.check_times:
+                print("Times not checked, the baseline was not recorded on this host and Python ({}, Python {}).".format(baseline.get('host'), baseline.get('python')))
+
+            regressions = check(results, baseline, tolerance)
+            for regression in regressions:
+                print("REGRESSION {} ({}).".format(regression, baseline['commit']))
+            if regressions:
+                sys.exit(1)
+            print("No regressions against the baseline of {} ({}).".format(baseline['date'], baseline['commit']))
+
+    if args.record:
+        entry = {
+            'date': datetime.date.today().isoformat(),
+            'commit': get_commit(),
+            'host': get_host(),
+            'python': platform.python_version(),
+            'engines': results
+        }
+        with open(args.record, 'a') as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+if __name__ == '__main__':
+    main()
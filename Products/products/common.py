@@ -1,15 +1,15 @@
 # A collection of methods that are common across all modules.
-import logging
+from products import encoder, logger, request
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-if logger.handlers:
-    handler = logger.handlers[0]
-    handler.setFormatter(logging.Formatter("[%(levelname)s]\t%(asctime)s.%(msecs)dZ\t%(aws_request_id)s\t%(module)s:%(funcName)s\t%(message)s\n", "%Y-%m-%dT%H:%M:%S"))
+log = logger.setup_logger()
 
 
 def create_response(code, body):
-    logger.info("Creating response with status code ({}) and body ({})".format(code, body))
+    """Response for API Gateway. The body is encoded as JSON, unless it is a string that has already been serialized."""
+    if not isinstance(body, str):
+        body = encoder.dumps(body)
+
+    log.info("Creating response with status code ({}) and body length ({})".format(code, len(body)))
     response = {'statusCode': code,
                 'body': body,
                 'headers': {
@@ -22,9 +22,9 @@ def create_response(code, body):
 def get_table_name(osenv):
     try:
         table_name = osenv['TABLE_NAME']
-        logger.info("TABLE_NAME environment variable value: " + table_name)
+        log.info("TABLE_NAME environment variable value: " + table_name)
     except KeyError:
-        logger.error('TABLE_NAME environment variable not set correctly.')
+        log.error('TABLE_NAME environment variable not set correctly.')
         raise Exception('TABLE_NAME environment variable not set correctly.')
 
     return table_name
@@ -33,9 +33,9 @@ def get_table_name(osenv):
 def get_table_index(osenv):
     try:
         index_name = osenv['INDEX_NAME']
-        logger.info("INDEX_NAME environment variable value: " + index_name)
+        log.info("INDEX_NAME environment variable value: " + index_name)
     except KeyError:
-        logger.error('INDEX_NAME environment variable not set correctly.')
+        log.error('INDEX_NAME environment variable not set correctly.')
         raise Exception('INDEX_NAME environment variable not set correctly.')
 
     return index_name
@@ -43,10 +43,10 @@ def get_table_index(osenv):
 
 def get_product_id(event):
     try:
-        product_id = event['pathParameters']['id']
-        logger.info("Product ID: " + product_id)
+        product_id = request.get_request(event).path_parameter('id')
+        log.info("Product ID: " + product_id)
     except Exception:
-        logger.error("API Event did not contain a Product ID in the path parameters.")
+        log.error("API Event did not contain a Product ID in the path parameters.")
         raise Exception('API Event did not contain a Product ID in the path parameters.')
 
     return product_id
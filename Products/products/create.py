@@ -1,19 +1,28 @@
-import json
 import os
-import boto3
-import logging
 import time
 import uuid
-from products import common
+from products import clients, common, logger, request, schema, warmup
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-if logger.handlers:
-    handler = logger.handlers[0]
-    handler.setFormatter(logging.Formatter("[%(levelname)s]\t%(asctime)s.%(msecs)dZ\t%(aws_request_id)s\t%(module)s:%(funcName)s\t%(message)s\n", "%Y-%m-%dT%H:%M:%S"))
+log = logger.setup_logger()
+
+clients.warm_up('dynamodb')
+
+SCHEMA = schema.compile_schema([
+    ('retailer', schema.string()),
+    ('brand', schema.string()),
+    ('details', schema.string()),
+    ('productUrl', schema.string()),
+    ('imageUrl', schema.string()),
+    ('price', schema.string(), False),
+    ('searchHidden', schema.boolean(), False)
+])
 
 
 def handler(event, context):
+    if warmup.is_warm_up(event):
+        return warmup.response(clients.prime())
+
+    logger.sample_request()
     response = create_main(event)
     return response
 
@@ -23,40 +32,29 @@ def create_main(event):
         table_name = common.get_table_name(os.environ)
         product_info = get_product_info(event)
         product_id = put_product(table_name, product_info)
+    except schema.ValidationError as e:
+        log.info("Request was not valid: {}".format(e))
+        return common.create_response(400, e.get_details())
     except Exception as e:
-        logger.error("Exception: {}".format(e))
-        response = common.create_response(500, json.dumps({'error': str(e)}))
-        logger.info("Returning response: {}".format(response))
+        log.error("Exception: {}".format(e))
+        response = common.create_response(500, {'error': str(e)})
+        log.info("Returning response: {}".format(response))
         return response
 
     data = {'productId': product_id, 'message': 'success'}
-    response = common.create_response(200, json.dumps(data))
+    response = common.create_response(200, data)
     return response
 
 
 def get_product_info(event):
-    if event['body'] == "null":
-        raise Exception('API Event Body was empty.')
-
-    try:
-        body = event['body']
-        logger.info("Event body: " + json.dumps(body))
-    except Exception:
-        logger.error("API Event was empty.")
-        raise Exception('API Event was empty.')
-
-    try:
-        attribute_details = json.loads(body)
-        logger.info("Attributes for create: " + json.dumps(attribute_details))
-    except Exception:
-        logger.error("API Event did not contain a valid body.")
-        raise Exception('API Event did not contain a valid body.')
+    attribute_details = schema.validate_body(request.get_request(event), SCHEMA, 'API Event did not contain a valid body.')
+    logger.log_payload(log, "Attributes for create: {}", attribute_details)
 
     return attribute_details
 
 
 def put_product(table_name, product_info):
-    dynamodb = boto3.client('dynamodb')
+    dynamodb = clients.get_client('dynamodb')
 
     product_id = str(uuid.uuid4())
     item = {
@@ -78,10 +76,10 @@ def put_product(table_name, product_info):
         item['searchHidden'] = {'BOOL': False}
 
     try:
-        logger.info("Product item to be put in table: {}".format(item))
+        logger.log_payload(log, "Product item to be put in table: {}", item)
         dynamodb.put_item(TableName=table_name, Item=item)
     except Exception as e:
-        logger.error("Product could not be created: {}".format(e))
+        log.error("Product could not be created: {}".format(e))
         raise Exception('Product could not be created.')
 
     return product_id
@@ -1,18 +1,17 @@
-import json
 import os
-import boto3
-import logging
-from products import common
+from products import clients, common, logger, warmup
 from botocore.exceptions import ClientError
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-if logger.handlers:
-    handler = logger.handlers[0]
-    handler.setFormatter(logging.Formatter("[%(levelname)s]\t%(asctime)s.%(msecs)dZ\t%(aws_request_id)s\t%(module)s:%(funcName)s\t%(message)s\n", "%Y-%m-%dT%H:%M:%S"))
+log = logger.setup_logger()
+
+clients.warm_up('dynamodb')
 
 
 def handler(event, context):
+    if warmup.is_warm_up(event):
+        return warmup.response(clients.prime())
+
+    logger.sample_request()
     response = delete_main(event)
     return response
 
@@ -23,19 +22,19 @@ def delete_main(event):
         product_id = common.get_product_id(event)
         delete_product(table_name, product_id)
     except Exception as e:
-        logger.error("Exception: {}".format(e))
-        response = common.create_response(500, json.dumps({'error': str(e)}))
-        logger.info("Returning response: {}".format(response))
+        log.error("Exception: {}".format(e))
+        response = common.create_response(500, {'error': str(e)})
+        log.info("Returning response: {}".format(response))
         return response
 
     data = {'deleted': True}
-    response = common.create_response(200, json.dumps(data))
+    response = common.create_response(200, data)
     return response
 
 
 def delete_product(table_name, product_id):
-    logger.info("Deleting Product ID: {}.".format(product_id))
-    dynamodb = boto3.client('dynamodb')
+    log.info("Deleting Product ID: {}.".format(product_id))
+    dynamodb = clients.get_client('dynamodb')
 
     key = {
         'productId': {'S': product_id},
@@ -46,9 +45,9 @@ def delete_product(table_name, product_id):
             TableName=table_name,
             Key=key,
         )
-        logger.info("Delete response: {}".format(response))
+        logger.log_payload(log, "Delete response: {}", response)
     except ClientError as e:
-        logger.error("Delete failed exception: " + e)
+        log.error("Delete failed exception: " + e)
         raise Exception("Product can not be deleted.")
 
     return True
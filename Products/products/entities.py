@@ -1,19 +1,39 @@
+def get_string(item, attribute):
+    if attribute not in item:
+        raise Exception("Item did not have a {} attribute.".format(attribute))
+
+    return item[attribute]['S']
+
+
 class Product:
+    __slots__ = ('productId', 'brand', 'details', 'imageUrl', 'productUrl', 'price', 'retailer')
 
     def __init__(self, item):
-        self.productId = item.get('productId').get('S')
-        self.brand = item.get('brand').get('S')
-        self.details = item.get('details').get('S')
-        self.imageUrl = item.get('imageUrl').get('S')
-        self.productUrl = item.get('productUrl').get('S')
-        if item.get('price'):
-            self.price = item.get('price').get('S')
-        if item.get('retailer'):
-            self.retailer = item.get('retailer').get('S')
+        for name, value in self.decode(item).items():
+            setattr(self, name, value)
 
     def __repr__(self):
         return "Product<{} -- {} -- {} -- {}>".format(self.productId, self.brand, self.details, self.productUrl)
 
+    @staticmethod
+    def decode(item):
+        """Decodes a table item straight into the details of a product, without creating a Product."""
+        product = {
+            'productId': get_string(item, 'productId'),
+            'brand': get_string(item, 'brand'),
+            'details': get_string(item, 'details'),
+            'imageUrl': get_string(item, 'imageUrl'),
+            'productUrl': get_string(item, 'productUrl')
+        }
+
+        if item.get('price'):
+            product['price'] = item['price']['S']
+
+        if item.get('retailer'):
+            product['retailer'] = item['retailer']['S']
+
+        return product
+
     def get_details(self):
         product = {
             'productId': self.productId,
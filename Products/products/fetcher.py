@@ -0,0 +1,165 @@
+# Fetches the head of a product page for its metadata. The page is streamed, and the download stops at the end of the
+# head, or when the page runs out of bytes or time, so that slow or very large pages cannot use the function timeout.
+import os
+import re
+import time
+from urllib.parse import urljoin
+from products import logger
+
+log = logger.setup_logger()
+
+# Deadlines for connecting, for the next bytes of the page and for the whole fetch, which leave time within the
+# function timeout to parse the page and respond. The total covers every connection, redirect and read, and no
+# connect or read waits longer than the time left of it.
+CONNECT_SECONDS = float(os.environ.get('FETCH_CONNECT_SECONDS', '0.5'))
+READ_SECONDS = float(os.environ.get('FETCH_READ_SECONDS', '1'))
+TOTAL_SECONDS = float(os.environ.get('FETCH_TOTAL_SECONDS', '2'))
+MAX_REDIRECTS = int(os.environ.get('FETCH_MAX_REDIRECTS', '3'))
+# Decompressed bytes after which the page is no longer read.
+MAX_BYTES = int(os.environ.get('FETCH_MAX_BYTES', str(512 * 1024)))
+CHUNK_BYTES = 16 * 1024
+
+HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.8',
+    'Accept-Encoding': 'gzip, deflate'
+}
+HTML_TYPES = ('text/html', 'application/xhtml+xml')
+
+HEAD_END = re.compile(rb'</head\s*>', re.IGNORECASE)
+META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+_session = None
+
+
+def get_session():
+    # requests is only imported by the first fetch, and its connection pool is reused by the fetches that follow.
+    global _session
+    if _session is None:
+        import requests
+        _session = requests.Session()
+
+    return _session
+
+
+def fetch_head(url):
+    """Html of the page, up to and including the end of its head."""
+    deadline = time.monotonic() + TOTAL_SECONDS
+
+    response = get_page(url, deadline)
+    try:
+        if response.status_code != 200:
+            raise Exception("Page responded with status {}.".format(response.status_code))
+
+        content_type = response.headers.get('Content-Type', 'text/html')
+        if not content_type.lower().startswith(HTML_TYPES):
+            raise Exception("Page was not html ({}).".format(content_type))
+
+        content, complete = read_head(read_chunks(response, deadline), deadline)
+    finally:
+        response.close()
+
+    if not complete:
+        log.info("Page head of {} was cut off after {} bytes.".format(url, len(content)))
+
+    return decode(content, response.encoding if 'charset' in content_type.lower() else None)
+
+
+def get_page(url, deadline):
+    """Streamed response of the url, of which redirects are followed up to MAX_REDIRECTS, within the deadline."""
+    session = get_session()
+
+    for _ in range(MAX_REDIRECTS + 1):
+        remaining = get_remaining(deadline)
+        response = session.get(
+            url, headers=HEADERS, stream=True, allow_redirects=False,
+            timeout=(min(CONNECT_SECONDS, remaining), min(READ_SECONDS, remaining))
+        )
+        if not response.is_redirect:
+            return response
+
+        url = urljoin(response.url, response.headers['Location'])
+        response.close()
+
+    raise Exception("Page redirected more than {} times.".format(MAX_REDIRECTS))
+
+
+def get_remaining(deadline):
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise Exception("Page took longer than {} seconds.".format(TOTAL_SECONDS))
+
+    return remaining
+
+
+def read_chunks(response, deadline):
+    """Decompressed chunks of the body, of which each read of the socket has the time left before the deadline as its
+    timeout. With urllib3 2, each chunk is one read of the socket, so that a page which trickles in its bytes cannot hold
+    the read past the deadline. urllib3 1.26, which botocore keeps on python3.8, has no read1, so its stream is read
+    instead, of which a chunk can take several reads of the socket.
+    """
+    from urllib3.exceptions import ReadTimeoutError
+
+    if hasattr(response.raw, 'read1'):
+        chunks = iter(lambda: response.raw.read1(CHUNK_BYTES, decode_content=True), b'')
+    else:
+        chunks = response.raw.stream(CHUNK_BYTES, decode_content=True)
+
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+
+        set_read_timeout(response, min(READ_SECONDS, remaining))
+        try:
+            chunk = next(chunks, b'')
+        except ReadTimeoutError:
+            log.info("Page stopped sending bytes before the deadline of {} seconds.".format(TOTAL_SECONDS))
+            return
+
+        if not chunk:
+            return
+
+        yield chunk
+
+
+def set_read_timeout(response, seconds):
+    # The socket of the connection. Responses which are not read from a socket, e.g. those of requests_mock, have none.
+    sock = getattr(getattr(response.raw, 'connection', None), 'sock', None)
+    if sock is not None:
+        sock.settimeout(seconds)
+
+
+def read_head(chunks, deadline):
+    """Bytes of the chunks up to the end of the head, or until MAX_BYTES or the deadline, and whether the end of the
+    head was found.
+    """
+    content = bytearray()
+    for chunk in chunks:
+        # Tags can be split between chunks, so the search starts a little before the new chunk.
+        start = max(len(content) - 8, 0)
+        content.extend(chunk)
+
+        match = HEAD_END.search(content, start)
+        if match:
+            return bytes(content[:match.end()]), True
+
+        if len(content) >= MAX_BYTES:
+            return bytes(content[:MAX_BYTES]), False
+
+        if time.monotonic() > deadline:
+            log.info("Page took longer than {} seconds.".format(TOTAL_SECONDS))
+            return bytes(content), False
+
+    return bytes(content), False
+
+
+def decode(content, encoding=None):
+    """Text of the page, in the charset of the Content-Type header, else of the meta charset tag, else utf-8."""
+    if encoding is None:
+        match = META_CHARSET.search(content)
+        encoding = match.group(1).decode('ascii') if match else 'utf-8'
+
+    try:
+        return content.decode(encoding, errors='replace')
+    except LookupError:
+        return content.decode('utf-8', errors='replace')
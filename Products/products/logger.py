@@ -1,10 +1,26 @@
+# The same module is in each service (lists, products, notfound, contact), which are deployed separately. The copies
+# must be kept identical, which Lists/tests/test_logger.py checks.
+import json
 import logging
+import os
+import random
 import sys
 
+# Verbose payloads (events, table responses, items) are only logged for a sample of requests, and are truncated to a
+# maximum length when they are.
+PAYLOAD_SAMPLE_RATE = float(os.environ.get('PAYLOAD_LOG_SAMPLE_RATE', '0.05'))
+PAYLOAD_MAX_LENGTH = int(os.environ.get('PAYLOAD_LOG_MAX_LENGTH', '1024'))
+
+# Level of the root logger, e.g. WARNING in steady state, where each invocation is described by its summary line.
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+
+# Whether the current request is sampled. Outside of an invocation (e.g. tests, local invokes) payloads are logged.
+_sampling = {'sampled': True}
+
 
 def setup_logger():
     logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
+    logger.setLevel(LOG_LEVEL)
     if logger.handlers:
         handler = logger.handlers[0]
         handler.setFormatter(logging.Formatter("[%(levelname)s]\t%(asctime)s.%(msecs)dZ\t%(aws_request_id)s\t%(module)s:%(funcName)s\t%(message)s\n", "%Y-%m-%dT%H:%M:%S"))
@@ -19,3 +35,60 @@ def setup_test_logger():
     logger.addHandler(stream_handler)
 
     return logger
+
+
+def truncate(value, max_length=None):
+    """String of a log argument, capped to a maximum length. Dicts and lists are written as JSON, which is encoded only
+    up to the maximum length, so that a large payload is not serialized in full to log the start of it.
+    """
+    max_length = max_length or PAYLOAD_MAX_LENGTH
+
+    if isinstance(value, (dict, list)):
+        chunks = []
+        length = 0
+        for chunk in json.JSONEncoder(default=str).iterencode(value):
+            chunks.append(chunk)
+            length += len(chunk)
+            if length > max_length:
+                return "{}... (truncated)".format(''.join(chunks)[:max_length])
+
+        return ''.join(chunks)
+
+    text = str(value)
+    if len(text) > max_length:
+        return "{}... ({} characters truncated)".format(text[:max_length], len(text) - max_length)
+
+    return text
+
+
+class LazyMessage:
+    """A log message whose arguments are only formatted, and truncated, if a handler writes the record."""
+    __slots__ = ('message', 'args')
+
+    def __init__(self, message, *args):
+        self.message = message
+        self.args = args
+
+    def __str__(self):
+        return self.message.format(*[truncate(arg) for arg in self.args])
+
+
+def lazy(message, *args):
+    return LazyMessage(message, *args)
+
+
+def sample_request(rate=None):
+    """Decides whether verbose payloads are logged for the request that is starting."""
+    rate = PAYLOAD_SAMPLE_RATE if rate is None else rate
+    _sampling['sampled'] = random.random() < rate
+    return _sampling['sampled']
+
+
+def is_sampled():
+    return _sampling['sampled']
+
+
+def log_payload(logger, message, *args, level=logging.INFO):
+    """Logs a message with verbose payload arguments, if the request is sampled and the level is enabled."""
+    if _sampling['sampled'] and logger.isEnabledFor(level):
+        logger.log(level, LazyMessage(message, *args))
@@ -0,0 +1,127 @@
+# Metadata of a page from a single pass of the standard library html tokenizer, rather than a BeautifulSoup tree. Only
+# the tags which url_metadata.parse_data uses are collected, in the containers of metadata_parser so that the results
+# of the two can be compared: og and meta tags, the page title, and the offers of JSON-LD products.
+import json
+from html.parser import HTMLParser
+
+JSON_LD_TYPE = 'application/ld+json'
+
+
+class StopParsing(Exception):
+    pass
+
+
+class MetaTokenizer(HTMLParser):
+    """Collects the og and meta keys wanted, up to the end of the head."""
+
+    def __init__(self, og_keys, meta_keys):
+        super().__init__(convert_charrefs=True)
+        self.og_keys = og_keys
+        self.meta_keys = meta_keys
+        self.metadata = {'og': {}, 'meta': {}, 'page': {}, 'jsonld': {}}
+        self._title = None
+        self._script = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'meta':
+            self.add_meta(dict(attrs))
+        elif tag == 'title' and 'title' not in self.metadata['page']:
+            self._title = []
+        elif tag == 'script' and (dict(attrs).get('type') or '').strip().lower() == JSON_LD_TYPE:
+            self._script = []
+
+    def handle_startendtag(self, tag, attrs):
+        if tag == 'meta':
+            self.add_meta(dict(attrs))
+
+    def handle_endtag(self, tag):
+        if tag == 'title' and self._title is not None:
+            self.metadata['page']['title'] = ''.join(self._title).strip()
+            self._title = None
+        elif tag == 'script' and self._script is not None:
+            self.add_json_ld(''.join(self._script))
+            self._script = None
+        elif tag == 'head':
+            raise StopParsing()
+
+    def handle_data(self, data):
+        if self._title is not None:
+            self._title.append(data)
+        elif self._script is not None:
+            self._script.append(data)
+
+    def add_meta(self, attrs):
+        # The key is the first of these attributes, as with metadata_parser.
+        for attribute in ('name', 'property', 'http-equiv'):
+            if attrs.get(attribute) is not None:
+                key = attrs[attribute].strip()
+                break
+        else:
+            return
+
+        value = attrs.get('content', attrs.get('value'))
+        if value is None:
+            return
+
+        og_key = (attrs.get('property') or '')[3:]
+        if (attrs.get('property') or '')[:3].lower() == 'og:' and og_key in self.og_keys:
+            add_value(self.metadata['og'], og_key, value)
+
+        if key in self.meta_keys:
+            add_value(self.metadata['meta'], key, value)
+
+    def add_json_ld(self, text):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return
+
+        for offer in get_offers(data):
+            price = offer.get('price', offer.get('lowPrice'))
+            if price is not None:
+                add_value(self.metadata['jsonld'], 'price', str(price))
+            if offer.get('priceCurrency'):
+                add_value(self.metadata['jsonld'], 'priceCurrency', str(offer['priceCurrency']))
+
+
+def add_value(container, key, value):
+    """Adds the value of a key, of which the first found is used, and further values are kept in a list."""
+    value = value.strip()
+    if key not in container:
+        container[key] = value
+    elif not isinstance(container[key], list):
+        if container[key] != value:
+            container[key] = [container[key], value]
+    elif value not in container[key]:
+        container[key].append(value)
+
+
+def get_offers(data):
+    """Offers of the products in JSON-LD data, which may be a list of items, or a graph."""
+    if isinstance(data, list):
+        return [offer for item in data for offer in get_offers(item)]
+
+    if not isinstance(data, dict):
+        return []
+
+    if '@graph' in data:
+        return get_offers(data['@graph'])
+
+    types = data.get('@type')
+    if 'Product' not in (types if isinstance(types, list) else [types]):
+        return []
+
+    offers = data.get('offers', [])
+    return [offer for offer in (offers if isinstance(offers, list) else [offers]) if isinstance(offer, dict)]
+
+
+def parse(html, og_keys, meta_keys):
+    """Metadata of the html, with only the og and meta keys given."""
+    tokenizer = MetaTokenizer(set(og_keys), set(meta_keys))
+    try:
+        tokenizer.feed(html)
+        tokenizer.close()
+    except StopParsing:
+        pass
+
+    return tokenizer.metadata
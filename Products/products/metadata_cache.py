@@ -0,0 +1,208 @@
+# Cache of the parsed metadata of product urls, keyed by the normalized url. A small LRU in the container sits in front
+# of the metadata cache table, of which items are removed by TTL. Metadata older than FRESH_SECONDS is still returned,
+# up to STALE_SECONDS, while one request claims the url and fetches it again. That request fetches inline, within the
+# fetcher's deadline, as a background thread would be frozen with the container once the response is sent; it falls
+# back to the stale metadata if the fetch fails, and the other requests return the stale metadata straight away.
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from botocore.exceptions import ClientError
+from products import clients, logger
+
+log = logger.setup_logger()
+
+FRESH_SECONDS = int(os.environ.get('METADATA_FRESH_SECONDS', '86400'))
+STALE_SECONDS = int(os.environ.get('METADATA_STALE_SECONDS', '604800'))
+# The LRU is re-read from the table after LOCAL_SECONDS, to pick up metadata revalidated by other containers.
+LOCAL_SIZE = 64
+LOCAL_SECONDS = 300
+# Seconds for which one container has the revalidation of a url, so that a stale url is only fetched once.
+REVALIDATE_SECONDS = 30
+
+# Query parameters which only track where a link was shared, so do not change the page.
+TRACKING_PARAMETERS = ('utm_', 'gclid', 'fbclid', 'mc_cid', 'mc_eid', '_ga')
+DEFAULT_PORTS = {'http': ':80', 'https': ':443'}
+
+_local = OrderedDict()
+_lock = threading.Lock()
+_revalidating = set()
+
+
+def normalize_url(url):
+    """The url of a page, without the differences which do not change the page: the case of the scheme and host,
+    default ports, fragments, tracking parameters and the order of the other parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if netloc.endswith(DEFAULT_PORTS.get(scheme, '#')):
+        netloc = netloc[:-len(DEFAULT_PORTS[scheme])]
+
+    parameters = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True) if not name.lower().startswith(TRACKING_PARAMETERS)]
+    query = urlencode(sorted(parameters))
+
+    return urlunsplit((scheme, netloc, parts.path or '/', query, ''))
+
+
+def get_key(normalized_url):
+    """Table key of a url. Urls can be longer than a partition key may be, so the key is a hash of the url."""
+    return hashlib.sha256(normalized_url.encode('utf-8')).hexdigest()
+
+
+def get_metadata(url, fetch):
+    """Metadata of the url, from the cache or, if it has none or it has expired, from fetch(url)."""
+    normalized_url = normalize_url(url)
+    key = get_key(normalized_url)
+    entry = get_entry(key)
+    age = time.time() - entry['fetchedAt'] if entry is not None else None
+
+    if entry is not None and age < FRESH_SECONDS:
+        log.info("Metadata cache hit for {} ({} seconds old).".format(normalized_url, int(age)))
+        return entry['metadata']
+
+    if entry is not None and age < STALE_SECONDS:
+        log.info("Metadata cache hit for {} is stale ({} seconds old).".format(normalized_url, int(age)))
+        metadata = revalidate(key, url, normalized_url, fetch)
+        return metadata if metadata is not None else entry['metadata']
+
+    log.info("Metadata cache miss for {}.".format(normalized_url))
+    metadata = fetch(url)
+    store(key, normalized_url, metadata)
+    return metadata
+
+
+def get_entry(key):
+    entry = get_local(key)
+    if entry is None:
+        entry = get_stored(key)
+        if entry is not None:
+            put_local(key, entry)
+
+    return entry
+
+
+def get_local(key):
+    with _lock:
+        local = _local.get(key)
+        if local is None or local[0] < time.monotonic():
+            _local.pop(key, None)
+            return None
+
+        _local.move_to_end(key)
+        return local[1]
+
+
+def put_local(key, entry):
+    with _lock:
+        _local[key] = (time.monotonic() + LOCAL_SECONDS, entry)
+        _local.move_to_end(key)
+        while len(_local) > LOCAL_SIZE:
+            _local.popitem(last=False)
+
+    return True
+
+
+def get_stored(key):
+    table_name = os.environ.get('CACHE_TABLE_NAME')
+    if not table_name:
+        return None
+
+    dynamodb = clients.get_client('dynamodb')
+    try:
+        response = dynamodb.get_item(TableName=table_name, Key={'urlKey': {'S': key}}, ProjectionExpression='metadata, fetchedAt')
+    except ClientError as e:
+        log.info("Metadata cache could not be read: {}".format(e))
+        return None
+
+    # Items are deleted by TTL some time after they expire, so are ignored once they are past STALE_SECONDS.
+    if 'Item' not in response or time.time() - float(response['Item']['fetchedAt']['N']) >= STALE_SECONDS:
+        return None
+
+    return {'metadata': json.loads(response['Item']['metadata']['S']), 'fetchedAt': float(response['Item']['fetchedAt']['N'])}
+
+
+def store(key, normalized_url, metadata):
+    fetched_at = int(time.time())
+    put_local(key, {'metadata': metadata, 'fetchedAt': fetched_at})
+
+    table_name = os.environ.get('CACHE_TABLE_NAME')
+    if not table_name:
+        return False
+
+    dynamodb = clients.get_client('dynamodb')
+    try:
+        dynamodb.put_item(
+            TableName=table_name,
+            Item={
+                'urlKey': {'S': key},
+                'url': {'S': normalized_url},
+                'metadata': {'S': json.dumps(metadata)},
+                'fetchedAt': {'N': str(fetched_at)},
+                'expiresAt': {'N': str(fetched_at + STALE_SECONDS)}
+            }
+        )
+    except ClientError as e:
+        log.info("Metadata cache could not be written: {}".format(e))
+        return False
+
+    return True
+
+
+def claim_revalidation(key):
+    """Whether this container may revalidate the url, which only one container does at a time."""
+    table_name = os.environ.get('CACHE_TABLE_NAME')
+    if not table_name:
+        return True
+
+    now = int(time.time())
+    dynamodb = clients.get_client('dynamodb')
+    try:
+        dynamodb.update_item(
+            TableName=table_name,
+            Key={'urlKey': {'S': key}},
+            UpdateExpression="set revalidatingUntil = :until",
+            ConditionExpression="attribute_exists(urlKey) AND (attribute_not_exists(revalidatingUntil) OR revalidatingUntil < :now)",
+            ExpressionAttributeValues={':until': {'N': str(now + REVALIDATE_SECONDS)}, ':now': {'N': str(now)}}
+        )
+    except ClientError as e:
+        log.info("Revalidation of metadata was not claimed: {}".format(e))
+        return False
+
+    return True
+
+
+def revalidate(key, url, normalized_url, fetch):
+    """Fetches and stores the metadata of a stale url, if no other request is revalidating it. Returns the metadata, or
+    None if the url was not revalidated.
+    """
+    with _lock:
+        if key in _revalidating:
+            return None
+        _revalidating.add(key)
+
+    try:
+        if not claim_revalidation(key):
+            return None
+
+        log.info("Revalidating metadata for {}.".format(normalized_url))
+        metadata = fetch(url)
+        store(key, normalized_url, metadata)
+        return metadata
+    except Exception as e:
+        log.info("Revalidation of metadata for {} failed: {}".format(normalized_url, e))
+        return None
+    finally:
+        with _lock:
+            _revalidating.discard(key)
+
+
+def reset():
+    with _lock:
+        _local.clear()
+        _revalidating.clear()
+
+    return True
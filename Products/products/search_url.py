@@ -1,19 +1,17 @@
-import json
 import os
 import re
-import boto3
-import logging
-from products import common
-from urllib.parse import unquote
+from products import clients, common, logger, request, warmup
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-if logger.handlers:
-    handler = logger.handlers[0]
-    handler.setFormatter(logging.Formatter("[%(levelname)s]\t%(asctime)s.%(msecs)dZ\t%(aws_request_id)s\t%(module)s:%(funcName)s\t%(message)s\n", "%Y-%m-%dT%H:%M:%S"))
+log = logger.setup_logger()
+
+clients.warm_up('dynamodb')
 
 
 def handler(event, context):
+    if warmup.is_warm_up(event):
+        return warmup.response(clients.prime())
+
+    logger.sample_request()
     response = search_main(event)
     return response
 
@@ -28,13 +26,13 @@ def search_main(event):
         if search_hidden(product):
             product.clear()
     except Exception as e:
-        logger.error("Exception: {}".format(e))
-        response = common.create_response(500, json.dumps({'error': str(e)}))
-        logger.info("Returning response: {}".format(response))
+        log.error("Exception: {}".format(e))
+        response = common.create_response(500, {'error': str(e)})
+        log.info("Returning response: {}".format(response))
         return response
 
     data = {'product': product}
-    response = common.create_response(200, json.dumps(data))
+    response = common.create_response(200, data)
     return response
 
 
@@ -48,21 +46,21 @@ def search_hidden(product):
 
 def get_url(event):
     try:
-        url = event['pathParameters']['url']
-        logger.info("Encoded URL: " + url)
+        event_request = request.get_request(event)
+        log.info("Encoded URL: " + event_request.path_parameter('url'))
     except Exception:
-        logger.error("API Event did not contain a Url in the path parameters.")
+        log.error("API Event did not contain a Url in the path parameters.")
         raise Exception('API Event did not contain a Url in the path parameters.')
 
-    url = unquote(url)
-    logger.info("Decoded URL: " + url)
+    url = event_request.unquoted_path_parameter('url')
+    log.info("Decoded URL: " + url)
 
     return url
 
 
 def url_query(table_name, index_name, url):
-    logger.info("Querying table for product with url {}.".format(url))
-    dynamodb = boto3.client('dynamodb')
+    log.info("Querying table for product with url {}.".format(url))
+    dynamodb = clients.get_client('dynamodb')
 
     try:
         response = dynamodb.query(
@@ -72,13 +70,13 @@ def url_query(table_name, index_name, url):
             ExpressionAttributeValues={":u":  {'S': url}}
         )
     except Exception as e:
-        logger.info("get item response: " + json.dumps(e.response))
+        log.info(logger.lazy("get item response: {}", e.response))
         raise Exception("Unexpected error when searching for product.")
 
-    logger.info("Response: " + json.dumps(response))
+    logger.log_payload(log, "Response: {}", response)
 
     if len(response['Items']) == 0:
-        logger.info("No query results for url {}.".format(url))
+        log.info("No query results for url {}.".format(url))
         return {}
 
     product = {}
@@ -101,7 +99,7 @@ def url_query(table_name, index_name, url):
 
 
 def parse_url(url):
-    logger.info("Parsing URL: " + url)
+    log.info("Parsing URL: " + url)
 
     try:
         # General -  Chop off anything after and including ?
@@ -115,8 +113,8 @@ def parse_url(url):
             product_code = product_code.group(1)
             url = 'https://www.amazon.co.uk' + product_code
     except Exception as e:
-        logger.info("There was an issue parsing the url: " + str(e))
+        log.info("There was an issue parsing the url: " + str(e))
         return url
 
-    logger.info("Parsed URL: " + url)
+    log.info("Parsed URL: " + url)
     return url
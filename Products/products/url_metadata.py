@@ -1,11 +1,11 @@
-import json
-import metadata_parser
+import os
 import re
-from urllib.parse import unquote
-from products import common, logger
+from products import clients, common, fetcher, logger, meta_tokenizer, metadata_cache, request, warmup
 
 log = logger.setup_logger()
 
+clients.warm_up('dynamodb')
+
 
 attr_map = {
     'site_name': [
@@ -26,15 +26,22 @@ attr_map = {
     'price': [
         {'meta': 'product:price:amount'},
         {'meta': 'og:price:amount'},
-        {'og': 'price:amount'}
+        {'og': 'price:amount'},
+        {'jsonld': 'price'}
     ],
     'currency': [
         {'meta': 'product:price:currency'},
         {'meta': 'og:price:currency'},
-        {'og': 'price:currency'}
+        {'og': 'price:currency'},
+        {'jsonld': 'priceCurrency'}
     ]
 }
 
+# Engines which extract the metadata from the page. The engine can be chosen per request, with the engine query
+# parameter, to compare the results of the tokenizer with those of metadata_parser.
+ENGINES = ('metadata_parser', 'tokenizer')
+DEFAULT_ENGINE = os.environ.get('METADATA_ENGINE', 'metadata_parser')
+
 title_regex_rules = [
     '^Buy ',
     ' at KIDLY UK$'
@@ -42,17 +49,24 @@ title_regex_rules = [
 
 
 def handler(event, context):
+    if warmup.is_warm_up(event):
+        return warmup.response(clients.prime())
+
+    logger.sample_request()
     try:
         url = get_url(event)
+        engine = get_engine(event)
         if blocked_urls(url):
             data = {}
+        elif engine == DEFAULT_ENGINE:
+            data = metadata_cache.get_metadata(url, fetch)
         else:
-            data = query(url)
-            data = parse_data(data)
-        response = common.create_response(200, json.dumps(data))
+            # The cache holds the results of the default engine, so other engines always fetch the page.
+            data = fetch(url, engine)
+        response = common.create_response(200, data)
     except Exception as e:
         log.error("Exception: {}".format(e))
-        response = common.create_response(500, json.dumps({'error': str(e)}))
+        response = common.create_response(500, {'error': str(e)})
         return response
 
     return response
@@ -68,22 +82,38 @@ def blocked_urls(url):
 
 def get_url(event):
     try:
-        url = event['pathParameters']['url']
-        log.info("Encoded URL: " + url)
+        event_request = request.get_request(event)
+        log.info("Encoded URL: " + event_request.path_parameter('url'))
     except Exception:
         raise Exception('API Event did not contain a Url in the path parameters.')
 
-    url = unquote(url)
+    url = event_request.unquoted_path_parameter('url')
     log.info("Decoded URL: " + url)
 
     return url
 
 
-def query(url):
+def get_engine(event):
+    engine = request.get_request(event).query_parameter('engine', DEFAULT_ENGINE)
+    if engine not in ENGINES:
+        raise Exception("Metadata engine was not one of: {}.".format(", ".join(ENGINES)))
+
+    return engine
+
+
+def fetch(url, engine=DEFAULT_ENGINE):
+    return parse_data(query(url, engine))
+
+
+def query(url, engine=DEFAULT_ENGINE):
     try:
-        page = metadata_parser.MetadataParser(url=url, support_malformed=True, search_head_only=True)
-        metadata = page.metadata
-        log.info("Metadata: " + json.dumps(metadata))
+        # The page is fetched with our own limits, and the parser only given its head.
+        html = fetcher.fetch_head(url)
+        if engine == 'tokenizer':
+            metadata = tokenize(html)
+        else:
+            metadata = parse(url, html)
+        logger.log_payload(log, "Metadata: {}", metadata)
     except Exception as e:
         log.info("Exception: " + str(e))
         raise Exception("Metadata query failed.")
@@ -91,6 +121,21 @@ def query(url):
     return metadata
 
 
+def parse(url, html):
+    # metadata_parser pulls in BeautifulSoup, so is only imported by the first query which uses it, as blocked urls,
+    # bad requests and the tokenizer never need it.
+    import metadata_parser
+
+    page = metadata_parser.MetadataParser(url=url, html=html, support_malformed=True, search_head_only=True)
+    return page.metadata
+
+
+def tokenize(html):
+    og_keys = [keys['og'] for rules in attr_map.values() for keys in rules if 'og' in keys]
+    meta_keys = [keys['meta'] for rules in attr_map.values() for keys in rules if 'meta' in keys]
+    return meta_tokenizer.parse(html, og_keys, meta_keys)
+
+
 def parse_data(data):
     response = {}
 
@@ -99,7 +144,7 @@ def parse_data(data):
         for key_names in attr_map[a]:
             for key in key_names.keys():
                 name = key_names[key]
-                if name in data[key]:
+                if name in data.get(key, {}):
                     response[a] = update_response(response, a, data[key][name])
 
     # Exceptional rules
@@ -2,6 +2,15 @@ import pytest
 import boto3
 import json
 from moto import mock_dynamodb2
+from products import clients, logger, metadata_cache
+
+
+@pytest.fixture(autouse=True)
+def reset_clients():
+    clients.reset()
+    metadata_cache.reset()
+    yield
+    logger.sample_request(1)
 
 
 @pytest.fixture
@@ -105,10 +105,22 @@ class TestCreateMain:
         body = json.loads(response['body'])
         assert body['error'] == 'API Event did not contain a valid body.', "Create main response did not contain the correct error message."
 
+    def test_with_invalid_body(self, monkeypatch, api_create_event, empty_table):
+        monkeypatch.setitem(os.environ, 'TABLE_NAME', 'products-unittest')
+        api_create_event['body'] = json.dumps({"retailer": "amazon.co.uk", "brand": "BABYBJÖRN", "details": "Travel Cot", "productUrl": "https://www.amazon.co.uk/dp/B01H24LM58", "searchHidden": "true"})
+
+        response = create.create_main(api_create_event)
+        assert response['statusCode'] == 400, "Status code was not as expected."
+        body = json.loads(response['body'])
+        assert body['errors'] == [
+            {'field': 'imageUrl', 'error': 'is required'},
+            {'field': 'searchHidden', 'error': 'must be true or false'}
+        ], "Field errors were not as expected."
+
 
 def test_handler(api_create_event, monkeypatch, empty_table):
     monkeypatch.setitem(os.environ, 'TABLE_NAME', 'products-unittest')
     response = create.handler(api_create_event, None)
     assert response['statusCode'] == 200
     assert response['headers'] == {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
-    assert re.match('{"productId": .*}', response['body'])
+    assert re.match('{"productId": ?.*}', response['body'])
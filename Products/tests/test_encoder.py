@@ -0,0 +1,25 @@
+import json
+import pytest
+from products import encoder
+
+
+@pytest.fixture(autouse=True)
+def restore_encoder():
+    current = encoder.encoder
+    yield
+    encoder.encoder = current
+
+
+@pytest.mark.parametrize("name", sorted(encoder.ENCODERS))
+def test_encoders_agree(name):
+    obj = {'productId': '12345678-prod-0001-1234-abcdefghijkl', 'brand': 'BABYBJÖRN', 'price': None}
+    assert json.loads(encoder.get_encoder(name)(obj)) == obj, "Decoded object was not as expected."
+
+
+def test_unknown_encoder():
+    assert encoder.get_encoder('not-an-encoder') is encoder.encode_json, "Encoder was not as expected."
+
+
+def test_set_encoder():
+    encoder.set_encoder('json')
+    assert encoder.dumps({'a': 1}) == '{"a": 1}', "Encoded object was not as expected."
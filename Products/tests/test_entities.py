@@ -28,3 +28,12 @@ class TestProduct:
         assert product['productUrl'] == 'https://www.amazon.co.uk/dp/B01H24LM58', "Product url not as expected."
         assert product['price'] == '100.00', "Product price not as expected."
         assert product['retailer'] == 'amazon.co.uk', "Product price not as expected."
+
+    def test_decode(self, response_item):
+        assert Product.decode(response_item) == Product(response_item).get_details(), "Decoded product was not as expected."
+
+    def test_decode_with_missing_attribute(self, response_item):
+        del response_item['brand']
+        with pytest.raises(Exception) as e:
+            Product.decode(response_item)
+        assert str(e.value) == "Item did not have a brand attribute.", "Exception message not correct."
@@ -0,0 +1,138 @@
+import pytest
+import gzip
+import os
+import threading
+import time
+import requests_mock
+import urllib3
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from products import fetcher, logger
+
+log = logger.setup_test_logger()
+
+URL = "https://www.example.com/product/1"
+HEAD = b'<html><head><meta property="og:title" content="Snowman Knitted Romper"></head>'
+BODY = b'<body>' + b'<p>Product</p>' * 1000 + b'</body></html>'
+
+
+@pytest.fixture
+def page():
+    with requests_mock.Mocker() as m:
+        yield m
+
+
+class TrickleHandler(BaseHTTPRequestHandler):
+    """Sends the head of a page one byte at a time, each sooner than the read timeout, and never ends it."""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', '100000')
+        self.end_headers()
+        try:
+            for byte in b'<html><head>' * 1000:
+                self.wfile.write(bytes([byte]))
+                self.wfile.flush()
+                time.sleep(0.05)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def trickle_url(monkeypatch):
+    # Requests to the local server must not go through a proxy of the environment.
+    monkeypatch.setitem(os.environ, 'NO_PROXY', '127.0.0.1')
+    server = ThreadingHTTPServer(('127.0.0.1', 0), TrickleHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield "http://127.0.0.1:{}/product/1".format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+class TestFetchHead:
+    def test_page_is_cut_off_after_head(self, page):
+        page.get(URL, content=HEAD + BODY, headers={'Content-Type': 'text/html; charset=utf-8'})
+        assert fetcher.fetch_head(URL) == HEAD.decode('utf-8'), "Html was not as expected."
+
+    def test_compressed_page_is_decompressed(self, page):
+        page.get(URL, content=gzip.compress(HEAD + BODY), headers={'Content-Type': 'text/html', 'Content-Encoding': 'gzip'})
+        assert fetcher.fetch_head(URL) == HEAD.decode('utf-8'), "Html was not as expected."
+
+    def test_page_without_head_end_is_cut_off_at_max_bytes(self, page, monkeypatch):
+        monkeypatch.setattr(fetcher, 'MAX_BYTES', 1000)
+        monkeypatch.setattr(fetcher, 'CHUNK_BYTES', 256)
+        page.get(URL, content=b'<html><head>' + BODY, headers={'Content-Type': 'text/html'})
+        assert len(fetcher.fetch_head(URL)) == 1000, "Html was not cut off at the byte budget."
+
+    def test_error_status(self, page):
+        page.get(URL, status_code=403, text="Forbidden")
+        with pytest.raises(Exception) as e:
+            fetcher.fetch_head(URL)
+        assert str(e.value) == "Page responded with status 403.", "Exception not as expected."
+
+    def test_not_html(self, page):
+        page.get(URL, content=b'%PDF', headers={'Content-Type': 'application/pdf'})
+        with pytest.raises(Exception) as e:
+            fetcher.fetch_head(URL)
+        assert str(e.value) == "Page was not html (application/pdf).", "Exception not as expected."
+
+    @pytest.mark.skipif(not hasattr(urllib3.HTTPResponse, 'read1'), reason="urllib3 1.26 reads a chunk in several reads of the socket.")
+    def test_trickled_page_is_cut_off_at_the_deadline(self, trickle_url, monkeypatch):
+        monkeypatch.setattr(fetcher, 'READ_SECONDS', 0.5)
+        monkeypatch.setattr(fetcher, 'TOTAL_SECONDS', 0.5)
+
+        start = time.monotonic()
+        html = fetcher.fetch_head(trickle_url)
+        assert time.monotonic() - start < 1, "Fetch was not stopped at the deadline."
+        assert html.startswith('<html><h') and len(html) < 100, "Html was not cut off at the deadline."
+
+    def test_redirect_is_followed(self, page):
+        page.get(URL, status_code=301, headers={'Location': '/product/2'})
+        page.get("https://www.example.com/product/2", content=HEAD, headers={'Content-Type': 'text/html'})
+        assert fetcher.fetch_head(URL) == HEAD.decode('utf-8'), "Html was not as expected."
+
+    def test_redirects_are_limited(self, page):
+        page.get(URL, status_code=302, headers={'Location': URL})
+        with pytest.raises(Exception) as e:
+            fetcher.fetch_head(URL)
+        assert str(e.value) == "Page redirected more than 3 times.", "Exception not as expected."
+        assert page.call_count == 4, "Redirects were not limited."
+
+    def test_redirects_count_against_the_deadline(self, page, monkeypatch):
+        monkeypatch.setattr(fetcher, 'TOTAL_SECONDS', 0)
+        page.get(URL, status_code=302, headers={'Location': URL})
+        with pytest.raises(Exception) as e:
+            fetcher.fetch_head(URL)
+        assert str(e.value) == "Page took longer than 0 seconds.", "Exception not as expected."
+
+
+class TestReadHead:
+    def test_head_end_split_between_chunks(self):
+        content, complete = fetcher.read_head([b'<head><title>A</title></he', b'ad><body>'], fetcher.time.monotonic() + 5)
+        assert content == b'<head><title>A</title></head>', "Content was not as expected."
+        assert complete, "End of head was not found."
+
+    def test_head_end_is_not_case_sensitive(self):
+        content, complete = fetcher.read_head([b'<HEAD></HEAD ><BODY>'], fetcher.time.monotonic() + 5)
+        assert content == b'<HEAD></HEAD >', "Content was not as expected."
+
+    def test_deadline(self):
+        content, complete = fetcher.read_head([b'<head>', b'<title>'], fetcher.time.monotonic() - 1)
+        assert content == b'<head>', "Content was not cut off at the deadline."
+        assert not complete, "End of head should not have been found."
+
+
+class TestDecode:
+    def test_header_encoding(self):
+        assert fetcher.decode('£34'.encode('latin-1'), 'ISO-8859-1') == '£34', "Text was not as expected."
+
+    def test_meta_charset(self):
+        content = '<meta charset="windows-1252"><title>£34</title>'.encode('cp1252')
+        assert fetcher.decode(content) == '<meta charset="windows-1252"><title>£34</title>', "Text was not as expected."
+
+    def test_unknown_charset_is_utf8(self):
+        assert fetcher.decode('<meta charset="unknown"><title>£34</title>'.encode('utf-8')) == '<meta charset="unknown"><title>£34</title>', "Text was not as expected."
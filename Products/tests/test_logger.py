@@ -0,0 +1,29 @@
+import logging
+import pytest
+from products import logger
+
+log = logger.setup_test_logger()
+
+
+@pytest.fixture(autouse=True)
+def sampled():
+    logger.sample_request(1)
+    yield
+    logger.sample_request(1)
+
+
+def test_truncate():
+    assert logger.truncate('x' * 30, 10) == 'xxxxxxxxxx... (20 characters truncated)', "Value was not truncated."
+
+
+def test_payload_is_logged_when_sampled(caplog):
+    with caplog.at_level(logging.INFO):
+        logger.log_payload(log, "Response: {}", {'Item': {'productId': {'S': '1'}}})
+    assert 'Response: {"Item": {"productId": {"S": "1"}}}' in caplog.messages, "Payload was not logged."
+
+
+def test_payload_is_not_logged_when_not_sampled(caplog):
+    logger.sample_request(0)
+    with caplog.at_level(logging.INFO):
+        logger.log_payload(log, "Response: {}", {'Item': {'productId': {'S': '1'}}})
+    assert caplog.messages == [], "Payload should not have been logged."
@@ -0,0 +1,81 @@
+import pytest
+from products import meta_tokenizer, url_metadata, logger
+
+log = logger.setup_test_logger()
+
+OG_KEYS = ['site_name', 'image', 'title', 'price:amount']
+META_KEYS = ['og:image', 'product:price:amount', 'product:price:currency']
+
+
+@pytest.fixture
+def html():
+    return """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <title>Snowman Knitted Romper | Newborn &amp; Unisex | The White Company UK</title>
+  <meta charset="utf-8">
+  <meta property="og:title" content=" Snowman Knitted Romper " />
+  <meta property="og:image" content="https://example.com/1.jpg">
+  <meta property="og:image" content="https://example.com/2.jpg">
+  <meta property="og:description" content="Not collected">
+  <meta property="product:price:amount" content="34.0">
+  <meta name="product:price:currency" content="GBP">
+  <script type="application/ld+json">
+    {"@context": "https://schema.org", "@type": "Product", "name": "Snowman Knitted Romper",
+     "offers": {"@type": "Offer", "price": 34, "priceCurrency": "GBP"}}
+  </script>
+</head>
+<body>
+  <meta property="og:site_name" content="After the head">
+</body>
+</html>"""
+
+
+class TestParse:
+    def test_og_keys(self, html):
+        metadata = meta_tokenizer.parse(html, OG_KEYS, META_KEYS)
+        assert metadata['og'] == {'title': 'Snowman Knitted Romper', 'image': ['https://example.com/1.jpg', 'https://example.com/2.jpg']}, "Og was not as expected."
+
+    def test_meta_keys(self, html):
+        metadata = meta_tokenizer.parse(html, OG_KEYS, META_KEYS)
+        # As with metadata_parser, property tags are also meta tags, keyed by the property.
+        assert metadata['meta'] == {
+            'og:image': ['https://example.com/1.jpg', 'https://example.com/2.jpg'],
+            'product:price:amount': '34.0',
+            'product:price:currency': 'GBP'
+        }, "Meta was not as expected."
+
+    def test_page_title(self, html):
+        metadata = meta_tokenizer.parse(html, OG_KEYS, META_KEYS)
+        assert metadata['page'] == {'title': 'Snowman Knitted Romper | Newborn & Unisex | The White Company UK'}, "Page was not as expected."
+
+    def test_json_ld_offers(self, html):
+        metadata = meta_tokenizer.parse(html, OG_KEYS, META_KEYS)
+        assert metadata['jsonld'] == {'price': '34', 'priceCurrency': 'GBP'}, "JSON-LD was not as expected."
+
+    def test_tags_after_head_are_ignored(self, html):
+        metadata = meta_tokenizer.parse(html, OG_KEYS, META_KEYS)
+        assert 'site_name' not in metadata['og'], "Tag after the head should not have been collected."
+
+    def test_page_without_head(self):
+        metadata = meta_tokenizer.parse('<p>Not a page', OG_KEYS, META_KEYS)
+        assert metadata == {'og': {}, 'meta': {}, 'page': {}, 'jsonld': {}}, "Metadata was not as expected."
+
+    def test_same_data_as_metadata_parser(self, html):
+        url = "https://www.thewhitecompany.com/uk/Snowman-Knitted-Romper/p/SNTOO"
+        tokenized = url_metadata.parse_data(url_metadata.tokenize(html))
+        parsed = url_metadata.parse_data(url_metadata.parse(url, html))
+        assert tokenized == parsed, "Data was not the same as that of metadata_parser."
+
+
+class TestGetOffers:
+    def test_graph(self):
+        data = {'@graph': [{'@type': 'WebPage'}, {'@type': ['Product'], 'offers': [{'price': '10.00'}, {'price': '12.00'}]}]}
+        assert meta_tokenizer.get_offers(data) == [{'price': '10.00'}, {'price': '12.00'}], "Offers were not as expected."
+
+    def test_not_a_product(self):
+        assert meta_tokenizer.get_offers({'@type': 'Organization', 'offers': {'price': '10.00'}}) == [], "Offers were not as expected."
+
+    def test_invalid_json_is_ignored(self):
+        metadata = meta_tokenizer.parse('<head><script type="application/ld+json">{"@type": </script></head>', OG_KEYS, META_KEYS)
+        assert metadata['jsonld'] == {}, "JSON-LD was not as expected."
@@ -0,0 +1,147 @@
+import pytest
+import os
+import json
+import time
+import boto3
+from moto import mock_dynamodb2
+from products import metadata_cache, logger
+
+log = logger.setup_test_logger()
+
+URL = "https://www.thewhitecompany.com/uk/Snowman-Knitted-Romper/p/SNTOO"
+METADATA = {"title": "Snowman Knitted Romper", "price": "34.00"}
+
+
+@pytest.fixture
+def cache_table(monkeypatch):
+    monkeypatch.setitem(os.environ, 'CACHE_TABLE_NAME', 'metadata-cache-unittest')
+
+    with mock_dynamodb2():
+        dynamodb = boto3.client('dynamodb', region_name='eu-west-1')
+        dynamodb.create_table(
+            TableName='metadata-cache-unittest',
+            KeySchema=[{'AttributeName': 'urlKey', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'urlKey', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        yield dynamodb
+
+
+@pytest.fixture
+def fetches():
+    urls = []
+
+    def fetch(url):
+        urls.append(url)
+        return dict(METADATA, fetch=len(urls))
+
+    fetch.urls = urls
+    return fetch
+
+
+def put_cached(dynamodb, age, metadata=METADATA):
+    fetched_at = int(time.time()) - age
+    dynamodb.put_item(TableName='metadata-cache-unittest', Item={
+        'urlKey': {'S': metadata_cache.get_key(metadata_cache.normalize_url(URL))},
+        'url': {'S': URL},
+        'metadata': {'S': json.dumps(metadata)},
+        'fetchedAt': {'N': str(fetched_at)},
+        'expiresAt': {'N': str(fetched_at + metadata_cache.STALE_SECONDS)}
+    })
+
+
+def get_cached(dynamodb):
+    key = metadata_cache.get_key(metadata_cache.normalize_url(URL))
+    return dynamodb.get_item(TableName='metadata-cache-unittest', Key={'urlKey': {'S': key}})['Item']
+
+
+class TestNormalizeUrl:
+    def test_scheme_and_host_are_lower_case(self):
+        assert metadata_cache.normalize_url("HTTPS://WWW.Example.com/Path") == "https://www.example.com/Path", "Url was not as expected."
+
+    def test_tracking_parameters_and_fragment_are_removed(self):
+        url = "https://www.example.com/p/1?utm_source=email&swatch=White&fbclid=abc#reviews"
+        assert metadata_cache.normalize_url(url) == "https://www.example.com/p/1?swatch=White", "Url was not as expected."
+
+    def test_parameters_are_sorted(self):
+        assert metadata_cache.normalize_url("https://example.com/p?b=2&a=1") == metadata_cache.normalize_url("https://example.com/p?a=1&b=2"), "Urls were not the same."
+
+    def test_default_port_is_removed(self):
+        assert metadata_cache.normalize_url("https://example.com:443") == "https://example.com/", "Url was not as expected."
+
+
+class TestGetMetadata:
+    def test_miss_is_fetched_and_stored(self, cache_table, fetches):
+        assert metadata_cache.get_metadata(URL, fetches) == dict(METADATA, fetch=1), "Metadata was not as expected."
+
+        item = get_cached(cache_table)
+        assert json.loads(item['metadata']['S']) == dict(METADATA, fetch=1), "Stored metadata was not as expected."
+        assert int(item['expiresAt']['N']) == int(item['fetchedAt']['N']) + metadata_cache.STALE_SECONDS, "Expiry was not as expected."
+
+    def test_repeat_lookup_is_not_fetched(self, cache_table, fetches):
+        metadata_cache.get_metadata(URL, fetches)
+        assert metadata_cache.get_metadata(URL + "?utm_source=share", fetches) == dict(METADATA, fetch=1), "Metadata was not cached."
+        assert len(fetches.urls) == 1, "Url should only have been fetched once."
+
+    def test_hit_from_table(self, cache_table, fetches):
+        put_cached(cache_table, 60)
+        assert metadata_cache.get_metadata(URL, fetches) == METADATA, "Metadata was not as expected."
+        assert fetches.urls == [], "Url should not have been fetched."
+
+    def test_stale_is_revalidated_before_returning(self, cache_table, fetches):
+        put_cached(cache_table, metadata_cache.FRESH_SECONDS + 60)
+
+        assert metadata_cache.get_metadata(URL, fetches) == dict(METADATA, fetch=1), "Revalidated metadata was not returned."
+        assert fetches.urls == [URL], "Url was not revalidated."
+        assert json.loads(get_cached(cache_table)['metadata']['S']) == dict(METADATA, fetch=1), "Revalidated metadata was not stored."
+        assert metadata_cache.get_metadata(URL, fetches) == dict(METADATA, fetch=1), "Revalidated metadata was not cached."
+        assert len(fetches.urls) == 1, "Url should only have been fetched once."
+
+    def test_stale_is_returned_when_revalidation_fails(self, cache_table):
+        put_cached(cache_table, metadata_cache.FRESH_SECONDS + 60)
+
+        def fetch(url):
+            raise Exception("Metadata query failed.")
+
+        assert metadata_cache.get_metadata(URL, fetch) == METADATA, "Stale metadata was not returned."
+        assert not metadata_cache._revalidating, "Revalidation was not released."
+
+    def test_stale_is_returned_when_revalidation_is_claimed_elsewhere(self, cache_table, fetches):
+        put_cached(cache_table, metadata_cache.FRESH_SECONDS + 60)
+        assert metadata_cache.claim_revalidation(metadata_cache.get_key(metadata_cache.normalize_url(URL))), "Revalidation was not claimed."
+
+        assert metadata_cache.get_metadata(URL, fetches) == METADATA, "Stale metadata was not returned."
+        assert fetches.urls == [], "Url should not have been fetched."
+
+    def test_expired_is_fetched(self, cache_table, fetches):
+        put_cached(cache_table, metadata_cache.STALE_SECONDS + 60)
+        assert metadata_cache.get_metadata(URL, fetches) == dict(METADATA, fetch=1), "Metadata was not fetched."
+
+    def test_without_table(self, fetches):
+        metadata_cache.get_metadata(URL, fetches)
+        metadata_cache.get_metadata(URL, fetches)
+        assert len(fetches.urls) == 1, "Container cache was not used."
+
+    def test_fetch_error_is_raised(self, cache_table):
+        def fetch(url):
+            raise Exception("Metadata query failed.")
+
+        with pytest.raises(Exception) as e:
+            metadata_cache.get_metadata(URL, fetch)
+        assert str(e.value) == "Metadata query failed.", "Exception not as expected."
+
+
+class TestRevalidate:
+    def test_revalidation_is_claimed_once(self, cache_table):
+        put_cached(cache_table, metadata_cache.FRESH_SECONDS + 60)
+        key = metadata_cache.get_key(metadata_cache.normalize_url(URL))
+
+        assert metadata_cache.claim_revalidation(key), "Revalidation was not claimed."
+        assert not metadata_cache.claim_revalidation(key), "Revalidation should only be claimed once."
+
+    def test_revalidation_in_progress_is_not_repeated(self, cache_table, fetches):
+        put_cached(cache_table, metadata_cache.FRESH_SECONDS + 60)
+        metadata_cache._revalidating.add(metadata_cache.get_key(metadata_cache.normalize_url(URL)))
+
+        assert metadata_cache.get_metadata(URL, fetches) == METADATA, "Stale metadata was not returned."
+        assert fetches.urls == [], "Url should not have been fetched again."
@@ -0,0 +1,35 @@
+import json
+import mock
+from products import request
+
+
+class TestGetRequest:
+    def test_request_is_reused_for_the_same_event(self, api_create_event):
+        assert request.get_request(api_create_event) is request.get_request(api_create_event), "Request was not reused."
+
+    def test_request_is_replaced_when_body_changes(self, api_create_event):
+        event_request = request.get_request(api_create_event)
+        api_create_event['body'] = json.dumps({"brand": "John Lewis"})
+        assert request.get_request(api_create_event) is not event_request, "Request was not replaced."
+        assert request.get_request(api_create_event).body() == {"brand": "John Lewis"}, "Body was not decoded again."
+
+
+class TestRequest:
+    def test_body_is_decoded_once(self, api_create_event):
+        event_request = request.get_request(api_create_event)
+        with mock.patch("products.request.json.loads", wraps=json.loads) as loads:
+            brand = event_request.body()['brand']
+            assert event_request.body()['brand'] == brand, "Brand was not as expected."
+        assert loads.call_count == 1, "Body should have been decoded once."
+
+    def test_unquoted_path_parameter(self, api_gateway_search_event):
+        api_gateway_search_event['pathParameters']['url'] = "https%3A%2F%2Fwww.example.com%2Fproduct"
+        assert request.get_request(api_gateway_search_event).unquoted_path_parameter('url') == "https://www.example.com/product", "Url was not as expected."
+
+    def test_query_parameter(self, api_gateway_search_event):
+        api_gateway_search_event['queryStringParameters'] = {'engine': 'tokenizer'}
+        assert request.get_request(api_gateway_search_event).query_parameter('engine') == "tokenizer", "Parameter was not as expected."
+
+    def test_query_parameter_without_parameters(self, api_gateway_search_event):
+        api_gateway_search_event['queryStringParameters'] = "null"
+        assert request.get_request(api_gateway_search_event).query_parameter('engine', 'default') == "default", "Parameter was not as expected."
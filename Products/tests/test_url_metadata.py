@@ -1,4 +1,5 @@
 import pytest
+import os
 import json
 import mock
 from products import url_metadata, logger
@@ -118,6 +119,32 @@ class TestHandler:
         body = json.loads(response['body'])
         assert body['error'] == 'Metadata query failed.'
 
+    def test_repeat_lookup_is_cached(self, api_query_metadata_event, metadata_response_wc):
+        with mock.patch("products.url_metadata.query", mock.MagicMock(return_value=metadata_response_wc)) as query:
+            first = url_metadata.handler(api_query_metadata_event, None)
+            second = url_metadata.handler(api_query_metadata_event, None)
+
+        assert query.call_count == 1, "Url should only have been queried once."
+        assert first['body'] == second['body'], "Cached response was not as expected."
+
+    def test_tokenizer_engine(self, api_query_metadata_event):
+        api_query_metadata_event['queryStringParameters'] = {'engine': 'tokenizer'}
+        html = '<head><meta property="og:title" content="Snowman Knitted Romper"><script type="application/ld+json">{"@type": "Product", "offers": {"price": "34", "priceCurrency": "GBP"}}</script></head>'
+
+        with mock.patch("products.fetcher.fetch_head", mock.MagicMock(return_value=html)):
+            response = url_metadata.handler(api_query_metadata_event, None)
+            url_metadata.handler(api_query_metadata_event, None)
+            assert url_metadata.fetcher.fetch_head.call_count == 2, "Tokenizer engine should not have used the cache."
+
+        assert response['statusCode'] == 200, "Response statusCode was not as expected."
+        assert json.loads(response['body']) == {'title': 'Snowman Knitted Romper', 'price': '34.00', 'currency': 'GBP'}, "Body was not as expected."
+
+    def test_unknown_engine(self, api_query_metadata_event):
+        api_query_metadata_event['queryStringParameters'] = {'engine': 'regex'}
+        response = url_metadata.handler(api_query_metadata_event, None)
+        assert response['statusCode'] == 500, "Response statusCode was not as expected."
+        assert json.loads(response['body'])['error'] == "Metadata engine was not one of: metadata_parser, tokenizer.", "Error was not as expected."
+
 
 class TestParseData:
     def test_wc(self, metadata_response_wc):
@@ -262,3 +289,34 @@ class TestQuery:
         with pytest.raises(Exception) as e:
             url_metadata.query('https://www.amazon.co.uk/dp/B01H24LM58/ref=tsm_1_fb_lk')
         assert str(e.value) == "Metadata query failed.", "Exception not as expected."
+
+
+def test_handler_warm_up():
+    assert url_metadata.handler({'source': 'ewelists.warmup'}, None) == {'warmedUp': True, 'primed': []}, "Warm-up response was not as expected."
+
+
+class TestCorpus:
+    @pytest.fixture
+    def corpus(self):
+        corpus_dir = os.path.join(os.path.dirname(__file__), '../benchmarks/corpus')
+        with open(os.path.join(corpus_dir, 'golden.json'), 'r', encoding='utf-8') as f:
+            golden = json.load(f)
+
+        pages = {}
+        for name in golden:
+            with open(os.path.join(corpus_dir, name), 'r', encoding='utf-8') as f:
+                pages[name] = f.read()
+
+        return pages, golden
+
+    def test_tokenizer_matches_golden_data(self, corpus):
+        pages, golden = corpus
+        for name, html in pages.items():
+            assert url_metadata.parse_data(url_metadata.tokenize(html)) == golden[name], "Data of {} was not as expected.".format(name)
+
+    def test_metadata_parser_data_is_in_golden_data(self, corpus):
+        # metadata_parser does not read JSON-LD, so may find fewer fields, but those it finds are right.
+        pages, golden = corpus
+        for name, html in pages.items():
+            data = url_metadata.parse_data(url_metadata.parse("https://www.example.com/" + name, html))
+            assert data.items() <= golden[name].items(), "Data of {} was not as expected.".format(name)